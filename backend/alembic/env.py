@@ -1,7 +1,7 @@
 from logging.config import fileConfig
 import asyncio
 from alembic import context
-from sqlalchemy import pool
+from sqlalchemy import pool, text
 from sqlalchemy.ext.asyncio import async_engine_from_config
 
 # ensure your app path is on PYTHONPATH when running alembic (usually project root)
@@ -10,15 +10,16 @@ from app.db.base import Base
 
 # import all model modules so their classes register on Base.metadata
 # ensure this imports every file that defines models (adjust names as needed)
-from app.models import book, borrow, member  # noqa: F401
+from app.models import book, borrow, member, overdue, stats, recommendation, analytics, inventory, jobs, notices  # noqa: F401
 
 config = context.config
-if config.config_file_name is not None:
+# app.server.migrate() runs this inside the app, whose logging is already set
+# up; fileConfig would replace its handlers and disable every existing logger
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
     fileConfig(config.config_file_name)
 
 # override the URL from settings (asyncpg URL expected)
 config.set_main_option("sqlalchemy.url", settings.sqlalchemy_async_database_url)
-print("hehe", settings.sqlalchemy_async_database_url)
 target_metadata = Base.metadata
 
 
@@ -35,14 +36,32 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 
+# held for the whole run, so app instances starting together upgrade one
+# after the other and all but the first find nothing to do. Session-level:
+# migrations using autocommit_block() commit mid-run, which would release a
+# transaction-level lock.
+MIGRATION_LOCK_ID = 7_210_531
+
+
 def do_run_migrations(connection):
     context.configure(
         connection=connection,
         target_metadata=target_metadata,
     )
 
-    with context.begin_transaction():
-        context.run_migrations()
+    postgres = connection.dialect.name == "postgresql"
+    if postgres:
+        connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        # don't leave the lock query's transaction open for alembic to join
+        connection.commit()
+    try:
+        with context.begin_transaction():
+            context.run_migrations()
+    finally:
+        if postgres:
+            connection.rollback()
+            connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+            connection.commit()
 
 
 async def run_migrations_online() -> None:
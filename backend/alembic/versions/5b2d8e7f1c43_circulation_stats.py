@@ -0,0 +1,46 @@
+"""circulation stats
+
+Revision ID: 5b2d8e7f1c43
+Revises: e4f0a9c3d518
+Create Date: 2026-10-18 15:20:37.418920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2d8e7f1c43'
+down_revision: Union[str, Sequence[str], None] = 'e4f0a9c3d518'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, key in (('book_stats', 'book_id'), ('member_stats', 'member_id')):
+        op.create_table(table,
+        sa.Column(key, sa.Integer(), nullable=False),
+        sa.Column('borrow_count', sa.Integer(), nullable=False),
+        sa.Column('return_count', sa.Integer(), nullable=False),
+        sa.Column('last_borrowed_date', sa.Date(), nullable=True),
+        sa.PrimaryKeyConstraint(key)
+        )
+        # backfill from the existing history (same as app.cli.rebuild_stats)
+        op.execute(
+            f"INSERT INTO {table} ({key}, borrow_count, return_count, last_borrowed_date) "
+            f"SELECT {key}, count(*), count(returned_date), max(borrowed_date) "
+            f"FROM borrow_transactions GROUP BY {key}"
+        )
+    op.create_index('ix_book_stats_popularity', 'book_stats', ['borrow_count', 'book_id'], unique=False)
+    op.create_index('ix_member_stats_activity', 'member_stats', ['borrow_count', 'member_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_member_stats_activity', table_name='member_stats')
+    op.drop_index('ix_book_stats_popularity', table_name='book_stats')
+    op.drop_table('member_stats')
+    op.drop_table('book_stats')
@@ -0,0 +1,42 @@
+"""book cooccurrence
+
+Revision ID: 9a6c3f0e2b71
+Revises: 5b2d8e7f1c43
+Create Date: 2026-10-18 16:05:12.904117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a6c3f0e2b71'
+down_revision: Union[str, Sequence[str], None] = '5b2d8e7f1c43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('book_cooccurrence',
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('other_book_id', sa.Integer(), nullable=False),
+    sa.Column('members', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('book_id', 'other_book_id')
+    )
+    op.create_index('ix_cooccurrence_top', 'book_cooccurrence', ['book_id', 'members', 'other_book_id'], unique=False)
+    # empty watermark: the background job backfills from the first borrow
+    op.create_table('recommender_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('last_borrow_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('recommender_state')
+    op.drop_index('ix_cooccurrence_top', table_name='book_cooccurrence')
+    op.drop_table('book_cooccurrence')
@@ -0,0 +1,73 @@
+"""catalog search indexes
+
+Revision ID: a3c9e1f27b54
+Revises: 52788811fa66
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c9e1f27b54'
+down_revision: Union[str, Sequence[str], None] = '52788811fa66'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# must match app.db.search_index.BOOK_TSVECTOR_SQL for the planner to use it
+BOOK_TSVECTOR_SQL = "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(author, ''))"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.create_index(
+            'ix_books_title_trgm', 'books', ['title'],
+            postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'},
+        )
+        op.create_index(
+            'ix_books_author_trgm', 'books', ['author'],
+            postgresql_using='gin', postgresql_ops={'author': 'gin_trgm_ops'},
+        )
+        op.create_index(
+            'ix_books_search_tsv', 'books', [sa.text(BOOK_TSVECTOR_SQL)],
+            postgresql_using='gin',
+        )
+    else:
+        op.execute(
+            "CREATE VIRTUAL TABLE books_fts USING fts5("
+            "title, author, content='books', content_rowid='id', tokenize='trigram')"
+        )
+        op.execute(
+            "CREATE TRIGGER books_fts_ai AFTER INSERT ON books BEGIN "
+            "INSERT INTO books_fts(rowid, title, author) VALUES (new.id, new.title, new.author); END"
+        )
+        op.execute(
+            "CREATE TRIGGER books_fts_ad AFTER DELETE ON books BEGIN "
+            "INSERT INTO books_fts(books_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author); END"
+        )
+        op.execute(
+            "CREATE TRIGGER books_fts_au AFTER UPDATE OF title, author ON books BEGIN "
+            "INSERT INTO books_fts(books_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author); "
+            "INSERT INTO books_fts(rowid, title, author) VALUES (new.id, new.title, new.author); END"
+        )
+        # index rows that already exist
+        op.execute("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index('ix_books_search_tsv', table_name='books')
+        op.drop_index('ix_books_author_trgm', table_name='books')
+        op.drop_index('ix_books_title_trgm', table_name='books')
+    else:
+        op.execute("DROP TRIGGER IF EXISTS books_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS books_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS books_fts_ai")
+        op.execute("DROP TABLE IF EXISTS books_fts")
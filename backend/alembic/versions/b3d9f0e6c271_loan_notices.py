@@ -0,0 +1,35 @@
+"""loan reminder and overdue notices
+
+Revision ID: b3d9f0e6c271
+Revises: a7c2e5b91d04
+Create Date: 2026-10-18 23:05:48.731206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d9f0e6c271'
+down_revision: Union[str, Sequence[str], None] = 'a7c2e5b91d04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('loan_notices',
+    sa.Column('borrow_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=16), nullable=False),
+    sa.Column('member_id', sa.Integer(), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['borrow_id'], ['borrow_transactions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('borrow_id', 'kind')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('loan_notices')
@@ -0,0 +1,54 @@
+"""borrow access path indexes
+
+Revision ID: c71d4b8e2a90
+Revises: a3c9e1f27b54
+Create Date: 2026-10-18 11:05:23.480917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c71d4b8e2a90'
+down_revision: Union[str, Sequence[str], None] = 'a3c9e1f27b54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+OPEN = sa.text("returned_date IS NULL")
+
+# (name, columns, partial on open borrows) - must match BorrowTransaction.__table_args__
+INDEXES = [
+    ('ix_borrow_open_member_book', ['member_id', 'book_id', 'id'], True),
+    ('ix_borrow_open_book', ['book_id', 'id'], True),
+    ('ix_borrow_open_borrowed_date', ['borrowed_date', 'id'], True),
+    ('ix_borrow_open_due_date', ['due_date', 'id'], True),
+    ('ix_borrow_member', ['member_id', 'id'], False),
+    ('ix_borrow_book', ['book_id', 'id'], False),
+    ('ix_borrow_borrowed_date', ['borrowed_date', 'id'], False),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block; building
+    # online keeps borrow/return writes flowing while the indexes are built
+    with op.get_context().autocommit_block():
+        for name, columns, partial in INDEXES:
+            op.create_index(
+                name, 'borrow_transactions', columns,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+                postgresql_where=OPEN if partial else None,
+                sqlite_where=OPEN if partial else None,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name='borrow_transactions', if_exists=True, postgresql_concurrently=True)
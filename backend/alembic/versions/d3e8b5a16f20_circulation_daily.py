@@ -0,0 +1,47 @@
+"""circulation daily rollups
+
+Revision ID: d3e8b5a16f20
+Revises: 9a6c3f0e2b71
+Create Date: 2026-10-18 17:31:48.227305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3e8b5a16f20'
+down_revision: Union[str, Sequence[str], None] = '9a6c3f0e2b71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('circulation_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('borrows', sa.Integer(), nullable=False),
+    sa.Column('returns', sa.Integer(), nullable=False),
+    sa.Column('lapsed', sa.Integer(), nullable=False),
+    sa.Column('late_returns', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    # backfill from the existing history (same as analytics_crud.rebuild)
+    op.execute(
+        "INSERT INTO circulation_daily (day, borrows, returns, lapsed, late_returns) "
+        "SELECT day, sum(borrows), sum(returns), sum(lapsed), sum(late_returns) FROM ("
+        " SELECT borrowed_date AS day, 1 AS borrows, 0 AS returns, 0 AS lapsed, 0 AS late_returns"
+        "  FROM borrow_transactions WHERE borrowed_date IS NOT NULL"
+        " UNION ALL SELECT returned_date, 0, 1, 0, 0 FROM borrow_transactions WHERE returned_date IS NOT NULL"
+        " UNION ALL SELECT due_date, 0, 0, 1, 0 FROM borrow_transactions"
+        "  WHERE returned_date IS NULL OR returned_date > due_date"
+        " UNION ALL SELECT returned_date, 0, 0, 0, 1 FROM borrow_transactions WHERE returned_date > due_date"
+        ") AS events GROUP BY day"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('circulation_daily')
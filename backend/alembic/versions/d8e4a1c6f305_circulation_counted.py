@@ -0,0 +1,32 @@
+"""ledger of circulation counts already applied
+
+Revision ID: d8e4a1c6f305
+Revises: b3d9f0e6c271
+Create Date: 2026-10-18 23:48:12.504316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8e4a1c6f305'
+down_revision: Union[str, Sequence[str], None] = 'b3d9f0e6c271'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('circulation_counted',
+    sa.Column('borrow_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=16), nullable=False),
+    sa.PrimaryKeyConstraint('borrow_id', 'kind')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('circulation_counted')
@@ -0,0 +1,42 @@
+"""overdue snapshot
+
+Revision ID: e4f0a9c3d518
+Revises: c71d4b8e2a90
+Create Date: 2026-10-18 13:42:10.671254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4f0a9c3d518'
+down_revision: Union[str, Sequence[str], None] = 'c71d4b8e2a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('overdue_snapshot',
+    sa.Column('borrow_id', sa.Integer(), nullable=False),
+    sa.Column('member_id', sa.Integer(), nullable=False),
+    sa.Column('member_name', sa.String(length=100), nullable=False),
+    sa.Column('member_email', sa.String(length=120), nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('book_title', sa.String(length=200), nullable=False),
+    sa.Column('borrowed_date', sa.Date(), nullable=True),
+    sa.Column('due_date', sa.Date(), nullable=False),
+    sa.Column('as_of', sa.Date(), nullable=False),
+    sa.Column('scanned_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('borrow_id')
+    )
+    op.create_index('ix_overdue_snapshot_member', 'overdue_snapshot', ['member_id', 'due_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_overdue_snapshot_member', table_name='overdue_snapshot')
+    op.drop_table('overdue_snapshot')
@@ -0,0 +1,49 @@
+"""per-copy book inventory
+
+Revision ID: f6a1c8d42e97
+Revises: d3e8b5a16f20
+Create Date: 2026-10-18 19:02:11.604518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6a1c8d42e97'
+down_revision: Union[str, Sequence[str], None] = 'd3e8b5a16f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('book_copies',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('barcode', sa.String(length=40), nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('barcode')
+    )
+    op.create_index('ix_book_copies_available', 'book_copies', ['book_id', 'id'], unique=False,
+                    postgresql_where=sa.text("status = 'available'"), sqlite_where=sa.text("status = 'available'"))
+    op.create_index('ix_book_copies_book_status', 'book_copies', ['book_id', 'status'], unique=False)
+    with op.batch_alter_table('borrow_transactions') as batch_op:
+        batch_op.add_column(sa.Column('copy_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_borrow_transactions_copy_id', 'book_copies', ['copy_id'], ['id'])
+    # copies are created by `python -m app.cli.sync_copies`, not here: the
+    # inventory stays off until COPY_INVENTORY_ENABLED is set
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('borrow_transactions') as batch_op:
+        batch_op.drop_constraint('fk_borrow_transactions_copy_id', type_='foreignkey')
+        batch_op.drop_column('copy_id')
+    op.drop_index('ix_book_copies_book_status', table_name='book_copies')
+    op.drop_index('ix_book_copies_available', table_name='book_copies')
+    op.drop_table('book_copies')
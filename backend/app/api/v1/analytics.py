@@ -0,0 +1,28 @@
+from datetime import date
+from fastapi import APIRouter, Depends, Query
+from fastapi import status
+from loguru import logger
+
+from app.db.session import get_db, get_read_db
+from app.schemas.analytics import CirculationSeries, Granularity, RollupRebuildResult
+from app.services import analytics_service
+
+router = APIRouter()
+
+
+@router.get("/circulation", status_code=status.HTTP_200_OK, response_model=CirculationSeries)
+async def get_circulation(
+    db_session=Depends(get_read_db),
+    start: date | None = Query(None, description="First day (default: 90 days before end)"),
+    end: date | None = Query(None, description="Last day (default: today)"),
+    granularity: Granularity = Query(Granularity.day, description="day, week or month"),
+):
+    """Borrows, returns, active loans and overdue loans over time."""
+    return await analytics_service.circulation(db_session, start, end, granularity)
+
+
+@router.post("/rebuild", status_code=status.HTTP_200_OK, response_model=RollupRebuildResult)
+async def rebuild_rollups(db_session=Depends(get_db)):
+    """Recompute the daily rollups from the borrow history."""
+    logger.info("Rebuilding circulation rollups")
+    return await analytics_service.rebuild_rollups(db_session)
@@ -1,41 +1,67 @@
 from fastapi import APIRouter, Depends
 from app.schemas.books import BookCreateRequest, BookUpdateRequest, BookResponse
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from fastapi import status
 from app.services import book_service
-from fastapi import Response
+from fastapi import Response, Request
 from loguru import logger
+from app.schemas.imports import ImportFormat, ImportResult
+from app.services import import_service
 router = APIRouter()
 
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_book(book: BookCreateRequest, db_session=Depends(get_db)):
-    logger.info(f"Creating book with title: {book.title}")
+    logger.info("Creating book with title: {}", book.title)
     return await book_service.create_book(db_session, book)
 
 from app.core.constants import DEFAULT_PAGE, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.pagination import build_page, keyset_cursor, offset_cursor, decode_offset_cursor
 from app.schemas.common import PaginatedResponse
+from app.core.responses import FastJSONResponse
 from fastapi import Query
-import math
 
 @router.get("/", status_code=status.HTTP_200_OK, response_model=PaginatedResponse[BookResponse])
 async def get_books(
-    db_session=Depends(get_db),
+    db_session=Depends(get_read_db),
     page: int = Query(DEFAULT_PAGE, ge=1),
     size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
-    q: str | None = Query(None, description="Search query for title or author")
+    q: str | None = Query(None, description="Search query for title or author"),
+    cursor: str | None = Query(None, description="next_cursor from a previous page; takes precedence over page"),
+    include_total: bool = Query(True, description="Set to false to skip counting; total and pages are then null")
 ):
     skip = (page - 1) * size
-    items, total = await book_service.get_all_books(db_session, skip=skip, limit=size, q=q)
-    pages = math.ceil(total / size) if total > 0 else 0
-    return PaginatedResponse(
-        items=items,
-        total=total,
-        page=page,
-        size=size,
-        pages=pages
-    )
+    items, total = await book_service.get_all_books(db_session, skip=skip, limit=size + 1, q=q, cursor=cursor, include_total=include_total)
+    if q:
+        # search results are ranked, so their cursor is a position in the ranking
+        offset = decode_offset_cursor(cursor) if cursor else skip
+        return FastJSONResponse(build_page(items, total, page, size, cursor, lambda _: offset_cursor(offset + size), BookResponse))
+    return FastJSONResponse(build_page(items, total, page, size, cursor, lambda b: keyset_cursor("id", "asc", None, b.id), BookResponse))
+
+@router.post("/import", status_code=status.HTTP_200_OK, response_model=ImportResult)
+async def import_books(
+    request: Request,
+    db_session=Depends(get_db),
+    format: ImportFormat | None = Query(None, description="ndjson or csv; defaults from Content-Type")
+):
+    """Bulk upsert books keyed on ISBN from an NDJSON or CSV request body."""
+    fmt = format or import_service.format_from_content_type(request.headers.get("content-type"))
+    logger.info("Importing books ({})", fmt.value)
+    return await import_service.import_books(db_session, request.stream(), fmt)
+
+from app.core.constants import RECOMMEND_TOP_K
+from app.schemas.recommendation import Recommendation
+from app.services import recommendation_service
+
+@router.get("/{book_id}/recommendations", status_code=status.HTTP_200_OK, response_model=list[Recommendation])
+async def get_book_recommendations(
+    book_id: int,
+    db_session=Depends(get_read_db),
+    limit: int = Query(10, ge=1, le=RECOMMEND_TOP_K),
+):
+    """Members who borrowed this book also borrowed these, most common first."""
+    return await recommendation_service.recommendations_for(db_session, book_id, limit)
 
 @router.patch("/{book_id}", status_code=status.HTTP_200_OK, response_model=BookResponse)
 async def update_book(book_id: int, book: BookUpdateRequest, db_session=Depends(get_db)):
@@ -44,7 +70,7 @@ async def update_book(book_id: int, book: BookUpdateRequest, db_session=Depends(
 
 @router.delete("/{book_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_book(book_id: int, db_session=Depends(get_db)):
-    logger.info(f"Deleting book with id: {book_id}")
+    logger.info("Deleting book with id: {}", book_id)
     await book_service.delete_book(db_session, book_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
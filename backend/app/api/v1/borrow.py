@@ -3,51 +3,87 @@ from typing import Union
 from app.schemas.borrow import (
     BorrowRequest,
     ReturnRequest,
-    
+    BatchBorrowRequest,
+    BatchReturnRequest,
+    BatchResult,
     ActiveBorrowWithBook,
     ActiveBorrowWithMember,
     ActiveBorrowWithAll,
     Include,
+    ExportFormat,
 )
 from app.schemas.members import Status
 from fastapi import Query
 from fastapi import status
-from app.services import borrow_service
-from app.db.session import get_db
+from app.services import borrow_service, overdue_service
+from app.schemas.overdue import OverdueReport, OverdueSource
+from app.db.session import get_db, get_read_db
 from fastapi import Response
+from fastapi.responses import StreamingResponse
+from datetime import date
 from loguru import logger
 router = APIRouter()
 
 
 
 from app.schemas.common import PaginatedResponse
-import math
 from app.core.constants import DEFAULT_PAGE, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.pagination import build_page, keyset_cursor
+from app.core.responses import FastJSONResponse
+from app.crud.borrow_crud import borrow_sort_key, borrow_item_schema
+
+
+def _borrow_cursor(sort_by: str, order: str):
+    order = "asc" if order == "asc" else "desc"
+    return lambda b: keyset_cursor(sort_by, order, borrow_sort_key(b, sort_by), b.id)
+
 
 @router.get("/", status_code=status.HTTP_200_OK, response_model=PaginatedResponse[Union[ActiveBorrowWithBook, ActiveBorrowWithMember, ActiveBorrowWithAll]])
 async def get_borrows(
-    db_session=Depends(get_db),
+    db_session=Depends(get_read_db),
     status: Status = Query(Status.all, description="Filter by status (borrowed, returned, all)"),
     include: Include = Query(Include.all, description="Include nested related data"),
     page: int = Query(DEFAULT_PAGE, ge=1),
     size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     sort_by: str = Query("borrowed_date", description="Sort by field: book, member, borrowed_date, due_date"),
-    order: str = Query("desc", description="Order: asc, desc")
+    order: str = Query("desc", description="Order: asc, desc"),
+    cursor: str | None = Query(None, description="next_cursor from a previous page; takes precedence over page"),
+    include_total: bool = Query(True, description="Set to false to skip counting; total and pages are then null")
 ):
     skip = (page - 1) * size
-    items, total = await borrow_service.list_borrows(db_session, status=status, include=include.value, skip=skip, limit=size, sort_by=sort_by, order=order)
-    pages = math.ceil(total / size) if total > 0 else 0
-    return PaginatedResponse(
-        items=items,
-        total=total,
-        page=page,
-        size=size,
-        pages=pages
+    items, total = await borrow_service.list_borrows(db_session, status=status, include=include.value, skip=skip, limit=size + 1, sort_by=sort_by, order=order, cursor=cursor, include_total=include_total)
+    return FastJSONResponse(build_page(items, total, page, size, cursor, _borrow_cursor(sort_by, order), borrow_item_schema(include.value)))
+
+@router.get("/export", status_code=status.HTTP_200_OK, response_class=StreamingResponse)
+async def export_borrows(
+    db_session=Depends(get_read_db),
+    format: ExportFormat = Query(ExportFormat.csv, description="csv or ndjson"),
+    status: Status = Query(Status.all, description="Filter by status (borrowed, returned, all)"),
+    borrowed_from: date | None = Query(None, description="Only borrows made on or after this date"),
+    borrowed_to: date | None = Query(None, description="Only borrows made on or before this date"),
+):
+    """Stream the full borrow history with book and member columns joined in."""
+    logger.info("Exporting borrow history as {}", format.value)
+    media_type = "text/csv" if format == ExportFormat.csv else "application/x-ndjson"
+    return StreamingResponse(
+        borrow_service.export_borrows(db_session, format, status, borrowed_from, borrowed_to),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="borrows.{format.value}"'},
     )
 
+@router.get("/overdue", status_code=status.HTTP_200_OK, response_model=OverdueReport)
+async def get_overdue(
+    db_session=Depends(get_read_db),
+    source: OverdueSource = Query(OverdueSource.live, description="live: query borrows now; snapshot: last background scan"),
+    as_of: date | None = Query(None, description="Report overdue as of this date (live only, default today)"),
+    member_id: int | None = Query(None, description="Only this member's overdue loans"),
+):
+    """Overdue loans grouped by member, with days overdue per loan."""
+    return await overdue_service.overdue_report(db_session, source=source, as_of=as_of, member_id=member_id)
+
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def borrow_book(member: BorrowRequest,db_session=Depends(get_db)):
-    logger.info(f"Issuing book with id: {member.book_id} to member with id: {member.member_id}")
+    logger.info("Issuing book with id: {} to member with id: {}", member.book_id, member.member_id)
     return await borrow_service.borrow_book(
         db_session, 
         member_id=member.member_id, 
@@ -58,34 +94,48 @@ async def borrow_book(member: BorrowRequest,db_session=Depends(get_db)):
 
 @router.patch("/", status_code=status.HTTP_200_OK)
 async def return_book(return_request: ReturnRequest, db_session=Depends(get_db)):
-    logger.info(f"Returning book with id: {return_request.book_id} from member with id: {return_request.member_id}")
+    logger.info("Returning book with id: {} from member with id: {}", return_request.book_id, return_request.member_id)
     return await borrow_service.return_book(db_session, return_request=return_request)
 
 
+@router.post("/batch", status_code=status.HTTP_200_OK, response_model=BatchResult)
+async def borrow_books(cart: BatchBorrowRequest, db_session=Depends(get_db)):
+    """Check out several books to one member in one transaction, with a result per book."""
+    logger.info("Issuing {} books to member with id: {}", len(cart.book_ids), cart.member_id)
+    return await borrow_service.borrow_books(
+        db_session,
+        member_id=cart.member_id,
+        book_ids=cart.book_ids,
+        borrowed_date=cart.borrowed_date,
+        due_date=cart.due_date
+    )
+
+@router.patch("/batch", status_code=status.HTTP_200_OK, response_model=BatchResult)
+async def return_books(cart: BatchReturnRequest, db_session=Depends(get_db)):
+    """Return several books from one member in one transaction, with a result per book."""
+    logger.info("Returning {} books from member with id: {}", len(cart.book_ids), cart.member_id)
+    return await borrow_service.return_books(db_session, member_id=cart.member_id, book_ids=cart.book_ids, returned_date=cart.returned_date)
+
+
 @router.get(
     "/active",
     status_code=status.HTTP_200_OK,
     response_model=PaginatedResponse[Union[ActiveBorrowWithBook, ActiveBorrowWithMember, ActiveBorrowWithAll]],
 )
 async def get_active_borrows(
-    db_session=Depends(get_db),
+    db_session=Depends(get_read_db),
     include: Include = Query(Include.all, description="Include nested related data: 'book', 'member', or 'all'"),
     page: int = Query(DEFAULT_PAGE, ge=1),
     size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     sort_by: str = Query("borrowed_date", description="Sort by field: book, member, borrowed_date, due_date"),
-    order: str = Query("desc", description="Order: asc, desc")
+    order: str = Query("desc", description="Order: asc, desc"),
+    cursor: str | None = Query(None, description="next_cursor from a previous page; takes precedence over page"),
+    include_total: bool = Query(True, description="Set to false to skip counting; total and pages are then null")
 ):
     """Return all currently borrowed (not-yet-returned) books."""
     skip = (page - 1) * size
-    items, total = await borrow_service.list_active_borrows(db_session, include=include.value, skip=skip, limit=size, sort_by=sort_by, order=order)
-    pages = math.ceil(total / size) if total > 0 else 0
-    return PaginatedResponse(
-        items=items,
-        total=total,
-        page=page,
-        size=size,
-        pages=pages
-    )
+    items, total = await borrow_service.list_active_borrows(db_session, include=include.value, skip=skip, limit=size + 1, sort_by=sort_by, order=order, cursor=cursor, include_total=include_total)
+    return FastJSONResponse(build_page(items, total, page, size, cursor, _borrow_cursor(sort_by, order), borrow_item_schema(include.value)))
 
 
 @router.delete("/{borrow_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi import status
+from fastapi.responses import StreamingResponse
+
+from app.core.constants import MSG_TOO_MANY_SUBSCRIBERS
+from app.core.events import TooManySubscribers
+from app.schemas.events import EventKind
+from app.services import event_service
+
+router = APIRouter()
+
+
+@router.get("/", status_code=status.HTTP_200_OK, response_class=StreamingResponse)
+async def stream_events(
+    book_id: list[int] | None = Query(None, description="Only events of these books"),
+    kind: list[EventKind] | None = Query(None, description="Only these kinds of event"),
+    last_event_id: str | None = Header(None, description="Resume after this event (sent by EventSource on reconnect)"),
+):
+    """Server-Sent Events stream of availability changes, borrows, returns and the open-loan count.
+
+    Replaces polling the book and borrow listings: each frame is a JSON
+    ``data`` line with an ``event`` kind and an ``id``. ``event: reset``
+    means events were missed and the client should re-fetch; ``event:
+    dropped`` precedes a disconnect of a client that fell too far behind.
+    """
+    try:
+        frames = event_service.open_stream(book_id, kind, last_event_id)
+    except TooManySubscribers:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=MSG_TOO_MANY_SUBSCRIBERS)
+    return StreamingResponse(
+        frames,
+        media_type="text/event-stream",
+        # no caching, and no response buffering in nginx
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,70 +1,76 @@
 from fastapi import APIRouter, Depends
 from app.schemas.members import MemberCreate, MemberUpdate, MemberResponse, Status
 from app.schemas.borrow import BorrowMemberResponse
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 
 from fastapi import status
 from app.services import member_service
 from loguru import logger
+from fastapi import Request
+from app.schemas.imports import ImportFormat, ImportResult
+from app.services import import_service
 router = APIRouter()
 
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_member(member: MemberCreate, db_session=Depends(get_db)):
-    logger.info(f"Creating member with name: {member.name}")
+    logger.info("Creating member with name: {}", member.name)
     return await member_service.create_member(db_session, member)
 
 from app.schemas.common import PaginatedResponse
 from fastapi import Query
-import math
+
+@router.post("/import", status_code=status.HTTP_200_OK, response_model=ImportResult)
+async def import_members(
+    request: Request,
+    db_session=Depends(get_db),
+    format: ImportFormat | None = Query(None, description="ndjson or csv; defaults from Content-Type")
+):
+    """Bulk upsert members keyed on email from an NDJSON or CSV request body."""
+    fmt = format or import_service.format_from_content_type(request.headers.get("content-type"))
+    logger.info("Importing members ({})", fmt.value)
+    return await import_service.import_members(db_session, request.stream(), fmt)
+
 from app.core.constants import DEFAULT_PAGE, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.pagination import build_page, keyset_cursor
+from app.core.responses import FastJSONResponse
 
 @router.get("/{member_id}/borrows", status_code=status.HTTP_200_OK, response_model=PaginatedResponse[BorrowMemberResponse])
 async def get_member_borrows(
     member_id: int, 
     status: Status = Status.all, 
-    db_session=Depends(get_db),
+    db_session=Depends(get_read_db),
     page: int = Query(DEFAULT_PAGE, ge=1),
-    size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+    size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None, description="next_cursor from a previous page; takes precedence over page"),
+    include_total: bool = Query(True, description="Set to false to skip counting; total and pages are then null")
 ):
     skip = (page - 1) * size
-    items, total = await member_service.get_member_borrows(db_session, member_id, status, skip=skip, limit=size)
-    pages = math.ceil(total / size) if total > 0 else 0
-    return PaginatedResponse(
-        items=items,
-        total=total,
-        page=page,
-        size=size,
-        pages=pages
-    )
+    items, total = await member_service.get_member_borrows(db_session, member_id, status, skip=skip, limit=size + 1, cursor=cursor, include_total=include_total)
+    return FastJSONResponse(build_page(items, total, page, size, cursor, lambda b: keyset_cursor("id", "asc", None, b.id), BorrowMemberResponse))
 
 @router.get("/", status_code=status.HTTP_200_OK, response_model=PaginatedResponse[MemberResponse])
 async def get_members(
-    db_session=Depends(get_db),
+    db_session=Depends(get_read_db),
     page: int = Query(DEFAULT_PAGE, ge=1),
-    size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+    size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None, description="next_cursor from a previous page; takes precedence over page"),
+    include_total: bool = Query(True, description="Set to false to skip counting; total and pages are then null")
 ):
     skip = (page - 1) * size
-    items, total = await member_service.get_members(db_session, skip=skip, limit=size)
-    pages = math.ceil(total / size) if total > 0 else 0
-    return PaginatedResponse(
-        items=items,
-        total=total,
-        page=page,
-        size=size,
-        pages=pages
-    )
+    items, total = await member_service.get_members(db_session, skip=skip, limit=size + 1, cursor=cursor, include_total=include_total)
+    return FastJSONResponse(build_page(items, total, page, size, cursor, lambda m: keyset_cursor("id", "asc", None, m.id), MemberResponse))
 
 @router.patch("/{member_id}", status_code=status.HTTP_200_OK, response_model=MemberResponse)
 async def update_member(member_id: int, member: MemberUpdate, db_session=Depends(get_db)):
-    logger.info(f"Updating member with id: {member_id}")
+    logger.info("Updating member with id: {}", member_id)
     return await member_service.update_member(db_session, member_id, member)
 
 
 @router.delete("/{member_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_member(member_id: int, db_session=Depends(get_db)):
-    logger.info(f"Deleting member with id: {member_id}")
+    logger.info("Deleting member with id: {}", member_id)
     await member_service.delete_member(db_session, member_id)
     from fastapi import Response
     return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
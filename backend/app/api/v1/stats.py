@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi import status
+from loguru import logger
+
+from app.core.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.db.session import get_db, get_read_db
+from app.schemas.stats import ActiveMember, BookStatsResponse, PopularBook, StatsRebuildResult
+from app.services import stats_service
+
+router = APIRouter()
+
+
+@router.get("/books/popular", status_code=status.HTTP_200_OK, response_model=list[PopularBook])
+async def get_popular_books(
+    db_session=Depends(get_read_db),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+):
+    """Most borrowed books of all time."""
+    return await stats_service.popular_books(db_session, limit)
+
+
+@router.get("/members/active", status_code=status.HTTP_200_OK, response_model=list[ActiveMember])
+async def get_active_members(
+    db_session=Depends(get_read_db),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+):
+    """Members with the most borrows of all time."""
+    return await stats_service.active_members(db_session, limit)
+
+
+@router.get("/books/{book_id}", status_code=status.HTTP_200_OK, response_model=BookStatsResponse)
+async def get_book_stats(book_id: int, db_session=Depends(get_read_db)):
+    """Lifetime borrow and return counts of one book."""
+    return await stats_service.book_stats(db_session, book_id)
+
+
+@router.post("/rebuild", status_code=status.HTTP_200_OK, response_model=StatsRebuildResult)
+async def rebuild_stats(db_session=Depends(get_db)):
+    """Recompute all circulation stats from the borrow history."""
+    logger.info("Rebuilding circulation stats")
+    return await stats_service.rebuild_stats(db_session)
@@ -4,8 +4,14 @@ from app.api.v1.books import router as books_router
 from app.api.v1.members import router as members_router
 
 from app.api.v1.borrow import router as borrow_router
+from app.api.v1.stats import router as stats_router
+from app.api.v1.analytics import router as analytics_router
+from app.api.v1.events import router as events_router
 
 router = APIRouter(prefix="/v1")
 router.include_router(books_router, prefix="/books", tags=["Books"])
 router.include_router(members_router, prefix="/members", tags=["Members"])
-router.include_router(borrow_router, prefix="/borrow", tags=["Borrow"])
\ No newline at end of file
+router.include_router(borrow_router, prefix="/borrow", tags=["Borrow"])
+router.include_router(stats_router, prefix="/stats", tags=["Stats"])
+router.include_router(analytics_router, prefix="/analytics", tags=["Analytics"])
+router.include_router(events_router, prefix="/events", tags=["Events"])
\ No newline at end of file
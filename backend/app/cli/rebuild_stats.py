@@ -0,0 +1,36 @@
+"""Recompute the circulation stats and daily rollups from the full borrow history.
+
+    cd backend && python -m app.cli.rebuild_stats
+    cd backend && python -m app.cli.rebuild_stats --only rollups
+
+Same as ``POST /stats/rebuild`` and ``POST /analytics/rebuild``, for
+backfilling after a migration or repairing drift, writing straight to the
+configured database.
+"""
+import argparse
+import asyncio
+
+from app.db.session import AsyncSessionLocal, engine
+from app.services import analytics_service, stats_service
+
+REBUILDERS = {"stats": stats_service.rebuild_stats, "rollups": analytics_service.rebuild_rollups}
+
+
+async def run(only: str | None):
+    async with AsyncSessionLocal() as session:
+        for name, rebuild in REBUILDERS.items():
+            if only in (None, name):
+                result = await rebuild(session)
+                print(f"{name}: {result.model_dump_json()}")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", choices=list(REBUILDERS), default=None)
+    args = parser.parse_args()
+    asyncio.run(run(args.only))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Send the due-date reminders and overdue notices owed as of a date.
+
+    cd backend && python -m app.cli.send_notices
+    cd backend && MAIL_TRANSPORT=smtp SMTP_HOST=mail.example.com python -m app.cli.send_notices
+
+Same as the background dispatcher (``NOTICE_INTERVAL_SECONDS``), for running
+from cron instead. Safe to re-run: loans already notified are skipped.
+"""
+import argparse
+import asyncio
+from datetime import date
+
+from app.core.mail import make_transport
+from app.db.session import AsyncSessionLocal, engine
+from app.services import notice_service
+
+
+async def run(as_of: date | None):
+    transport = make_transport()
+    try:
+        async with AsyncSessionLocal() as session:
+            result = await notice_service.dispatch_notices(session, transport, as_of)
+            print(result.model_dump_json())
+    finally:
+        await transport.aclose()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--as-of", type=date.fromisoformat, default=None, help="date to compute due and overdue loans against (default today)")
+    args = parser.parse_args()
+    asyncio.run(run(args.as_of))
+
+
+if __name__ == "__main__":
+    main()
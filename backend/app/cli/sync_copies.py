@@ -0,0 +1,33 @@
+"""Create or reconcile the per-copy inventory of every book.
+
+    cd backend && python -m app.cli.sync_copies
+
+Run once before setting ``COPY_INVENTORY_ENABLED``, and again after loans
+were made with it off: every book gets ``total_copies`` copies, each open
+loan is linked to a copy on loan, and ``available_copies`` is recomputed
+from the copies.
+"""
+import argparse
+import asyncio
+
+from app.core.constants import INVENTORY_SYNC_CHUNK
+from app.db.session import AsyncSessionLocal, engine
+from app.services import inventory_service
+
+
+async def run(chunk: int):
+    async with AsyncSessionLocal() as session:
+        books = await inventory_service.sync_all(session, chunk)
+        print(f"synced copies of {books} books")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunk", type=int, default=INVENTORY_SYNC_CHUNK, help="books per transaction")
+    args = parser.parse_args()
+    asyncio.run(run(args.chunk))
+
+
+if __name__ == "__main__":
+    main()
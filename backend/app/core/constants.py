@@ -3,6 +3,43 @@ DEFAULT_PAGE = 1
 DEFAULT_PAGE_SIZE = 10
 MAX_PAGE_SIZE = 100
 
+# Search
+SEARCH_MIN_TRIGRAM_LEN = 3  # shorter queries cannot use the trigram indexes
+
+# Bulk import
+IMPORT_BATCH_SIZE = 1000  # rows per multi-row INSERT ... ON CONFLICT statement
+IMPORT_MAX_REPORTED_ERRORS = 1000
+
+# Streaming export
+EXPORT_FETCH_SIZE = 1000  # rows per server-side cursor fetch
+
+# Cart checkout / return
+MAX_BATCH_ITEMS = 50  # items per batch borrow or return request
+
+# Co-borrowing recommendations
+RECOMMEND_TOP_K = 20  # neighbours kept per book
+RECOMMEND_HISTORY_LIMIT = 50  # most recent distinct books per member paired with a new borrow
+RECOMMEND_BATCH_SIZE = 5000  # borrow transactions folded in per update transaction
+RECOMMEND_MEMBER_CHUNK = 500  # members whose histories are loaded at a time
+
+# Per-copy inventory
+INVENTORY_SYNC_CHUNK = 1000  # books reconciled per transaction by inventory_service.sync_all
+
+# Server-Sent Events
+EVENTS_RELAY_QUEUE_SIZE = 10000  # events waiting to be sent to the other processes
+EVENTS_RELAY_RETRY_SECONDS = 5.0  # reconnect delay, and idle check interval, of the relay
+
+# Background jobs
+JOB_RETRY_MAX_SECONDS = 3600  # longest backoff between two tries of a job
+
+# Loan notices
+NOTICE_BATCH_SIZE = 5000  # loans read per keyset batch of a notice run, each sent before the next is read
+NOTICE_SEND_CHUNK = 1000  # loans (whole members) claimed, sent and recorded per transaction
+
+# Circulation analytics
+ANALYTICS_DEFAULT_DAYS = 90  # range when no start date is given
+ANALYTICS_MAX_DAYS = 3660  # longest range per request (ten years)
+
 # Book Validation Constants
 BOOK_TITLE_MAX_LEN = 200
 BOOK_AUTHOR_MAX_LEN = 150
@@ -19,3 +56,8 @@ MSG_BOOK_BORROWED = "Cannot delete book that is currently borrowed. It must be r
 MSG_MEMBER_NOT_FOUND = "Member with id {id} not found"
 MSG_MEMBER_ACTIVE_BORROWS = "Cannot delete member with active borrow transactions. All books must be returned first."
 MSG_BORROW_NOT_FOUND = "Borrow transaction with id {id} not found"
+MSG_NO_COPIES_AVAILABLE = "No copies available"
+MSG_NO_ACTIVE_BORROW = "No active borrow record found for this member and book"
+MSG_INVALID_CURSOR = "Invalid or expired pagination cursor"
+MSG_INVALID_RANGE = "start must not be after end, and the range must not exceed {days} days"
+MSG_TOO_MANY_SUBSCRIBERS = "Too many open event streams, retry later"
@@ -0,0 +1,57 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from app.core.settings import settings
+
+
+class CountCache:
+    """Small in-process LRU+TTL cache for ``COUNT(*)`` results of list queries.
+
+    Entries are keyed by ``(table, filter key)``. A whole table is
+    invalidated when a session that wrote to it commits (see
+    ``app.crud.counts``); the TTL bounds how stale a count can be when the
+    write happened in another worker process.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[float, int]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, table: str, key) -> int | None:
+        with self._lock:
+            entry = self._entries.get((table, key))
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[(table, key)]
+                return None
+            self._entries.move_to_end((table, key))
+            return value
+
+    def set(self, table: str, key, value: int) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[(table, key)] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end((table, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, table: str) -> None:
+        with self._lock:
+            for cache_key in [k for k in self._entries if k[0] == table]:
+                del self._entries[cache_key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+count_cache = CountCache(
+    ttl_seconds=settings.COUNT_CACHE_TTL_SECONDS,
+    max_entries=settings.COUNT_CACHE_MAX_ENTRIES,
+)
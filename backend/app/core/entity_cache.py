@@ -0,0 +1,129 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Awaitable, Callable
+
+from app.core.settings import settings
+
+
+class CacheBackend(ABC):
+    """Storage for ``EntityCache``.
+
+    Values are plain snapshots (pydantic models, arrays of ids), never ORM
+    instances, so a backend may serialize them (e.g. a shared Redis backend)
+    without touching a session.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Any | None: ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    def clear(self) -> None: ...
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Per-process LRU with a TTL per entry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class EntityCache:
+    """Read-through cache for single-row lookups by primary key.
+
+    Services call ``invalidate`` after every write that changes a cached
+    entity; the TTL bounds staleness for writes made by other processes.
+    Entries are kept per ``scope`` (see ``app.db.replicas.cache_scope``) so
+    lagging replica reads never answer primary ones.
+    """
+
+    scopes = ("primary", "replica")
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: float, enabled: bool = True):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled and ttl_seconds > 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(scope: str, kind: str, entity_id: int) -> str:
+        return f"{scope}:{kind}:{entity_id}"
+
+    async def get_or_load(
+        self, kind: str, entity_id: int, loader: Callable[[], Awaitable[Any | None]], scope: str | None = "primary"
+    ) -> Any | None:
+        """Cached value for ``kind``/``entity_id``, calling ``loader`` on a miss.
+
+        A loader result of None (no such row) is not cached. A ``scope`` of
+        None bypasses the cache.
+        """
+        if not self.enabled or scope is None:
+            return await loader()
+        key = self._key(scope, kind, entity_id)
+        value = self.backend.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = await loader()
+        if value is not None:
+            self.backend.set(key, value, self.ttl_seconds)
+        return value
+
+    def invalidate(self, kind: str, *entity_ids: int) -> None:
+        for entity_id in entity_ids:
+            for scope in self.scopes:
+                self.backend.delete(self._key(scope, kind, entity_id))
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "hits": self.hits, "misses": self.misses}
+
+
+entity_cache = EntityCache(
+    MemoryCacheBackend(max_entries=settings.ENTITY_CACHE_MAX_ENTRIES),
+    ttl_seconds=settings.ENTITY_CACHE_TTL_SECONDS,
+    enabled=settings.ENTITY_CACHE_ENABLED,
+)
@@ -0,0 +1,195 @@
+import asyncio
+import os
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Iterable
+
+import orjson
+
+from app.core.metrics import EVENT_SUBSCRIBERS, EVENTS_PUBLISHED, EVENT_SUBSCRIBERS_DROPPED
+from app.core.settings import settings
+
+# written when nothing happened for a while, so proxies keep the connection open
+HEARTBEAT = b": keep-alive\n\n"
+# tells the client its view may have missed events and should be re-fetched
+RESET = b"event: reset\ndata: {}\n\n"
+# last frame sent to a subscriber that fell too far behind
+DROPPED = b"event: dropped\ndata: {}\n\n"
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+class Subscription:
+    __slots__ = ("queue", "book_ids", "kinds", "farewell")
+
+    def __init__(self, queue_size: int, book_ids: frozenset[int] | None, kinds: frozenset[str] | None):
+        # holds encoded frames; None ends the stream, after ``farewell`` if set
+        self.queue: asyncio.Queue[bytes | None] = asyncio.Queue(queue_size)
+        self.book_ids = book_ids
+        self.kinds = kinds
+        self.farewell: bytes | None = None
+
+    def wants(self, kind: str, book_id: int | None) -> bool:
+        return (self.kinds is None or kind in self.kinds) and (self.book_ids is None or book_id in self.book_ids)
+
+
+class EventBroker:
+    """In-process fan-out of circulation events to Server-Sent Events streams.
+
+    ``publish`` encodes an event once and hands the same bytes to every
+    interested subscriber with ``put_nowait``; it never awaits, so a slow
+    client cannot hold up the request that published. Each subscriber has
+    a bounded queue; one that fills up is dropped (sent ``event: dropped``
+    and disconnected) rather than buffered without limit. An idle subscriber
+    is a queue and a parked task. Recent events are kept so a reconnecting
+    client can resume from its ``Last-Event-ID``; ids embed a per-process
+    epoch, and a client resuming from an unknown id is told to ``reset``.
+
+    Alone, events only reach subscribers of the process that published
+    them. With several processes, ``relay`` (see ``app.db.event_relay``)
+    takes each published event and every process ``deliver``s it to its own
+    subscribers; when the relay cannot take one, it is delivered locally.
+    """
+
+    def __init__(self, queue_size: int, history: int, max_subscribers: int, heartbeat_seconds: float):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.heartbeat_seconds = heartbeat_seconds
+        self.epoch = self._new_epoch()
+        self._seq = 0
+        self._history: deque[tuple[int, str, int | None, bytes]] = deque(maxlen=history)
+        self._subscribers: set[Subscription] = set()
+        # returns True once it has taken an event for every process
+        self.relay: Callable[[str, dict], bool] | None = None
+
+    @staticmethod
+    def _new_epoch() -> str:
+        return f"{os.getpid():x}{int(time.time()):x}"
+
+    @property
+    def full(self) -> bool:
+        return len(self._subscribers) >= self.max_subscribers
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, kind: str, data: dict) -> None:
+        """Send ``data`` to every subscriber that wants it, in every process when relayed."""
+        if self.relay is not None and self.relay(kind, data):
+            return
+        self.deliver(kind, data)
+
+    def deliver(self, kind: str, data: dict) -> None:
+        """Send ``data`` to this process's subscribers that want it.
+
+        Events of one book carry its ``book_id``; others (``loans``) only
+        reach subscribers not filtering on books.
+        """
+        self._seq += 1
+        book_id = data.get("book_id")
+        frame = b"id: %s-%d\nevent: %s\ndata: %s\n\n" % (self.epoch.encode(), self._seq, kind.encode(), orjson.dumps(data))
+        self._history.append((self._seq, kind, book_id, frame))
+        EVENTS_PUBLISHED.labels(kind).inc()
+        for subscription in list(self._subscribers):
+            if subscription.wants(kind, book_id):
+                try:
+                    subscription.queue.put_nowait(frame)
+                except asyncio.QueueFull:
+                    self._drop(subscription)
+
+    def subscribe(self, book_ids: Iterable[int] | None = None, kinds: Iterable[str] | None = None, last_event_id: str | None = None) -> Subscription:
+        subscription = Subscription(
+            self.queue_size,
+            frozenset(book_ids) if book_ids else None,
+            frozenset(kinds) if kinds else None,
+        )
+        if last_event_id is not None:
+            self._replay(subscription, last_event_id)
+        self._subscribers.add(subscription)
+        EVENT_SUBSCRIBERS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription in self._subscribers:
+            self._subscribers.discard(subscription)
+            EVENT_SUBSCRIBERS.dec()
+
+    def _replay(self, subscription: Subscription, last_event_id: str) -> None:
+        """Queue the kept events after ``last_event_id``, or a reset if some were lost."""
+        epoch, _, seq = last_event_id.rpartition("-")
+        oldest = self._history[0][0] if self._history else self._seq + 1
+        if epoch != self.epoch or not seq.isdigit() or not oldest - 1 <= int(seq) <= self._seq:
+            subscription.queue.put_nowait(RESET)
+            return
+        missed = [frame for n, kind, book_id, frame in self._history if n > int(seq) and subscription.wants(kind, book_id)]
+        if len(missed) > self.queue_size:
+            subscription.queue.put_nowait(RESET)
+            return
+        for frame in missed:
+            subscription.queue.put_nowait(frame)
+
+    def _end(self, subscription: Subscription, farewell: bytes | None = None) -> None:
+        self.unsubscribe(subscription)
+        subscription.farewell = farewell
+        queue = subscription.queue
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    def _drop(self, subscription: Subscription) -> None:
+        EVENT_SUBSCRIBERS_DROPPED.inc()
+        self._end(subscription, DROPPED)
+
+    def reset(self) -> None:
+        """Tell every subscriber to re-fetch (events may have been missed, e.g. while the relay was down)."""
+        for subscription in list(self._subscribers):
+            try:
+                subscription.queue.put_nowait(RESET)
+            except asyncio.QueueFull:
+                self._drop(subscription)
+
+    def close(self) -> None:
+        """End every stream (server shutdown); clients reconnect elsewhere and resume or reset."""
+        for subscription in list(self._subscribers):
+            self._end(subscription)
+
+    def forked(self) -> None:
+        """Start a new epoch in a forked child: ids from the parent's history mean nothing here."""
+        self.epoch = self._new_epoch()
+        self._seq = 0
+        self._history.clear()
+        self._subscribers.clear()
+
+    async def stream(self, book_ids: Iterable[int] | None = None, kinds: Iterable[str] | None = None, last_event_id: str | None = None) -> AsyncIterator[bytes]:
+        """Frames for one SSE response.
+
+        Subscribes on the first iteration, so a response that never starts
+        leaves nothing behind; unsubscribes when the client goes away.
+        """
+        subscription = self.subscribe(book_ids, kinds, last_event_id)
+        try:
+            while True:
+                try:
+                    frame = await asyncio.wait_for(subscription.queue.get(), self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+                    continue
+                if frame is None:
+                    if subscription.farewell:
+                        yield subscription.farewell
+                    return
+                yield frame
+        finally:
+            self.unsubscribe(subscription)
+
+
+event_broker = EventBroker(
+    queue_size=settings.EVENTS_QUEUE_SIZE,
+    history=settings.EVENTS_HISTORY_SIZE,
+    max_subscribers=settings.EVENTS_MAX_SUBSCRIBERS,
+    heartbeat_seconds=settings.EVENTS_HEARTBEAT_SECONDS,
+)
+# workers forked from a preloading master (app.server) each need their own epoch
+os.register_at_fork(after_in_child=event_broker.forked)
@@ -1,10 +1,11 @@
 import logging
+import random
 import sys
 import time
 from loguru import logger
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
 from app.core.settings import settings
+from app.db.instrumentation import collect_queries
+from app.core.metrics import REQUEST_LATENCY, REQUESTS_IN_FLIGHT, route_label
 
 class InterceptHandler(logging.Handler):
     """
@@ -25,26 +26,80 @@ class InterceptHandler(logging.Handler):
 
         logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        response = await call_next(request)
-        process_time = (time.time() - start_time) * 1000
-        
-        status_code = response.status_code
-        method = request.method
-        url = request.url.path
-        
-        log_msg = f"{method} {url} - {status_code} - {process_time:.2f}ms"
-        
-        if status_code >= 500:
-            logger.error(log_msg)
-        elif status_code >= 400:
-            logger.warning(log_msg)
-        else:
-            logger.info(log_msg)
-            
-        return response
+class LoggingMiddleware:
+    """Times each HTTP request, records its metrics and writes one log line.
+
+    Pure ASGI: the response is passed through message by message (streaming
+    responses stay streaming) and no extra task is spawned per request.
+    Successful requests are logged with probability ``LOG_SAMPLE_RATE``;
+    4xx/5xx are always logged. Event streams (``text/event-stream``) stay
+    open for as long as the client listens, so they leave the in-flight
+    gauge once their headers go out and are kept out of the latency histogram.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+        queries = None
+        event_stream = False
+
+        async def send_with_timing(message):
+            nonlocal status_code, event_stream
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                event_stream = _is_event_stream(message)
+                if event_stream:
+                    REQUESTS_IN_FLIGHT.dec()
+                elapsed = (time.perf_counter() - start_time) * 1000
+                server_timing = f'db;dur={queries.total_ms:.2f};desc="{queries.count} queries", app;dur={elapsed:.2f}'
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", server_timing.encode())]}
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            with collect_queries() as queries:
+                await self.app(scope, receive, send_with_timing)
+        finally:
+            process_time = (time.perf_counter() - start_time) * 1000
+            method = scope["method"]
+            if not event_stream:
+                REQUESTS_IN_FLIGHT.dec()
+                REQUEST_LATENCY.labels(method, route_label(scope), str(status_code)).observe(process_time / 1000)
+            _log_request(method, scope["path"], status_code, process_time, queries)
+
+
+def _is_event_stream(message) -> bool:
+    for name, value in message.get("headers", []):
+        if name.lower() == b"content-type":
+            return value.split(b";")[0].strip().lower() == b"text/event-stream"
+    return False
+
+
+def _log_request(method: str, path: str, status_code: int, process_time: float, queries):
+    if status_code < 400 and settings.LOG_SAMPLE_RATE < 1 and random.random() >= settings.LOG_SAMPLE_RATE:
+        return
+    if status_code >= 500:
+        level = "ERROR"
+    elif status_code >= 400:
+        level = "WARNING"
+    else:
+        level = "INFO"
+    logger.log(
+        level, "{} {} - {} - {:.2f}ms - db {}q/{:.2f}ms",
+        method, path, status_code, process_time, queries.count, queries.total_ms,
+    )
+    if queries.slowest:
+        logger.opt(lazy=True).debug(
+            "{} {} slowest queries: {}", lambda: method, lambda: path,
+            lambda: " | ".join(f"{ms:.2f}ms {sql[:200]}" for ms, sql in queries.slowest),
+        )
 
 def setup_logging():
     """
@@ -54,18 +109,23 @@ def setup_logging():
     logger.remove()
     logging.getLogger().handlers = []
     
-    # Configure loguru output
+    # Configure loguru output. enqueue=True hands records to a background
+    # thread, so request handlers never block on stdout.
+    level = settings.log_level
     if settings.LOG_JSON:
-        logger.add(sys.stdout, serialize=True)
+        logger.add(sys.stdout, serialize=True, level=level, enqueue=True)
     else:
         logger.add(
             sys.stdout, 
             serialize=False, 
+            level=level,
+            enqueue=True,
             format="<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
         )
 
-    # Intercept all logs from standard logging (uvicorn, fastapi, etc.)
-    logging.basicConfig(handlers=[InterceptHandler()], level=0, force=True)
+    # Intercept all logs from standard logging (uvicorn, fastapi, etc.); records
+    # below our level are dropped by the stdlib before reaching the handler
+    logging.basicConfig(handlers=[InterceptHandler()], level=level, force=True)
     
     # Optional: explicitly redirect specific loggers if they bypass basicConfig
     for name in ["uvicorn", "uvicorn.error", "uvicorn.access", "fastapi"]:
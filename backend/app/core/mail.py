@@ -0,0 +1,141 @@
+import asyncio
+import itertools
+import smtplib
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from email.message import EmailMessage
+from pathlib import Path
+
+from app.core.settings import settings
+
+
+@dataclass
+class Message:
+    to: str
+    subject: str
+    body: str
+
+
+class Transport(ABC):
+    """Delivers ``Message``s; ``send`` raises when a message was not accepted."""
+
+    @abstractmethod
+    async def send(self, message: Message) -> None: ...
+
+    async def aclose(self) -> None:
+        pass
+
+
+def _email(message: Message, sender: str) -> EmailMessage:
+    email = EmailMessage()
+    email["From"] = sender
+    email["To"] = message.to
+    email["Subject"] = message.subject
+    email.set_content(message.body)
+    return email
+
+
+class SMTPTransport(Transport):
+    """Sends through an SMTP relay over at most ``max_connections`` reused connections.
+
+    ``smtplib`` blocks, so each send runs in a worker thread on a connection
+    taken from the idle pool (or a new one); a connection that fails is
+    closed instead of going back to the pool. A pooled connection the relay
+    has dropped in the meantime is replaced and the message sent again on
+    the new one.
+    """
+
+    def __init__(
+        self, host: str, port: int, sender: str, username: str = "", password: str = "",
+        starttls: bool = True, timeout: float = 30.0, max_connections: int = 4,
+    ):
+        self.host, self.port, self.sender = host, port, sender
+        self.username, self.password = username, password
+        self.starttls, self.timeout = starttls, timeout
+        self._slots = asyncio.Semaphore(max_connections)
+        self._idle: list[smtplib.SMTP] = []
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            conn.starttls()
+        if self.username:
+            conn.login(self.username, self.password)
+        return conn
+
+    def _deliver(self, conn: smtplib.SMTP | None, email: EmailMessage) -> smtplib.SMTP:
+        if conn is not None:
+            try:
+                conn.send_message(email)
+                return conn
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                # relays drop idle connections; the message was not sent, so try once on a fresh one
+                conn.close()
+            except BaseException:
+                conn.close()
+                raise
+        conn = self._connect()
+        try:
+            conn.send_message(email)
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    async def send(self, message: Message) -> None:
+        async with self._slots:
+            conn = self._idle.pop() if self._idle else None
+            conn = await asyncio.to_thread(self._deliver, conn, _email(message, self.sender))
+            self._idle.append(conn)
+
+    async def aclose(self) -> None:
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            try:
+                await asyncio.to_thread(conn.quit)
+            except (smtplib.SMTPException, OSError):
+                conn.close()
+
+
+class FileTransport(Transport):
+    """Writes each message to ``directory`` as an ``.eml`` file, for development."""
+
+    def __init__(self, directory: str, sender: str):
+        self.directory = Path(directory)
+        self.sender = sender
+        self._seq = itertools.count()
+
+    def _write(self, name: str, email: EmailMessage) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / name).write_bytes(email.as_bytes())
+
+    async def send(self, message: Message) -> None:
+        name = f"{time.time_ns()}-{next(self._seq)}.eml"
+        await asyncio.to_thread(self._write, name, _email(message, self.sender))
+
+
+class MemoryTransport(Transport):
+    """Keeps sent messages in ``outbox``, for tests."""
+
+    def __init__(self):
+        self.outbox: list[Message] = []
+
+    async def send(self, message: Message) -> None:
+        self.outbox.append(message)
+
+
+def make_transport() -> Transport:
+    """The transport selected by ``MAIL_TRANSPORT``."""
+    if settings.MAIL_TRANSPORT == "smtp":
+        return SMTPTransport(
+            settings.SMTP_HOST, settings.SMTP_PORT, settings.MAIL_FROM,
+            username=settings.SMTP_USERNAME, password=settings.SMTP_PASSWORD,
+            starttls=settings.SMTP_STARTTLS, timeout=settings.SMTP_TIMEOUT_SECONDS,
+            max_connections=settings.MAIL_CONCURRENCY,
+        )
+    if settings.MAIL_TRANSPORT == "file":
+        return FileTransport(settings.MAIL_FILE_DIR, settings.MAIL_FROM)
+    if settings.MAIL_TRANSPORT == "memory":
+        return MemoryTransport()
+    raise ValueError(f"Unknown MAIL_TRANSPORT {settings.MAIL_TRANSPORT!r}")
@@ -0,0 +1,111 @@
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Prometheus metrics. With several worker processes, set
+# PROMETHEUS_MULTIPROC_DIR to an empty directory shared by the workers:
+# every process then writes its samples there and /metrics aggregates them
+# (gauges are summed over live processes).
+
+REQUEST_LATENCY = Histogram(
+    "nbl_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "nbl_http_requests_in_flight",
+    "HTTP requests currently being handled",
+    multiprocess_mode="livesum",
+)
+BORROWS = Counter("nbl_borrows_total", "Borrow attempts by outcome", ["outcome"])
+RETURNS = Counter("nbl_returns_total", "Return attempts by outcome", ["outcome"])
+
+EVENT_SUBSCRIBERS = Gauge(
+    "nbl_event_subscribers", "Open Server-Sent Events streams", multiprocess_mode="livesum"
+)
+EVENTS_PUBLISHED = Counter("nbl_events_published_total", "Circulation events published by kind", ["kind"])
+EVENT_SUBSCRIBERS_DROPPED = Counter(
+    "nbl_event_subscribers_dropped_total", "Event streams dropped for falling behind"
+)
+
+JOB_QUEUE_DEPTH = Gauge("nbl_job_queue_depth", "Jobs waiting in the in-memory queue", multiprocess_mode="livesum")
+JOBS = Counter(
+    "nbl_jobs_total",
+    "Background jobs by outcome (done, retried, failed, dropped, persisted, dead)",
+    ["job", "outcome"],
+)
+JOB_DURATION = Histogram("nbl_job_duration_seconds", "Background job run time", ["job"])
+NOTICES = Counter("nbl_notices_total", "Loan notice messages by outcome (sent, failed)", ["outcome"])
+
+POOL_CHECKED_OUT = Gauge(
+    "nbl_db_pool_checked_out", "Connections checked out of the pool", ["engine"], multiprocess_mode="livesum"
+)
+POOL_OVERFLOW = Gauge(
+    "nbl_db_pool_overflow", "Connections open beyond pool_size", ["engine"], multiprocess_mode="livesum"
+)
+POOL_WAIT = Histogram(
+    "nbl_db_pool_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["engine"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+# requests that matched no route share one label value
+UNMATCHED_ROUTE = "unmatched"
+
+
+def route_label(scope) -> str:
+    """Route template (``/api/v1/books/{book_id}``), never the raw path, to bound cardinality."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that reports how long each checkout waited."""
+
+    metrics_label = "primary"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT.labels(self.metrics_label).observe(time.perf_counter() - start)
+
+
+def instrument_pool(engine: AsyncEngine, label: str) -> None:
+    """Publish pool usage of ``engine`` under ``label`` on every checkout and checkin."""
+    pool = engine.sync_engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        pool.metrics_label = label
+    if not hasattr(pool, "checkedout"):
+        return
+
+    def update(returning: int):
+        POOL_CHECKED_OUT.labels(label).set(pool.checkedout() - returning)
+        POOL_OVERFLOW.labels(label).set(max(pool.overflow(), 0))
+
+    event.listen(pool, "checkout", lambda *_: update(0))
+    # checkin fires before the connection is back in the pool
+    event.listen(pool, "checkin", lambda *_: update(1))
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Exposition payload and its content type."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,126 @@
+import base64
+import json
+import math
+from datetime import date
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, tuple_
+
+from app.core.constants import MSG_INVALID_CURSOR
+from app.schemas.common import PaginatedResponse
+
+# Keyset ("cursor") pagination helpers.
+#
+# A cursor is an opaque url-safe token carrying the sort field, direction and
+# the (sort key, id) of the last row a client has seen. The next page is then
+# read with ``WHERE (sort_key, id) > (:key, :id)`` against an index instead of
+# skipping OFFSET rows, so deep pages cost the same as the first one.
+
+
+def encode_cursor(payload: dict) -> str:
+    raw = json.dumps(payload, separators=(",", ":"), default=_json_default)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail=MSG_INVALID_CURSOR)
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail=MSG_INVALID_CURSOR)
+    return payload
+
+
+def _json_default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def keyset_cursor(sort_by: str, order: str, key, row_id: int) -> str:
+    return encode_cursor({"s": sort_by, "o": order, "k": key, "id": row_id})
+
+
+def offset_cursor(offset: int) -> str:
+    """Cursor for result sets without a stable key (relevance-ranked search)."""
+    return encode_cursor({"off": offset})
+
+
+def decode_offset_cursor(cursor: str) -> int:
+    offset = decode_cursor(cursor).get("off")
+    if not isinstance(offset, int) or offset < 0:
+        raise HTTPException(status_code=400, detail=MSG_INVALID_CURSOR)
+    return offset
+
+
+def keyset_filter(cursor: str, sort_by: str, order: str, sort_attr, id_attr):
+    """WHERE clause selecting the rows after ``cursor`` for ``ORDER BY sort_attr, id_attr``.
+
+    The cursor must have been issued for the same ``sort_by``/``order``.
+    NULL sort keys are ordered last in both directions (see ``keyset_order``).
+    """
+    payload = decode_cursor(cursor)
+    if payload.get("s") != sort_by or payload.get("o") != order or not isinstance(payload.get("id"), int):
+        raise HTTPException(status_code=400, detail=MSG_INVALID_CURSOR)
+    key, last_id = payload.get("k"), payload["id"]
+    if key is not None and sort_attr.type.python_type is date:
+        try:
+            key = date.fromisoformat(key)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail=MSG_INVALID_CURSOR)
+
+    descending = order == "desc"
+    if sort_attr is id_attr:
+        return id_attr < last_id if descending else id_attr > last_id
+    if key is None:
+        # already inside the trailing block of NULL keys
+        return and_(sort_attr.is_(None), id_attr < last_id if descending else id_attr > last_id)
+
+    after = tuple_(sort_attr, id_attr) < (key, last_id) if descending else tuple_(sort_attr, id_attr) > (key, last_id)
+    if sort_attr.nullable:
+        return or_(after, sort_attr.is_(None))
+    return after
+
+
+def keyset_order(sort_attr, id_attr, order: str):
+    """ORDER BY clauses matching ``keyset_filter``: sort key then id as tie-breaker."""
+    if sort_attr is id_attr:
+        return [id_attr.desc() if order == "desc" else id_attr.asc()]
+    if order == "desc":
+        clauses = [sort_attr.desc(), id_attr.desc()]
+    else:
+        clauses = [sort_attr.asc(), id_attr.asc()]
+    if sort_attr.nullable:
+        clauses[0] = clauses[0].nulls_last()
+    return clauses
+
+
+def build_page(items, total: int | None, page: int, size: int, cursor: str | None, next_cursor_for, schema=None) -> PaginatedResponse:
+    """Build the response for a page fetched with ``limit=size + 1``.
+
+    The extra row only signals that another page exists; ``next_cursor_for``
+    turns the last row actually returned into the cursor for that page.
+    ``total`` is None when the caller skipped the count.
+
+    With ``schema`` the ORM rows are validated into ``PaginatedResponse[schema]``
+    here, once, so the result can be returned as a ``FastJSONResponse``.
+    """
+    has_more = len(items) > size
+    items = list(items[:size])
+    if total is None:
+        pages = None
+    else:
+        pages = math.ceil(total / size) if total > 0 else 0
+    fields = {
+        "items": items,
+        "total": total,
+        "page": None if cursor else page,
+        "size": size,
+        "pages": pages,
+        "next_cursor": next_cursor_for(items[-1]) if has_more else None,
+    }
+    if schema is None:
+        return PaginatedResponse(**fields)
+    return PaginatedResponse[schema].model_validate(fields, from_attributes=True)
@@ -0,0 +1,20 @@
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response that serializes its content exactly once.
+
+    A pydantic model is dumped straight to bytes by pydantic-core (no
+    intermediate dicts, no re-validation against a ``response_model``);
+    any other content goes through orjson. Routes that already built their
+    response model return it wrapped in this class so FastAPI skips its
+    own validate-then-encode pass; it is also the app's default response
+    class for everything else.
+    """
+
+    def render(self, content) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
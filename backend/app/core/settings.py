@@ -13,6 +13,17 @@ class NBLSettings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     LOG_JSON: bool = False
+    LOG_LEVEL: Optional[str] = None  # defaults to DEBUG when DEBUG is on, else INFO
+    LOG_SAMPLE_RATE: float = 1.0  # fraction of successful requests that get an access log line
+
+    # production server (python -m app.server, see gunicorn.conf.py)
+    WORKERS: int = 0  # 0 = one per available CPU; each worker has its own DB pool
+    WORKER_MAX_REQUESTS: int = 10000  # recycle a worker after this many requests; 0 never
+    WORKER_MAX_REQUESTS_JITTER: int = 1000  # so workers don't all recycle at once
+    WORKER_TIMEOUT_SECONDS: int = 60  # a worker silent this long is restarted
+    GRACEFUL_TIMEOUT_SECONDS: int = 30  # on SIGTERM, time for in-flight requests to finish
+    MIGRATE_ON_START: bool = True  # `alembic upgrade head` once in the master process
+    LEADER_RETRY_SECONDS: float = 30.0  # how soon another worker takes over the shared background jobs
 
     # Postgres / SQLAlchemy
     DATABASE_URL: Optional[str] = None  # complete URL if provided
@@ -21,6 +32,71 @@ class NBLSettings(BaseSettings):
     POSTGRES_DB: str = "nbl_db"
     POSTGRES_HOST: str = "db"
     POSTGRES_PORT: int = 5432
+    DATABASE_REPLICA_URLS: str = ""  # comma-separated async URLs of read replicas
+    READ_YOUR_WRITES_SECONDS: float = 5.0  # reads stay on the primary this long after a client writes
+
+    # SQL instrumentation
+    SQL_ECHO: bool = False  # log every statement (development only)
+    SLOW_QUERY_MS: float = 200.0
+    SLOW_QUERY_SAMPLE_RATE: float = 1.0  # fraction of slow queries that get logged
+    N_PLUS_ONE_THRESHOLD: int = 10  # warn when one statement shape repeats more often in a request
+    QUERY_STATS_TOP_N: int = 3  # slowest statements kept per request
+
+    # paginated list totals
+    COUNT_CACHE_TTL_SECONDS: float = 30.0  # 0 disables the count cache
+    COUNT_CACHE_MAX_ENTRIES: int = 1024
+    COUNT_ESTIMATE_MIN_ROWS: int = 0  # Postgres only; 0 always counts exactly
+
+    # book/member lookups by id
+    ENTITY_CACHE_ENABLED: bool = True
+    ENTITY_CACHE_TTL_SECONDS: float = 60.0
+    ENTITY_CACHE_MAX_ENTRIES: int = 10000
+
+    # overdue report
+    OVERDUE_SCAN_INTERVAL_SECONDS: float = 900.0  # background snapshot rebuild; 0 disables
+
+    # "also borrowed" recommendations
+    RECOMMENDER_INTERVAL_SECONDS: float = 300.0  # background co-borrowing update; 0 disables
+
+    # per-copy inventory: checkouts claim a book_copies row instead of updating books
+    COPY_INVENTORY_ENABLED: bool = False  # run `python -m app.cli.sync_copies` before turning on
+    INVENTORY_SYNC_SECONDS: float = 1.0  # how often books.available_copies is refreshed from the copies; 0 refreshes on each checkout
+
+    # Server-Sent Events (GET /api/v1/events/)
+    EVENTS_QUEUE_SIZE: int = 256  # undelivered events per subscriber before it is dropped
+    EVENTS_HISTORY_SIZE: int = 1000  # recent events kept for Last-Event-ID resume
+    EVENTS_MAX_SUBSCRIBERS: int = 10000  # per process
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    EVENTS_RELAY_ENABLED: bool = True  # on Postgres, share events between processes with LISTEN/NOTIFY
+    EVENTS_LOANS_SECONDS: float = 1.0  # open-loan count announced at most this often while loans change; 0 disables
+
+    # background job queue (app.services.job_service)
+    JOB_WORKERS: int = 4  # 0 runs jobs inline in the request that enqueues them
+    JOB_QUEUE_SIZE: int = 10000  # queued jobs held in memory per process
+    JOB_MAX_ATTEMPTS: int = 5  # in-memory tries before a durable job moves to pending_jobs
+    JOB_DEAD_AFTER_ATTEMPTS: int = 20  # a durable job is left dead after this many tries
+    JOB_RETRY_BASE_SECONDS: float = 0.5  # backoff doubles from this after each failure
+    JOB_SWEEP_SECONDS: float = 10.0  # how often due pending_jobs rows are picked up
+    JOB_SWEEP_BATCH: int = 500
+    JOB_LEASE_SECONDS: float = 300.0  # a claimed row becomes due again after this
+    JOB_DRAIN_SECONDS: float = 10.0  # on shutdown, time for queued jobs to finish
+
+    # due-date reminders and overdue notices (app.services.notice_service)
+    NOTICE_INTERVAL_SECONDS: float = 0.0  # background dispatch; 0 disables (or run app.cli.send_notices)
+    NOTICE_REMINDER_DAYS: int = 2  # remind about loans due within this many days
+    NOTICE_OVERDUE_LOOKBACK_DAYS: int = 30  # loans overdue longer than this get no first notice
+
+    # outgoing mail
+    MAIL_TRANSPORT: str = "file"  # smtp, file (.eml files in MAIL_FILE_DIR) or memory
+    MAIL_FROM: str = "library@example.com"
+    MAIL_FILE_DIR: str = "outbox"
+    MAIL_CONCURRENCY: int = 8  # messages in flight (SMTP connections) per dispatcher
+    SMTP_HOST: str = "localhost"
+    SMTP_PORT: int = 587
+    SMTP_USERNAME: str = ""
+    SMTP_PASSWORD: str = ""
+    SMTP_STARTTLS: bool = True
+    SMTP_TIMEOUT_SECONDS: float = 30.0
 
     # alembic (optional)
     ALEMBIC_INI_PATH: str = "alembic.ini"
@@ -40,5 +116,13 @@ class NBLSettings(BaseSettings):
         pw = quote_plus(self.POSTGRES_PASSWORD or "")
         return f"postgresql+asyncpg://{self.POSTGRES_USER}:{pw}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
+    @property
+    def log_level(self) -> str:
+        return (self.LOG_LEVEL or ("DEBUG" if self.DEBUG else "INFO")).upper()
+
+    @property
+    def replica_urls(self) -> list[str]:
+        return [url.strip() for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
 # single shared settings instance
 settings = NBLSettings()
\ No newline at end of file
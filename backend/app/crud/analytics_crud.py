@@ -0,0 +1,90 @@
+from collections import defaultdict
+from datetime import date
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, delete, func, literal, union_all
+
+from app.db.dialects import upsert_insert
+from app.models.analytics import CirculationDaily
+from app.models.borrow import BorrowTransaction
+
+COUNTERS = ("borrows", "returns", "lapsed", "late_returns")
+
+
+async def _add(db: AsyncSession, changes: dict[date, dict[str, int]]) -> None:
+    """Add per-day counter changes with one multi-row upsert, days in order. The caller commits."""
+    if not changes:
+        return
+    insert = upsert_insert(db)
+    stmt = insert(CirculationDaily).values([
+        {"day": day, **{c: delta.get(c, 0) for c in COUNTERS}} for day, delta in sorted(changes.items())
+    ])
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[CirculationDaily.day],
+        set_={c: getattr(CirculationDaily, c) + getattr(stmt.excluded, c) for c in COUNTERS},
+    ))
+
+
+async def record_borrows(db: AsyncSession, borrows: list[tuple[date, date]]) -> None:
+    """Count new ``(borrowed_date, due_date)`` loans.
+
+    A new loan counts as lapsing on its due date until it is returned in time.
+    """
+    changes = defaultdict(lambda: defaultdict(int))
+    for borrowed_date, due_date in borrows:
+        changes[borrowed_date]["borrows"] += 1
+        changes[due_date]["lapsed"] += 1
+    await _add(db, changes)
+
+
+async def record_returns(db: AsyncSession, returns: list[tuple[date, date]]) -> None:
+    """Count ``(returned_date, due_date)`` returns."""
+    changes = defaultdict(lambda: defaultdict(int))
+    for returned_date, due_date in returns:
+        changes[returned_date]["returns"] += 1
+        if returned_date <= due_date:
+            changes[due_date]["lapsed"] -= 1
+        else:
+            changes[returned_date]["late_returns"] += 1
+    await _add(db, changes)
+
+
+async def get_days(db: AsyncSession, start: date, end: date) -> list[CirculationDaily]:
+    result = await db.execute(
+        select(CirculationDaily).where(CirculationDaily.day.between(start, end)).order_by(CirculationDaily.day)
+    )
+    return result.scalars().all()
+
+
+async def get_totals_before(db: AsyncSession, day: date) -> dict[str, int]:
+    """Each counter summed over all days before ``day``."""
+    result = await db.execute(
+        select(*(func.coalesce(func.sum(getattr(CirculationDaily, c)), 0).label(c) for c in COUNTERS))
+        .where(CirculationDaily.day < day)
+    )
+    return dict(result.mappings().one())
+
+
+async def rebuild(db: AsyncSession) -> int:
+    """Recompute every day from ``borrow_transactions`` with one INSERT ... SELECT.
+
+    Each loan contributes up to four events (borrowed, returned, lapsed,
+    returned late), summed per day. The caller commits.
+    """
+    bt = BorrowTransaction
+    zero, one = literal(0), literal(1)
+    late = bt.returned_date > bt.due_date
+    events = union_all(
+        select(bt.borrowed_date.label("day"), one.label("borrows"), zero.label("returns"), zero.label("lapsed"), zero.label("late_returns"))
+        .where(bt.borrowed_date != None),
+        select(bt.returned_date, zero, one, zero, zero).where(bt.returned_date != None),
+        select(bt.due_date, zero, zero, one, zero).where((bt.returned_date == None) | late),
+        select(bt.returned_date, zero, zero, zero, one).where(late),
+    ).subquery()
+    await db.execute(delete(CirculationDaily))
+    result = await db.execute(
+        insert(CirculationDaily).from_select(
+            ["day", *COUNTERS],
+            select(events.c.day, *(func.sum(events.c[c]) for c in COUNTERS)).group_by(events.c.day),
+        )
+    )
+    return result.rowcount
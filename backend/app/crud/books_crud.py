@@ -1,7 +1,7 @@
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update as sa_update
 from app.models.book import Book
 from app.schemas.books import BookCreateRequest
 
@@ -38,20 +38,78 @@ async def get_by_isbn(db: AsyncSession, isbn: str) -> Book | None:
     )
     return result.scalar_one_or_none()
 
-from sqlalchemy import func
+from sqlalchemy import func, literal_column, or_, table, column
+from app.core.constants import SEARCH_MIN_TRIGRAM_LEN
+from app.core.pagination import decode_offset_cursor, keyset_filter
+from app.crud.counts import count_total
+from app.db.dialects import dialect_name, upsert_insert
+from app.db.search_index import BOOK_TSVECTOR_SQL
 
-async def get_books(db: AsyncSession, skip: int = 0, limit: int = 10, q: str | None = None):
-    from sqlalchemy import or_
+# FTS5 shadow table maintained by triggers on SQLite (see app.db.search_index)
+books_fts = table("books_fts", column("rowid"), column("rank"))
+
+
+def _substring_filter(q: str):
+    return or_(
+        Book.title.ilike(f"%{q}%"),
+        Book.author.ilike(f"%{q}%")
+    )
+
+
+def _apply_search(query, q: str, dialect: str):
+    """Restrict ``query`` to books matching ``q`` and order them by relevance.
+
+    Matching keeps the historical semantics (case-insensitive substring of
+    title or author) but is answered from an index: pg_trgm/tsvector GIN
+    indexes on Postgres, the trigram FTS5 table on SQLite. Queries shorter
+    than a trigram cannot use either index and fall back to a plain ILIKE.
+    """
+    if len(q) < SEARCH_MIN_TRIGRAM_LEN:
+        return query.where(_substring_filter(q)).order_by(Book.title, Book.id)
+
+    if dialect == "postgresql":
+        tsvector = literal_column(BOOK_TSVECTOR_SQL)
+        tsquery = func.plainto_tsquery(literal_column("'simple'::regconfig"), q)
+        rank = func.ts_rank_cd(tsvector, tsquery) + func.greatest(
+            func.similarity(Book.title, q),
+            func.similarity(Book.author, q),
+        )
+        return (
+            query.where(or_(_substring_filter(q), tsvector.op("@@")(tsquery)))
+            .order_by(rank.desc(), Book.id)
+        )
+
+    if dialect == "sqlite":
+        # a quoted FTS5 string is matched as a phrase, i.e. a substring for trigrams
+        phrase = '"' + q.replace('"', '""') + '"'
+        return (
+            query.join(books_fts, books_fts.c.rowid == Book.id)
+            .where(literal_column("books_fts").op("MATCH")(phrase))
+            .order_by(books_fts.c.rank, Book.id)
+        )
+
+    return query.where(_substring_filter(q)).order_by(Book.title, Book.id)
+
+
+async def get_books(db: AsyncSession, skip: int = 0, limit: int = 10, q: str | None = None, cursor: str | None = None, include_total: bool = True):
+    """Page through books by id, or by relevance when searching.
+
+    Relevance ranks are not a stable key, so search cursors carry an offset;
+    the plain listing uses keyset pagination on ``id``.
+    """
     query = select(Book)
     if q:
-        search_filter = or_(
-            Book.title.ilike(f"%{q}%"),
-            Book.author.ilike(f"%{q}%")
-        )
-        query = query.where(search_filter)
+        query = _apply_search(query, q, db.bind.dialect.name)
+    else:
+        query = query.order_by(Book.id)
+
+    total = await count_total(db, query, Book.__tablename__, key=q) if include_total else None
 
-    total_result = await db.execute(select(func.count()).select_from(query.alias()))
-    total = total_result.scalar()
+    if cursor and q:
+        skip = decode_offset_cursor(cursor)
+    elif cursor:
+        skip = 0
+        query = query.where(keyset_filter(cursor, "id", "asc", Book.id, Book.id))
 
     result = await db.execute(
         query.offset(skip).limit(limit)
@@ -59,6 +117,76 @@ async def get_books(db: AsyncSession, skip: int = 0, limit: int = 10, q: str | N
     items = result.scalars().all()
     return items, total
 
+async def upsert_many(db: AsyncSession, rows: list[dict]) -> None:
+    """Insert ``rows`` in one statement, updating books whose ISBN exists.
+
+    For existing books ``available_copies`` moves by the change in
+    ``total_copies`` rather than being overwritten, so copies currently on
+    loan stay accounted for; it stops at zero when the new total is below the
+    copies on loan. The caller commits.
+    """
+    insert = upsert_insert(db)
+    stmt = insert(Book).values(rows)
+    # two-argument max() is SQLite's scalar greatest()
+    greatest = func.greatest if dialect_name(db) == "postgresql" else func.max
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Book.isbn],
+        set_={
+            "title": stmt.excluded.title,
+            "author": stmt.excluded.author,
+            "total_copies": stmt.excluded.total_copies,
+            "available_copies": greatest(Book.available_copies + stmt.excluded.total_copies - Book.total_copies, 0),
+        },
+    )
+    await db.execute(stmt)
+
+
+async def get_ids_by_isbn(db: AsyncSession, isbns) -> list[int]:
+    result = await db.execute(select(Book.id).where(Book.isbn.in_(set(isbns))))
+    return list(result.scalars().all())
+
+
+async def take_copy(db: AsyncSession, book_id: int) -> int | None:
+    """Atomically reserve one available copy; the copies left, or None if none was (or no such book).
+
+    A single conditional ``UPDATE ... WHERE available_copies > 0`` so that
+    concurrent checkouts can never drive the count below zero. The caller commits.
+    """
+    result = await db.execute(
+        sa_update(Book)
+        .where(Book.id == book_id, Book.available_copies > 0)
+        .values(available_copies=Book.available_copies - 1)
+        .returning(Book.available_copies),
+        execution_options={"synchronize_session": "fetch"},
+    )
+    return result.scalar_one_or_none()
+
+
+async def lock_books(db: AsyncSession, book_ids, for_update: bool = True) -> dict[int, Book]:
+    """Load and row-lock ``book_ids`` with ``SELECT ... FOR UPDATE`` in id order.
+
+    Locking in a fixed order means two carts sharing titles queue up on the
+    first common book instead of deadlocking. Missing ids are simply absent
+    from the result. ``for_update=False`` only loads them (the per-copy
+    inventory locks copies, not books).
+    """
+    query = select(Book).where(Book.id.in_(sorted(set(book_ids)))).order_by(Book.id)
+    result = await db.execute(query.with_for_update() if for_update else query)
+    return {book.id: book for book in result.scalars().all()}
+
+
+async def release_copy(db: AsyncSession, book_id: int) -> int | None:
+    """Atomically put one copy back on the shelf; the copies now available. The caller commits."""
+    result = await db.execute(
+        sa_update(Book)
+        .where(Book.id == book_id)
+        .values(available_copies=Book.available_copies + 1)
+        .returning(Book.available_copies),
+        execution_options={"synchronize_session": "fetch"},
+    )
+    return result.scalar_one_or_none()
+
+
 async def update(db: AsyncSession, book: Book) -> Book:
     await db.commit()
     await db.refresh(book)
@@ -1,9 +1,15 @@
+from datetime import date
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, select, insert, update as sa_update
 from sqlalchemy.orm import selectinload
 
-from app.schemas.members import Status
+from app.schemas.members import Status, MemberResponse
+from app.schemas.books import BookResponse
+from app.schemas.borrow import ActiveBorrowWithBook, ActiveBorrowWithMember, ActiveBorrowWithAll
 from app.models.borrow import BorrowTransaction
+from app.core.pagination import keyset_filter, keyset_order
+from app.crud.counts import count_total
+from app.core.constants import EXPORT_FETCH_SIZE
 
 async def create(db: AsyncSession, db_borrow: BorrowTransaction) -> BorrowTransaction:
     # db_borrow = BorrowTransaction(**BorrowRequest.model_dump())
@@ -12,6 +18,77 @@ async def create(db: AsyncSession, db_borrow: BorrowTransaction) -> BorrowTransa
     await db.refresh(db_borrow)
     return db_borrow
 
+async def insert_borrow(db: AsyncSession, member_id: int, book_id: int, borrowed_date: date, due_date: date, copy_id: int | None = None) -> BorrowTransaction:
+    """INSERT ... RETURNING the new transaction in one round trip. The caller commits."""
+    result = await db.execute(
+        insert(BorrowTransaction)
+        .values(member_id=member_id, book_id=book_id, borrowed_date=borrowed_date, due_date=due_date, copy_id=copy_id)
+        .returning(BorrowTransaction)
+    )
+    return result.scalar_one()
+
+
+async def insert_borrows(db: AsyncSession, rows: list[dict]) -> list[BorrowTransaction]:
+    """Multi-row INSERT ... RETURNING, results in the order of ``rows``. The caller commits."""
+    if not rows:
+        return []
+    result = await db.execute(
+        insert(BorrowTransaction).returning(BorrowTransaction, sort_by_parameter_order=True),
+        rows,
+    )
+    return list(result.scalars().all())
+
+
+async def lock_open_borrows(db: AsyncSession, member_id: int, book_ids) -> dict[int, BorrowTransaction]:
+    """Row-lock the oldest open borrow of each of ``book_ids`` by ``member_id``.
+
+    Rows are locked in (book_id, id) order; returns them keyed by book id.
+    """
+    result = await db.execute(
+        select(BorrowTransaction)
+        .where(BorrowTransaction.member_id == member_id)
+        .where(BorrowTransaction.book_id.in_(sorted(set(book_ids))))
+        .where(BorrowTransaction.returned_date == None)
+        .order_by(BorrowTransaction.book_id, BorrowTransaction.id)
+        .with_for_update()
+    )
+    oldest = {}
+    for borrow in result.scalars().all():
+        oldest.setdefault(borrow.book_id, borrow)
+    return oldest
+
+
+async def mark_returned(db: AsyncSession, member_id: int, book_id: int, returned_date: date) -> BorrowTransaction | None:
+    """Close the oldest open borrow of ``book_id`` by ``member_id`` in one statement.
+
+    The outer ``returned_date IS NULL`` guard makes concurrent returns of the
+    same loan race safely: only one of them gets a row back. The caller commits.
+    """
+    oldest_open = (
+        select(BorrowTransaction.id)
+        .where(BorrowTransaction.member_id == member_id)
+        .where(BorrowTransaction.book_id == book_id)
+        .where(BorrowTransaction.returned_date == None)
+        .order_by(BorrowTransaction.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        sa_update(BorrowTransaction)
+        .where(BorrowTransaction.id == oldest_open)
+        .where(BorrowTransaction.returned_date == None)
+        .values(returned_date=returned_date)
+        .returning(BorrowTransaction),
+        execution_options={"synchronize_session": "fetch"},
+    )
+    return result.scalar_one_or_none()
+
+
+async def count_open(db: AsyncSession) -> int:
+    """Number of loans not yet returned, counted exactly."""
+    return await db.scalar(select(func.count()).select_from(BorrowTransaction).where(BorrowTransaction.returned_date == None))
+
+
 async def get_active_borrow(db: AsyncSession, member_id: int, book_id: int):
     result = await db.execute(
         select(BorrowTransaction)
@@ -31,17 +108,20 @@ async def update(db: AsyncSession, db_borrow: BorrowTransaction) -> BorrowTransa
     await db.refresh(db_borrow)
     return db_borrow
 
-from sqlalchemy import func
 
-async def get_borrows_by_member(db: AsyncSession, member_id: int, status: Status, skip: int = 0, limit: int = 10):
+async def get_borrows_by_member(db: AsyncSession, member_id: int, status: Status, skip: int = 0, limit: int = 10, cursor: str | None = None, include_total: bool = True):
     query = select(BorrowTransaction).where(BorrowTransaction.member_id == member_id)
     if status == Status.borrowed:
         query = query.where(BorrowTransaction.returned_date == None)
     elif status == Status.returned:
         query = query.where(BorrowTransaction.returned_date != None)
     
-    total_result = await db.execute(select(func.count()).select_from(query.alias()))
-    total = total_result.scalar()
+    total = await count_total(db, query, BorrowTransaction.__tablename__, key=("member", member_id, status)) if include_total else None
+
+    query = query.order_by(BorrowTransaction.id)
+    if cursor:
+        skip = 0
+        query = query.where(keyset_filter(cursor, "id", "asc", BorrowTransaction.id, BorrowTransaction.id))
 
     query = query.options(selectinload(BorrowTransaction.book)).offset(skip).limit(limit)
     result = await db.execute(query)
@@ -49,15 +129,19 @@ async def get_borrows_by_member(db: AsyncSession, member_id: int, status: Status
     return items, total
 
 
-async def get_borrows_by_book(db: AsyncSession, book_id: int, status: Status, skip: int = 0, limit: int = 10):
+async def get_borrows_by_book(db: AsyncSession, book_id: int, status: Status, skip: int = 0, limit: int = 10, cursor: str | None = None, include_total: bool = True):
     query = select(BorrowTransaction).where(BorrowTransaction.book_id == book_id)
     if status == Status.borrowed:
         query = query.where(BorrowTransaction.returned_date == None)
     elif status == Status.returned:
         query = query.where(BorrowTransaction.returned_date != None)
 
-    total_result = await db.execute(select(func.count()).select_from(query.alias()))
-    total = total_result.scalar()
+    total = await count_total(db, query, BorrowTransaction.__tablename__, key=("book", book_id, status)) if include_total else None
+
+    query = query.order_by(BorrowTransaction.id)
+    if cursor:
+        skip = 0
+        query = query.where(keyset_filter(cursor, "id", "asc", BorrowTransaction.id, BorrowTransaction.id))
 
     query = query.options(selectinload(BorrowTransaction.member)).offset(skip).limit(limit)
     result = await db.execute(query)
@@ -75,6 +159,57 @@ async def delete_by_id(db: AsyncSession, borrow_id: int):
     return borrow
 
 
+def _sort_attr(sort_by: str):
+    from app.models.book import Book
+    from app.models.member import Member
+
+    if sort_by == "book":
+        return Book.title
+    elif sort_by == "member":
+        return Member.name
+    elif sort_by == "due_date":
+        return BorrowTransaction.due_date
+    else: # borrowed_date or default
+        return BorrowTransaction.borrowed_date
+
+
+def _includes(include: str) -> tuple[bool, bool]:
+    """Whether a listing returns the book and the member."""
+    return include in ("book", "all"), include in ("member", "all")
+
+
+def borrow_item_schema(include: str):
+    """Response schema of the rows returned by ``get_all_borrows``."""
+    with_book, with_member = _includes(include)
+    if with_book and with_member:
+        return ActiveBorrowWithAll
+    return ActiveBorrowWithBook if with_book else ActiveBorrowWithMember
+
+
+def borrow_sort_key(borrow, sort_by: str):
+    """Value of ``borrow`` for the ``sort_by`` column, used to build its cursor.
+
+    Listing rows sorted on a relation they do not include carry the value
+    in ``_sort_key`` instead.
+    """
+    sort_key = getattr(borrow, "_sort_key", None)
+    if sort_key is not None:
+        return sort_key
+    if sort_by == "book":
+        return borrow.book.title
+    elif sort_by == "member":
+        return borrow.member.name
+    elif sort_by == "due_date":
+        return borrow.due_date
+    else:
+        return borrow.borrowed_date
+
+
+_BORROW_COLUMNS = ("id", "member_id", "book_id", "borrowed_date", "due_date", "returned_date")
+_BOOK_COLUMNS = ("id", "title", "author", "isbn", "total_copies", "available_copies")
+_MEMBER_COLUMNS = ("id", "name", "email")
+
+
 async def get_all_borrows(
     db: AsyncSession, 
     status: Status, 
@@ -82,60 +217,131 @@ async def get_all_borrows(
     skip: int = 0, 
     limit: int = 10,
     sort_by: str = "borrowed_date",
-    order: str = "desc"
+    order: str = "desc",
+    cursor: str | None = None,
+    include_total: bool = True
 ):
-    """Generic fetch for borrows based on status."""
+    """Generic fetch for borrows based on status.
+
+    Read-only listing path: one Core SELECT of just the columns the response
+    needs, joined to books/members as ``include`` and ``sort_by`` require,
+    with rows mapped straight into the ``borrow_item_schema`` models (no ORM
+    instances, identity map or extra relationship queries). A relation joined
+    only for sorting is not returned; just its sort column is read.
+
+    Rows are ordered by ``sort_by`` with ``id`` as tie-breaker, so a ``cursor``
+    (see ``borrow_sort_key``) can resume right after the last row of a page.
+    """
     from app.models.book import Book
     from app.models.member import Member
-    from sqlalchemy import asc, desc
 
-    query = select(BorrowTransaction)
-    
+    status_filter = None
     if status == Status.borrowed:
-        query = query.where(BorrowTransaction.returned_date == None)
+        status_filter = BorrowTransaction.returned_date == None
     elif status == Status.returned:
-        query = query.where(BorrowTransaction.returned_date != None)
-    
-    total_result = await db.execute(select(func.count()).select_from(query.alias()))
-    total = total_result.scalar()
+        status_filter = BorrowTransaction.returned_date != None
 
-    # Join if sorting by related tables
-    if sort_by == "book":
+    count_query = select(BorrowTransaction)
+    if status_filter is not None:
+        count_query = count_query.where(status_filter)
+    total = await count_total(db, count_query, BorrowTransaction.__tablename__, key=("all", status)) if include_total else None
+
+    with_book, with_member = _includes(include)
+    sort_attr = _sort_attr(sort_by)
+    # sorting on a relation that is not returned joins it for the ORDER BY only
+    sort_only = (sort_by == "book" and not with_book) or (sort_by == "member" and not with_member)
+    columns = [getattr(BorrowTransaction, c) for c in _BORROW_COLUMNS]
+    if with_book:
+        columns += [getattr(Book, c).label(f"book_{c}") for c in _BOOK_COLUMNS]
+    if with_member:
+        columns += [getattr(Member, c).label(f"member_{c}") for c in _MEMBER_COLUMNS]
+    if sort_only:
+        columns.append(sort_attr.label("sort_key"))
+    query = select(*columns)
+    if with_book or sort_by == "book":
         query = query.join(Book, BorrowTransaction.book_id == Book.id)
-        sort_attr = Book.title
-    elif sort_by == "member":
+    if with_member or sort_by == "member":
         query = query.join(Member, BorrowTransaction.member_id == Member.id)
-        sort_attr = Member.name
-    elif sort_by == "due_date":
-        sort_attr = BorrowTransaction.due_date
-    else: # borrowed_date or default
-        sort_attr = BorrowTransaction.borrowed_date
+    if status_filter is not None:
+        query = query.where(status_filter)
 
-    if order == "asc":
-        query = query.order_by(asc(sort_attr))
-    else:
-        query = query.order_by(desc(sort_attr))
-
-    options = []
-    if include == "book" or sort_by == "book":
-        options.append(selectinload(BorrowTransaction.book))
-    if include == "member" or sort_by == "member":
-        options.append(selectinload(BorrowTransaction.member))
-    if include == "all" and not (include == "book" or include == "member"):
-        options.extend([
-            selectinload(BorrowTransaction.book),
-            selectinload(BorrowTransaction.member),
-        ])
-
-    query = query.options(*options).offset(skip).limit(limit)
+    order = "asc" if order == "asc" else "desc"
+
+    query = query.order_by(*keyset_order(sort_attr, BorrowTransaction.id, order))
+    if cursor:
+        skip = 0
+        query = query.where(keyset_filter(cursor, sort_by, order, sort_attr, BorrowTransaction.id))
+
+    query = query.offset(skip).limit(limit)
     result = await db.execute(query)
-    items = result.scalars().all()
+
+    # rows come straight from the database, so skip validation
+    schema = borrow_item_schema(include)
+    items = []
+    for row in result.mappings():
+        fields = {c: row[c] for c in _BORROW_COLUMNS}
+        if with_book:
+            fields["book"] = BookResponse.model_construct(**{c: row[f"book_{c}"] for c in _BOOK_COLUMNS})
+        if with_member:
+            fields["member"] = MemberResponse.model_construct(**{c: row[f"member_{c}"] for c in _MEMBER_COLUMNS})
+        item = schema.model_construct(**fields)
+        if sort_only:
+            item._sort_key = row["sort_key"]
+        items.append(item)
     return items, total
 
 
-async def get_active_borrows(db: AsyncSession, include: str = "all", skip: int = 0, limit: int = 10, sort_by: str = "borrowed_date", order: str = "desc"):
-    return await get_all_borrows(db, status=Status.borrowed, include=include, skip=skip, limit=limit, sort_by=sort_by, order=order)
+async def get_active_borrows(db: AsyncSession, include: str = "all", skip: int = 0, limit: int = 10, sort_by: str = "borrowed_date", order: str = "desc", cursor: str | None = None, include_total: bool = True):
+    return await get_all_borrows(db, status=Status.borrowed, include=include, skip=skip, limit=limit, sort_by=sort_by, order=order, cursor=cursor, include_total=include_total)
+
+
+async def get_history_borrows(db: AsyncSession, include: str = "all", skip: int = 0, limit: int = 10, sort_by: str = "borrowed_date", order: str = "desc", cursor: str | None = None, include_total: bool = True):
+    return await get_all_borrows(db, status=Status.returned, include=include, skip=skip, limit=limit, sort_by=sort_by, order=order, cursor=cursor, include_total=include_total)
 
+async def stream_borrow_history(
+    db: AsyncSession,
+    status: Status = Status.all,
+    borrowed_from: date | None = None,
+    borrowed_to: date | None = None,
+    fetch_size: int = EXPORT_FETCH_SIZE,
+):
+    """Yield borrow rows joined with their book and member columns, in id order.
+
+    Rows are read through a server-side cursor ``fetch_size`` at a time as
+    plain mappings (no ORM objects), so memory does not grow with the
+    number of rows exported.
+    """
+    from app.models.book import Book
+    from app.models.member import Member
+
+    query = (
+        select(
+            BorrowTransaction.id,
+            BorrowTransaction.member_id,
+            Member.name.label("member_name"),
+            Member.email.label("member_email"),
+            BorrowTransaction.book_id,
+            Book.title.label("book_title"),
+            Book.author.label("book_author"),
+            Book.isbn.label("book_isbn"),
+            BorrowTransaction.borrowed_date,
+            BorrowTransaction.due_date,
+            BorrowTransaction.returned_date,
+        )
+        .join(Book, BorrowTransaction.book_id == Book.id)
+        .join(Member, BorrowTransaction.member_id == Member.id)
+        .order_by(BorrowTransaction.id)
+    )
+    if status == Status.borrowed:
+        query = query.where(BorrowTransaction.returned_date == None)
+    elif status == Status.returned:
+        query = query.where(BorrowTransaction.returned_date != None)
+    if borrowed_from is not None:
+        query = query.where(BorrowTransaction.borrowed_date >= borrowed_from)
+    if borrowed_to is not None:
+        query = query.where(BorrowTransaction.borrowed_date <= borrowed_to)
 
-async def get_history_borrows(db: AsyncSession, include: str = "all", skip: int = 0, limit: int = 10, sort_by: str = "borrowed_date", order: str = "desc"):
-    return await get_all_borrows(db, status=Status.returned, include=include, skip=skip, limit=limit, sort_by=sort_by, order=order)
\ No newline at end of file
+    result = await db.stream(query.execution_options(yield_per=fetch_size))
+    async for partition in result.mappings().partitions():
+        for row in partition:
+            yield row
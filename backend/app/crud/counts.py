@@ -0,0 +1,83 @@
+import json
+
+from sqlalchemy import event, func, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.count_cache import count_cache
+from app.core.settings import settings
+from app.db.replicas import cache_scope
+
+
+async def _planner_estimate(db: AsyncSession, query) -> int:
+    """Row estimate for ``query`` from the Postgres planner (no rows are read).
+
+    The query keeps its bound parameters: compiled with named placeholders,
+    it is wrapped in a ``text()`` EXPLAIN that binds the same values.
+    """
+    compiled = query.compile(dialect=postgresql.dialect(paramstyle="named"), compile_kwargs={"render_postcompile": True})
+    result = await db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}").bindparams(**compiled.params))
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def count_total(db: AsyncSession, query, table: str, key=None) -> int:
+    """Total number of rows ``query`` returns, for paginated responses.
+
+    Results are cached per ``(table, key)`` until a transaction writing to
+    ``table`` commits. With ``COUNT_ESTIMATE_MIN_ROWS`` set, Postgres first asks the
+    planner, and large results report that estimate instead of counting.
+    Replica and primary reads are cached apart, and reads pinned to the
+    primary for read-your-writes always count (see ``cache_scope``).
+    """
+    scope = cache_scope(db)
+    key = (scope, key)
+    cached = count_cache.get(table, key) if scope else None
+    if cached is not None:
+        return cached
+
+    total = None
+    if settings.COUNT_ESTIMATE_MIN_ROWS > 0 and db.bind.dialect.name == "postgresql":
+        estimate = await _planner_estimate(db, query)
+        if estimate >= settings.COUNT_ESTIMATE_MIN_ROWS:
+            total = estimate
+    if total is None:
+        total_result = await db.execute(select(func.count()).select_from(query.alias()))
+        total = total_result.scalar()
+
+    if scope:
+        count_cache.set(table, key, total)
+    return total
+
+
+# Tables written in a session's current transaction, invalidated when it
+# commits. Covers ORM flushes and INSERT/UPDATE/DELETE statements alike, so
+# any write through a session (crud, services, imports) keeps totals fresh.
+_WRITTEN = "count_cache_written"
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session, flush_context):
+    written = session.info.setdefault(_WRITTEN, set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        written.add(obj.__table__.name)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_statement(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info.setdefault(_WRITTEN, set()).add(orm_execute_state.statement.table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_written(session):
+    for table in session.info.pop(_WRITTEN, ()):
+        count_cache.invalidate(table)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_written(session, previous_transaction):
+    session.info.pop(_WRITTEN, None)
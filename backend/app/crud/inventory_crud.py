@@ -0,0 +1,154 @@
+from collections import defaultdict
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, update as sa_update, func, bindparam
+
+from app.models.book import Book
+from app.models.borrow import BorrowTransaction
+from app.models.inventory import BookCopy, COPY_AVAILABLE, COPY_ON_LOAN, COPY_RETIRED
+
+
+def _first_copy(book_id, status: str):
+    """Lowest-id copy of ``book_id`` in ``status`` that no other transaction holds.
+
+    ``FOR UPDATE SKIP LOCKED`` makes concurrent claims pass over each
+    other's rows instead of queueing on them (SQLite ignores the clause; its
+    writers are serialized anyway).
+    """
+    return (
+        select(BookCopy.id)
+        .where(BookCopy.book_id == book_id, BookCopy.status == status)
+        .order_by(BookCopy.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+
+
+async def _set_status(db: AsyncSession, copy_id, status: str) -> int | None:
+    result = await db.execute(
+        sa_update(BookCopy).where(BookCopy.id == copy_id).values(status=status).returning(BookCopy.id)
+    )
+    return result.scalar_one_or_none()
+
+
+async def claim_copy(db: AsyncSession, book_id: int) -> int | None:
+    """Put a free copy of ``book_id`` on loan; its id, or None if none is free. The caller commits.
+
+    One ``UPDATE ... WHERE id = (SELECT ... FOR UPDATE SKIP LOCKED)``: the
+    ``books`` row is not touched, so checkouts of one title run in parallel.
+    """
+    return await _set_status(db, _first_copy(book_id, COPY_AVAILABLE), COPY_ON_LOAN)
+
+
+async def release_copy(db: AsyncSession, book_id: int, copy_id: int | None) -> None:
+    """Put a returned copy back on the shelf. The caller commits.
+
+    Loans made before the inventory was enabled carry no ``copy_id``; for
+    those any copy of the book that is on loan is released.
+    """
+    await _set_status(db, copy_id if copy_id is not None else _first_copy(book_id, COPY_ON_LOAN), COPY_AVAILABLE)
+
+
+async def refresh_available(db: AsyncSession, book_ids) -> dict[int, int]:
+    """Set ``books.available_copies`` to the number of available copies, in one UPDATE. The caller commits.
+
+    Returns the new counts by book id.
+    """
+    available = (
+        select(func.count())
+        .where(BookCopy.book_id == Book.id, BookCopy.status == COPY_AVAILABLE)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        sa_update(Book)
+        .where(Book.id.in_(sorted(set(book_ids))))
+        .values(available_copies=available)
+        .returning(Book.id, Book.available_copies),
+        execution_options={"synchronize_session": False},
+    )
+    return dict(result.all())
+
+
+async def sync_copies(db: AsyncSession, book_ids) -> dict[int, int]:
+    """Reconcile the copies of ``book_ids`` with ``total_copies`` and the open loans. The caller commits.
+
+    Every open loan gets a copy on loan (the one it already references if
+    any), the other copies go back on the shelf, missing copies are created
+    with barcodes ``<book_id>-<n>`` and available copies beyond
+    ``total_copies`` are retired. Finally ``available_copies`` is refreshed;
+    returns the new counts.
+    """
+    book_ids = sorted(set(book_ids))
+    if not book_ids:
+        return {}
+    totals = dict((await db.execute(select(Book.id, Book.total_copies).where(Book.id.in_(book_ids)))).all())
+    copies, numbered = defaultdict(list), defaultdict(int)
+    for copy_id, book_id, status in (await db.execute(
+        select(BookCopy.id, BookCopy.book_id, BookCopy.status).where(BookCopy.book_id.in_(book_ids)).order_by(BookCopy.id)
+    )).all():
+        numbered[book_id] += 1
+        if status != COPY_RETIRED:
+            copies[book_id].append(copy_id)
+    loans = defaultdict(list)
+    for borrow_id, book_id, copy_id in (await db.execute(
+        select(BorrowTransaction.id, BorrowTransaction.book_id, BorrowTransaction.copy_id)
+        .where(BorrowTransaction.book_id.in_(book_ids), BorrowTransaction.returned_date == None)
+        .order_by(BorrowTransaction.id)
+    )).all():
+        loans[book_id].append((borrow_id, copy_id))
+
+    new_copies = []
+    for book_id, total in totals.items():
+        missing = max(total, len(loans[book_id])) - len(copies[book_id])
+        new_copies += [
+            {"book_id": book_id, "barcode": f"{book_id}-{numbered[book_id] + n}", "status": COPY_AVAILABLE}
+            for n in range(1, missing + 1)
+        ]
+    if new_copies:
+        created = await db.execute(
+            insert(BookCopy).returning(BookCopy.id, BookCopy.book_id, sort_by_parameter_order=True), new_copies
+        )
+        for copy_id, book_id in created.all():
+            copies[book_id].append(copy_id)
+
+    statuses, links = {}, []
+    for book_id, total in totals.items():
+        on_loan, unlinked = set(), []
+        for borrow_id, copy_id in loans[book_id]:
+            if copy_id in copies[book_id] and copy_id not in on_loan:
+                on_loan.add(copy_id)
+            else:
+                unlinked.append(borrow_id)
+        free = [copy_id for copy_id in copies[book_id] if copy_id not in on_loan]
+        for borrow_id in unlinked:
+            copy_id = free.pop(0)
+            links.append({"borrow_id": borrow_id, "copy": copy_id})
+            on_loan.add(copy_id)
+        statuses.update(dict.fromkeys(on_loan, COPY_ON_LOAN))
+        keep = max(total - len(loans[book_id]), 0)
+        for n, copy_id in enumerate(free):
+            statuses[copy_id] = COPY_AVAILABLE if n < keep else COPY_RETIRED
+    if links:
+        await db.execute(
+            sa_update(BorrowTransaction.__table__)
+            .where(BorrowTransaction.id == bindparam("borrow_id"))
+            .values(copy_id=bindparam("copy")),
+            links,
+        )
+    if statuses:
+        await db.execute(
+            sa_update(BookCopy.__table__).where(BookCopy.id == bindparam("copy")).values(status=bindparam("new_status")),
+            [{"copy": copy_id, "new_status": status} for copy_id, status in sorted(statuses.items())],
+        )
+    return await refresh_available(db, book_ids)
+
+
+async def get_book_ids(db: AsyncSession, after: int, limit: int) -> list[int]:
+    """The next ``limit`` book ids above ``after``, for walking the catalogue in chunks."""
+    result = await db.execute(select(Book.id).where(Book.id > after).order_by(Book.id).limit(limit))
+    return list(result.scalars().all())
+
+
+async def delete_copies(db: AsyncSession, book_id: int) -> None:
+    """Remove every copy of a book that is being deleted. The caller commits."""
+    await db.execute(BookCopy.__table__.delete().where(BookCopy.book_id == book_id))
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, delete, update as sa_update
+
+from app.models.jobs import PendingJob, JOB_PENDING, JOB_DEAD
+
+
+async def add_jobs(db: AsyncSession, jobs: list[dict]) -> None:
+    """Insert ``{name, payload, attempts, run_after, last_error}`` rows. The caller commits."""
+    if jobs:
+        await db.execute(insert(PendingJob), [{"status": JOB_PENDING, **job} for job in jobs])
+
+
+async def claim_due(db: AsyncSession, now: datetime, lease: timedelta, limit: int) -> list[PendingJob]:
+    """Lease up to ``limit`` due jobs by pushing their ``run_after`` past the lease. The caller commits.
+
+    ``FOR UPDATE SKIP LOCKED`` lets several processes sweep the table at
+    once without claiming the same rows; a lease that runs out (the process
+    died mid-job) makes the job due again.
+    """
+    due = (
+        select(PendingJob.id)
+        .where(PendingJob.status == JOB_PENDING, PendingJob.run_after <= now)
+        .order_by(PendingJob.run_after, PendingJob.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(
+        sa_update(PendingJob)
+        .where(PendingJob.id.in_(due))
+        .values(run_after=now + lease)
+        .returning(PendingJob),
+        execution_options={"synchronize_session": False},
+    )
+    return list(result.scalars().all())
+
+
+async def complete(db: AsyncSession, job_id: int) -> None:
+    await db.execute(delete(PendingJob).where(PendingJob.id == job_id))
+
+
+async def reschedule(db: AsyncSession, job_id: int, attempts: int, run_after: datetime, error: str, dead: bool) -> None:
+    await db.execute(
+        sa_update(PendingJob)
+        .where(PendingJob.id == job_id)
+        .values(attempts=attempts, run_after=run_after, last_error=error, status=JOB_DEAD if dead else JOB_PENDING)
+    )
@@ -3,6 +3,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.member import Member
 from sqlalchemy import select
 from app.schemas.members import MemberCreate
+from app.core.pagination import keyset_filter
+from app.crud.counts import count_total
+from app.db.dialects import upsert_insert
 
 async def create(db: AsyncSession, member: MemberCreate) -> Member:
     db_member = Member(**member.model_dump())
@@ -17,19 +20,32 @@ async def get_by_id(db: AsyncSession, member_id: int) -> Member | None:
     )
     return result.scalars().first()
 
-from sqlalchemy import func
 
-async def get_all_members(db: AsyncSession, skip: int = 0, limit: int = 10):
-    total_result = await db.execute(select(func.count()).select_from(Member))
-    total = total_result.scalar()
+async def get_all_members(db: AsyncSession, skip: int = 0, limit: int = 10, cursor: str | None = None, include_total: bool = True):
+    query = select(Member).order_by(Member.id)
+    total = await count_total(db, select(Member), Member.__tablename__) if include_total else None
 
+    if cursor:
+        skip = 0
+        query = query.where(keyset_filter(cursor, "id", "asc", Member.id, Member.id))
     result = await db.execute(
-        select(Member).offset(skip).limit(limit)
+        query.offset(skip).limit(limit)
     )
     items = result.scalars().all()
     return items, total
 
 
+async def upsert_many(db: AsyncSession, rows: list[dict]) -> None:
+    """Insert ``rows`` in one statement, updating members whose email exists. The caller commits."""
+    insert = upsert_insert(db)
+    stmt = insert(Member).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Member.email],
+        set_={"name": stmt.excluded.name},
+    )
+    await db.execute(stmt)
+
+
 async def update(db: AsyncSession, member: Member) -> Member:
     await db.commit()
     await db.refresh(member)
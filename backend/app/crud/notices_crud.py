@@ -0,0 +1,80 @@
+from datetime import date, datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, exists, tuple_, and_, case
+
+from app.db.dialects import upsert_insert
+from app.models.book import Book
+from app.models.borrow import BorrowTransaction
+from app.models.member import Member
+from app.models.notices import LoanNotice, NOTICE_OVERDUE, NOTICE_REMINDER
+
+
+async def get_unnotified_loans(
+    db: AsyncSession, as_of: date, due_from: date, due_to: date, after: tuple[date, int] | None, limit: int
+) -> list[tuple[date, int, int, str]]:
+    """``(due_date, id, member_id, kind)`` of open loans due in ``[due_from, due_to]`` still owed a notice.
+
+    Loans due before ``as_of`` are owed an overdue notice, the others a
+    reminder. One keyset batch in ``(due_date, id)`` order, resuming after
+    ``after``, read off the ``ix_borrow_open_due_date`` partial index; the
+    notice check is a primary-key probe per loan.
+    """
+    kind = case((BorrowTransaction.due_date < as_of, NOTICE_OVERDUE), else_=NOTICE_REMINDER)
+    notified = exists().where(LoanNotice.borrow_id == BorrowTransaction.id, LoanNotice.kind == kind)
+    query = (
+        select(BorrowTransaction.due_date, BorrowTransaction.id, BorrowTransaction.member_id, kind)
+        .where(BorrowTransaction.returned_date == None)
+        .where(BorrowTransaction.due_date >= due_from, BorrowTransaction.due_date <= due_to)
+        .where(~notified)
+        .order_by(BorrowTransaction.due_date, BorrowTransaction.id)
+        .limit(limit)
+    )
+    if after is not None:
+        query = query.where(tuple_(BorrowTransaction.due_date, BorrowTransaction.id) > tuple_(*after))
+    result = await db.execute(query)
+    return [tuple(row) for row in result.all()]
+
+
+async def claim_notices(db: AsyncSession, notices: list[tuple[int, str, int]], sent_at: datetime) -> set[tuple[int, str]]:
+    """Insert ``(borrow_id, kind, member_id)`` notice rows; return the ``(borrow_id, kind)`` this call inserted.
+
+    Rows that already exist (another dispatcher got there first) are
+    skipped, not overwritten. The caller commits.
+    """
+    if not notices:
+        return set()
+    insert = upsert_insert(db)
+    stmt = (
+        insert(LoanNotice)
+        .values([{"borrow_id": b, "kind": k, "member_id": m, "sent_at": sent_at} for b, k, m in sorted(notices)])
+        .on_conflict_do_nothing(index_elements=[LoanNotice.borrow_id, LoanNotice.kind])
+        .returning(LoanNotice.borrow_id, LoanNotice.kind)
+    )
+    result = await db.execute(stmt)
+    return {tuple(row) for row in result.all()}
+
+
+async def release_notices(db: AsyncSession, notices: list[tuple[int, str]]) -> None:
+    """Delete ``(borrow_id, kind)`` notice rows so the next run tries them again. The caller commits."""
+    if notices:
+        await db.execute(delete(LoanNotice).where(tuple_(LoanNotice.borrow_id, LoanNotice.kind).in_(notices)))
+
+
+async def get_notice_loans(db: AsyncSession, borrow_ids):
+    """Member and book columns of the loans in ``borrow_ids``, ordered by member, due date and id."""
+    query = (
+        select(
+            BorrowTransaction.id.label("borrow_id"),
+            BorrowTransaction.member_id,
+            Member.name.label("member_name"),
+            Member.email.label("member_email"),
+            Book.title.label("book_title"),
+            BorrowTransaction.due_date,
+        )
+        .join(Member, BorrowTransaction.member_id == Member.id)
+        .join(Book, BorrowTransaction.book_id == Book.id)
+        .where(and_(BorrowTransaction.id.in_(list(borrow_ids)), BorrowTransaction.returned_date == None))
+        .order_by(BorrowTransaction.member_id, BorrowTransaction.due_date, BorrowTransaction.id)
+    )
+    result = await db.execute(query)
+    return result.mappings().all()
@@ -0,0 +1,72 @@
+from datetime import date, datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, delete, func, literal
+
+from app.models.book import Book
+from app.models.borrow import BorrowTransaction
+from app.models.member import Member
+from app.models.overdue import OverdueSnapshot
+
+
+def _overdue_loans(as_of: date, member_id: int | None = None):
+    """Open borrows due before ``as_of`` with their member and book columns.
+
+    Filters on ``due_date`` under ``returned_date IS NULL`` so it is served by
+    the ``ix_borrow_open_due_date`` partial index.
+    """
+    query = (
+        select(
+            BorrowTransaction.id.label("borrow_id"),
+            BorrowTransaction.member_id,
+            Member.name.label("member_name"),
+            Member.email.label("member_email"),
+            BorrowTransaction.book_id,
+            Book.title.label("book_title"),
+            BorrowTransaction.borrowed_date,
+            BorrowTransaction.due_date,
+        )
+        .join(Member, BorrowTransaction.member_id == Member.id)
+        .join(Book, BorrowTransaction.book_id == Book.id)
+        .where(BorrowTransaction.returned_date == None)
+        .where(BorrowTransaction.due_date < as_of)
+    )
+    if member_id is not None:
+        query = query.where(BorrowTransaction.member_id == member_id)
+    return query
+
+
+async def get_overdue_loans(db: AsyncSession, as_of: date, member_id: int | None = None):
+    query = _overdue_loans(as_of, member_id).order_by(BorrowTransaction.member_id, BorrowTransaction.due_date, BorrowTransaction.id)
+    result = await db.execute(query)
+    return result.mappings().all()
+
+
+async def replace_snapshot(db: AsyncSession, as_of: date, scanned_at: datetime) -> int:
+    """Replace the snapshot with the loans overdue at ``as_of`` using one INSERT ... SELECT.
+
+    Rows never pass through Python. The caller commits, so readers see
+    either the old or the new snapshot, never a partial one.
+    """
+    await db.execute(delete(OverdueSnapshot))
+    loans = _overdue_loans(as_of).subquery()
+    columns = [c.name for c in loans.c]
+    result = await db.execute(
+        insert(OverdueSnapshot).from_select(
+            columns + ["as_of", "scanned_at"],
+            select(*loans.c, literal(as_of, OverdueSnapshot.as_of.type), literal(scanned_at, OverdueSnapshot.scanned_at.type)),
+        )
+    )
+    return result.rowcount
+
+
+async def get_snapshot(db: AsyncSession, member_id: int | None = None):
+    query = select(OverdueSnapshot).order_by(OverdueSnapshot.member_id, OverdueSnapshot.due_date, OverdueSnapshot.borrow_id)
+    if member_id is not None:
+        query = query.where(OverdueSnapshot.member_id == member_id)
+    result = await db.execute(query)
+    return result.scalars().all()
+
+
+async def get_snapshot_scanned_at(db: AsyncSession) -> tuple[date | None, datetime | None]:
+    result = await db.execute(select(func.max(OverdueSnapshot.as_of), func.max(OverdueSnapshot.scanned_at)))
+    return tuple(result.one())
@@ -0,0 +1,103 @@
+from collections import Counter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, tuple_
+
+from app.db.dialects import upsert_insert
+from app.models.book import Book
+from app.models.borrow import BorrowTransaction
+from app.models.recommendation import BookCooccurrence, RecommenderState
+
+UPSERT_CHUNK = 10000  # rows per executemany call
+
+
+async def lock_state(db: AsyncSession) -> RecommenderState:
+    """Row-lock the recommender watermark, creating it on first use.
+
+    Holding the lock serializes updates across processes, so a borrow is
+    never folded into the matrix twice. The caller commits.
+    """
+    insert = upsert_insert(db)
+    await db.execute(insert(RecommenderState).values(id=1, last_borrow_id=0).on_conflict_do_nothing(index_elements=[RecommenderState.id]))
+    result = await db.execute(select(RecommenderState).where(RecommenderState.id == 1).with_for_update())
+    return result.scalar_one()
+
+
+async def get_new_borrows(db: AsyncSession, after_id: int, limit: int):
+    """``(id, member_id, book_id)`` of borrows after the watermark, oldest first."""
+    result = await db.execute(
+        select(BorrowTransaction.id, BorrowTransaction.member_id, BorrowTransaction.book_id)
+        .where(BorrowTransaction.id > after_id)
+        .order_by(BorrowTransaction.id)
+        .limit(limit)
+    )
+    return result.all()
+
+
+async def get_member_histories(db: AsyncSession, member_ids, up_to_id: int, limit: int) -> dict[int, list[int]]:
+    """The ``limit`` distinct books each member borrowed most recently up to ``up_to_id``, least recent first."""
+    last = (
+        select(BorrowTransaction.member_id, BorrowTransaction.book_id, func.max(BorrowTransaction.id).label("last_id"))
+        .where(BorrowTransaction.member_id.in_(member_ids))
+        .where(BorrowTransaction.id <= up_to_id)
+        .group_by(BorrowTransaction.member_id, BorrowTransaction.book_id)
+        .subquery()
+    )
+    ranked = select(
+        last.c.member_id, last.c.book_id, last.c.last_id,
+        func.row_number().over(partition_by=last.c.member_id, order_by=last.c.last_id.desc()).label("rank"),
+    ).subquery()
+    result = await db.execute(
+        select(ranked.c.member_id, ranked.c.book_id)
+        .where(ranked.c.rank <= limit)
+        .order_by(ranked.c.member_id, ranked.c.last_id)
+    )
+    histories: dict[int, list[int]] = {}
+    for member_id, book_id in result.all():
+        histories.setdefault(member_id, []).append(book_id)
+    return histories
+
+
+async def get_borrowed_before(db: AsyncSession, pairs, up_to_id: int) -> set[tuple[int, int]]:
+    """The ``(member_id, book_id)`` of ``pairs`` with a borrow up to ``up_to_id``."""
+    result = await db.execute(
+        select(BorrowTransaction.member_id, BorrowTransaction.book_id)
+        .where(tuple_(BorrowTransaction.member_id, BorrowTransaction.book_id).in_(list(pairs)))
+        .where(BorrowTransaction.id <= up_to_id)
+        .distinct()
+    )
+    return {tuple(row) for row in result.all()}
+
+
+async def add_cooccurrences(db: AsyncSession, counts: Counter) -> None:
+    """Add ``counts[(book_id, other_book_id)]`` to the matrix. The caller commits.
+
+    One upsert statement run with executemany (no per-batch SQL compilation).
+    Rows go in key order so concurrent writers lock them in the same order.
+    """
+    if not counts:
+        return
+    insert = upsert_insert(db)
+    stmt = insert(BookCooccurrence)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[BookCooccurrence.book_id, BookCooccurrence.other_book_id],
+        set_={"members": BookCooccurrence.members + stmt.excluded.members},
+    )
+    rows = [{"book_id": a, "other_book_id": b, "members": n} for (a, b), n in sorted(counts.items())]
+    for start in range(0, len(rows), UPSERT_CHUNK):
+        await db.execute(stmt, rows[start:start + UPSERT_CHUNK])
+
+
+async def get_neighbours(db: AsyncSession, book_id: int, limit: int) -> list[tuple[int, int]]:
+    """``(other_book_id, members)`` of the books most often co-borrowed with ``book_id``."""
+    result = await db.execute(
+        select(BookCooccurrence.other_book_id, BookCooccurrence.members)
+        .where(BookCooccurrence.book_id == book_id)
+        .order_by(BookCooccurrence.members.desc(), BookCooccurrence.other_book_id.desc())
+        .limit(limit)
+    )
+    return [tuple(row) for row in result.all()]
+
+
+async def get_book_titles(db: AsyncSession, book_ids) -> dict[int, tuple[str, str]]:
+    result = await db.execute(select(Book.id, Book.title, Book.author).where(Book.id.in_(book_ids)))
+    return {book_id: (title, author) for book_id, title, author in result.all()}
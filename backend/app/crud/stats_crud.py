@@ -0,0 +1,127 @@
+from collections import Counter
+from datetime import date
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, delete, func, case, or_
+
+from app.db.dialects import upsert_insert
+from app.models.book import Book
+from app.models.borrow import BorrowTransaction
+from app.models.member import Member
+from app.models.stats import BookStats, MemberStats, CirculationCounted
+
+
+def _later(current, new):
+    return case((or_(current.is_(None), new > current), new), else_=current)
+
+
+async def _bump(db: AsyncSession, model, key, column: str, counts: Counter, last_dates: dict | None = None) -> None:
+    """Add ``counts[id]`` to ``column`` of each ``id`` row with one multi-row upsert.
+
+    Rows are sorted by id so concurrent transactions lock them in the same order.
+    """
+    if not counts:
+        return
+    insert = upsert_insert(db)
+    rows = [
+        {key.name: id_, "borrow_count": 0, "return_count": 0, column: n, "last_borrowed_date": (last_dates or {}).get(id_)}
+        for id_, n in sorted(counts.items())
+    ]
+    stmt = insert(model).values(rows)
+    set_ = {column: getattr(model, column) + getattr(stmt.excluded, column)}
+    if last_dates:
+        set_["last_borrowed_date"] = _later(model.last_borrowed_date, stmt.excluded.last_borrowed_date)
+    await db.execute(stmt.on_conflict_do_update(index_elements=[key], set_=set_))
+
+
+async def record_borrows(db: AsyncSession, borrows: list[tuple[int, int, date]]) -> None:
+    """Count new ``(member_id, book_id, borrowed_date)`` borrows. The caller commits."""
+    book_dates, member_dates = {}, {}
+    for member_id, book_id, borrowed_date in borrows:
+        book_dates[book_id] = max(borrowed_date, book_dates.get(book_id, borrowed_date))
+        member_dates[member_id] = max(borrowed_date, member_dates.get(member_id, borrowed_date))
+    await _bump(db, BookStats, BookStats.book_id, "borrow_count", Counter(b for _, b, _ in borrows), book_dates)
+    await _bump(db, MemberStats, MemberStats.member_id, "borrow_count", Counter(m for m, _, _ in borrows), member_dates)
+
+
+async def record_returns(db: AsyncSession, returns: list[tuple[int, int]]) -> None:
+    """Count ``(member_id, book_id)`` returns. The caller commits."""
+    await _bump(db, BookStats, BookStats.book_id, "return_count", Counter(b for _, b in returns))
+    await _bump(db, MemberStats, MemberStats.member_id, "return_count", Counter(m for m, _ in returns))
+
+
+async def claim_counted(db: AsyncSession, entries: list[tuple[int, str]]) -> set[tuple[int, str]]:
+    """Insert ``(borrow_id, kind)`` ledger rows; return the ones this call inserted.
+
+    Entries already in the ledger were counted by an earlier run and are
+    skipped. The caller commits, together with the counter updates.
+    """
+    if not entries:
+        return set()
+    insert = upsert_insert(db)
+    stmt = (
+        insert(CirculationCounted)
+        .values([{"borrow_id": b, "kind": k} for b, k in sorted(set(entries))])
+        .on_conflict_do_nothing(index_elements=[CirculationCounted.borrow_id, CirculationCounted.kind])
+        .returning(CirculationCounted.borrow_id, CirculationCounted.kind)
+    )
+    result = await db.execute(stmt)
+    return {tuple(row) for row in result.all()}
+
+
+async def get_top_books(db: AsyncSession, limit: int = 10):
+    """Most borrowed books, read off the ``ix_book_stats_popularity`` index."""
+    query = (
+        select(
+            BookStats.book_id, Book.title, Book.author,
+            BookStats.borrow_count, BookStats.return_count, BookStats.last_borrowed_date,
+        )
+        .join(Book, BookStats.book_id == Book.id)
+        .order_by(BookStats.borrow_count.desc(), BookStats.book_id.desc())
+        .limit(limit)
+    )
+    result = await db.execute(query)
+    return result.mappings().all()
+
+
+async def get_top_members(db: AsyncSession, limit: int = 10):
+    """Most active members, read off the ``ix_member_stats_activity`` index."""
+    query = (
+        select(
+            MemberStats.member_id, Member.name, Member.email,
+            MemberStats.borrow_count, MemberStats.return_count, MemberStats.last_borrowed_date,
+        )
+        .join(Member, MemberStats.member_id == Member.id)
+        .order_by(MemberStats.borrow_count.desc(), MemberStats.member_id.desc())
+        .limit(limit)
+    )
+    result = await db.execute(query)
+    return result.mappings().all()
+
+
+async def get_book_stats(db: AsyncSession, book_id: int) -> BookStats | None:
+    return await db.get(BookStats, book_id)
+
+
+async def rebuild(db: AsyncSession) -> tuple[int, int]:
+    """Recompute both stats tables from ``borrow_transactions`` with INSERT ... SELECT.
+
+    Rows never pass through Python. The caller commits, so readers keep
+    seeing the old counters until the new ones are complete.
+    """
+    counted = {}
+    for model, key in ((BookStats, BorrowTransaction.book_id), (MemberStats, BorrowTransaction.member_id)):
+        await db.execute(delete(model))
+        totals = (
+            select(
+                key,
+                func.count(),
+                func.count(BorrowTransaction.returned_date),
+                func.max(BorrowTransaction.borrowed_date),
+            )
+            .group_by(key)
+        )
+        result = await db.execute(
+            insert(model).from_select([key.name, "borrow_count", "return_count", "last_borrowed_date"], totals)
+        )
+        counted[model] = result.rowcount
+    return counted[BookStats], counted[MemberStats]
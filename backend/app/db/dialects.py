@@ -0,0 +1,13 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def dialect_name(db: AsyncSession) -> str:
+    return db.bind.dialect.name
+
+
+def upsert_insert(db: AsyncSession):
+    """The dialect's ``insert`` construct, which supports ``on_conflict_do_update``."""
+    if dialect_name(db) == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
@@ -0,0 +1,84 @@
+"""Carry circulation events between the app's processes over Postgres LISTEN/NOTIFY.
+
+An ``EventBroker`` only reaches the SSE clients of its own process, and
+behind gunicorn a client is connected to one worker while its borrows and
+returns may be handled by any other. With the relay running, every event
+published in any process is sent as a NOTIFY on ``EVENTS_CHANNEL``; each
+process LISTENs on a connection of its own and delivers what arrives
+(its own events included) to its local subscribers.
+
+Publishing never waits: events go into a bounded outbox drained by the
+relay task on the same connection. While the relay is down, events are
+delivered locally only; local subscribers are told to ``reset`` when it
+reconnects, as they may have missed some.
+"""
+import asyncio
+import contextlib
+
+import orjson
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.constants import EVENTS_RELAY_QUEUE_SIZE
+from app.core.events import EventBroker, event_broker
+
+EVENTS_CHANNEL = "nbl_events"
+
+
+class EventRelay:
+    def __init__(self, broker: EventBroker, queue_size: int = EVENTS_RELAY_QUEUE_SIZE):
+        self.broker = broker
+        self.queue_size = queue_size
+        self._outbox: asyncio.Queue[str] | None = None
+
+    def send(self, kind: str, data: dict) -> bool:
+        """Queue an event for every process; False if it must be delivered locally instead."""
+        if self._outbox is None:
+            return False
+        try:
+            self._outbox.put_nowait(orjson.dumps({"kind": kind, "data": data}).decode())
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    def _received(self, connection, pid, channel, payload: str) -> None:
+        event = orjson.loads(payload)
+        self.broker.deliver(event["kind"], event["data"])
+
+    async def run(self, engine: AsyncEngine, retry: float) -> None:
+        """Relay events until cancelled, reconnecting after ``retry`` seconds (started from the app lifespan)."""
+        self.broker.relay = self.send
+        connected_before = False
+        try:
+            while True:
+                try:
+                    async with engine.connect() as conn:
+                        raw = (await conn.get_raw_connection()).driver_connection
+                        await raw.add_listener(EVENTS_CHANNEL, self._received)
+                        outbox = self._outbox = asyncio.Queue(self.queue_size)
+                        if connected_before:
+                            self.broker.reset()
+                        connected_before = True
+                        try:
+                            while True:
+                                try:
+                                    payload = await asyncio.wait_for(outbox.get(), retry)
+                                except asyncio.TimeoutError:
+                                    # idle: make sure the listening connection is still there
+                                    await raw.execute("SELECT 1")
+                                    continue
+                                await raw.execute("SELECT pg_notify($1, $2)", EVENTS_CHANNEL, payload)
+                        finally:
+                            self._outbox = None
+                            with contextlib.suppress(Exception):
+                                await raw.remove_listener(EVENTS_CHANNEL, self._received)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("Event relay failed; delivering events locally")
+                await asyncio.sleep(retry)
+        finally:
+            self.broker.relay = None
+
+
+event_relay = EventRelay(event_broker)
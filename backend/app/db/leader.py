@@ -0,0 +1,66 @@
+"""Pick the one process that runs the periodic jobs on shared tables.
+
+Every gunicorn worker (and every app instance) runs the same lifespan, but
+the overdue scan, the recommender and the notice dispatcher must run once,
+not once per worker. On Postgres the leader holds a session-level advisory
+lock on a connection of its own; when it exits, is recycled or loses that
+connection the lock goes with it, and another process takes over within
+``retry`` seconds. Other databases have no lock shared between processes,
+so every process leads there (SQLite setups run a single process).
+"""
+import asyncio
+import contextlib
+from typing import Callable
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# held for as long as a process runs the shared background jobs
+LEADER_LOCK_ID = 7_210_532
+
+
+async def _hold(jobs: list[asyncio.Task], heartbeat=None, interval: float = 0) -> None:
+    """Wait until cancelled, or until ``heartbeat`` (run every ``interval`` seconds) fails; then cancel ``jobs``."""
+    try:
+        if heartbeat is None:
+            await asyncio.gather(*jobs)
+            return
+        while True:
+            await asyncio.sleep(interval)
+            await heartbeat()
+    finally:
+        for job in jobs:
+            job.cancel()
+        for job in jobs:
+            with contextlib.suppress(asyncio.CancelledError):
+                await job
+
+
+async def lead(engine: AsyncEngine, start_jobs: Callable[[], list[asyncio.Task]], retry: float) -> None:
+    """Run ``start_jobs()`` while this process is the leader, until cancelled (started from the app lifespan).
+
+    ``start_jobs`` creates the job tasks; they are cancelled when leadership
+    is lost and started again when it is regained.
+    """
+    if engine.dialect.name != "postgresql":
+        await _hold(start_jobs())
+        return
+    while True:
+        try:
+            async with engine.connect() as conn:
+                # no transaction left open on a connection held for hours
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                if await conn.scalar(text("SELECT pg_try_advisory_lock(:id)"), {"id": LEADER_LOCK_ID}):
+                    logger.info("Running the shared background jobs in this process")
+                    try:
+                        # a dropped connection took the lock with it: stop and compete again
+                        await _hold(start_jobs(), lambda: conn.execute(text("SELECT 1")), retry)
+                    finally:
+                        with contextlib.suppress(Exception):
+                            await conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": LEADER_LOCK_ID})
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Background job leadership lost")
+        await asyncio.sleep(retry)
@@ -0,0 +1,101 @@
+import itertools
+import math
+import time
+from http.cookies import SimpleCookie
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+# Read-your-writes: after a successful write the client gets this cookie
+# holding the write time, and its reads stay on the primary until the pin
+# window has passed, so it never reads a replica that has not caught up.
+# The cookie is SameSite=Lax, so cross-site callers and clients that don't
+# keep cookies must echo the same value back in LAST_WRITE_HEADER (it is
+# sent on the write response too); without either they read replicas.
+LAST_WRITE_COOKIE = "nbl_last_write"
+LAST_WRITE_HEADER = "x-nbl-last-write"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# session.info key recording where get_read_db routed a session
+READ_ROUTE = "read_route"
+ROUTE_PRIMARY = "primary"
+ROUTE_REPLICA = "replica"
+ROUTE_PINNED = "pinned"
+
+
+def cache_scope(db: AsyncSession) -> str | None:
+    """Namespace for the count and entity caches on ``db``; None to bypass them.
+
+    Replica reads may lag behind the primary, so they are cached apart from
+    primary reads. A client pinned for read-your-writes skips the caches:
+    its write may have been committed by another worker process, whose
+    invalidation never reached this one.
+    """
+    route = db.info.get(READ_ROUTE, ROUTE_PRIMARY)
+    return None if route == ROUTE_PINNED else route
+
+
+class ReadRouter:
+    """Picks the session factory for a read-only request.
+
+    Replicas are used round-robin; with none configured, or for a client
+    that wrote within ``pin_seconds``, reads go to the primary.
+    """
+
+    def __init__(self, primary: async_sessionmaker, replicas: list[async_sessionmaker], pin_seconds: float):
+        self.primary = primary
+        self.replicas = replicas
+        self.pin_seconds = pin_seconds
+        self._next_replica = itertools.cycle(replicas) if replicas else None
+
+    def wrote_recently(self, cookies: dict[str, str], headers=None) -> bool:
+        marker = cookies.get(LAST_WRITE_COOKIE) or (headers or {}).get(LAST_WRITE_HEADER, "")
+        try:
+            last_write = float(marker)
+        except ValueError:
+            return False
+        return time.time() - last_write < self.pin_seconds
+
+    def route(self, cookies: dict[str, str], headers=None) -> tuple[str, async_sessionmaker]:
+        """``(route, session factory)`` for a read; ``route`` is one of the ``ROUTE_*`` names."""
+        if self._next_replica is None:
+            return ROUTE_PRIMARY, self.primary
+        if self.wrote_recently(cookies, headers):
+            return ROUTE_PINNED, self.primary
+        return ROUTE_REPLICA, next(self._next_replica)
+
+
+class ReadYourWritesMiddleware:
+    """Stamps ``LAST_WRITE_COOKIE`` and ``LAST_WRITE_HEADER`` on every successful non-GET response.
+
+    Pure ASGI so streaming responses pass through untouched. ``get_router``
+    is called per request so tests can swap the router.
+    """
+
+    def __init__(self, app, get_router):
+        self.app = app
+        self.get_router = get_router
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+        router: ReadRouter = self.get_router()
+        if not router.replicas or router.pin_seconds <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                stamp = f"{time.time():.3f}"
+                cookie = SimpleCookie()
+                cookie[LAST_WRITE_COOKIE] = stamp
+                cookie[LAST_WRITE_COOKIE]["max-age"] = math.ceil(router.pin_seconds)
+                cookie[LAST_WRITE_COOKIE]["path"] = "/"
+                cookie[LAST_WRITE_COOKIE]["httponly"] = True
+                cookie[LAST_WRITE_COOKIE]["samesite"] = "Lax"
+                header = cookie[LAST_WRITE_COOKIE].OutputString().encode("latin-1")
+                headers = [(b"set-cookie", header), (LAST_WRITE_HEADER.encode("latin-1"), stamp.encode("latin-1"))]
+                message = {**message, "headers": [*message.get("headers", []), *headers]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
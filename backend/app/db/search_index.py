@@ -0,0 +1,42 @@
+from sqlalchemy import DDL, Table, event
+
+# SQLite (tests / local dev): an external-content FTS5 table using the trigram
+# tokenizer, so MATCH answers the same case-insensitive substring search as
+# ILIKE '%q%' but from an index. Triggers keep it in sync with ``books``; the
+# update trigger only fires when title/author change, not on copy counts.
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5("
+    "title, author, content='books', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN "
+    "INSERT INTO books_fts(rowid, title, author) VALUES (new.id, new.title, new.author); END",
+    "CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN "
+    "INSERT INTO books_fts(books_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author); END",
+    "CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE OF title, author ON books BEGIN "
+    "INSERT INTO books_fts(books_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author); "
+    "INSERT INTO books_fts(rowid, title, author) VALUES (new.id, new.title, new.author); END",
+]
+
+SQLITE_FTS_DROP_DDL = ["DROP TABLE IF EXISTS books_fts"]
+
+# Postgres: trigram GIN indexes serve ILIKE '%q%' on title/author, and an
+# expression GIN index serves whole-word full-text matches. The tsvector
+# expression must stay identical to BOOK_TSVECTOR_SQL used by the queries.
+BOOK_TSVECTOR_SQL = "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(author, ''))"
+
+POSTGRES_SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_books_title_trgm ON books USING gin (title gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_books_author_trgm ON books USING gin (author gin_trgm_ops)",
+    f"CREATE INDEX IF NOT EXISTS ix_books_search_tsv ON books USING gin (({BOOK_TSVECTOR_SQL}))",
+]
+
+
+def register_search_ddl(table: Table) -> None:
+    """Attach the dialect-specific search index DDL to ``table`` so that
+    ``Base.metadata.create_all`` (tests, ``init_db``) builds it too."""
+    for statement in SQLITE_FTS_DDL:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    for statement in SQLITE_FTS_DROP_DDL:
+        event.listen(table, "before_drop", DDL(statement).execute_if(dialect="sqlite"))
+    for statement in POSTGRES_SEARCH_DDL:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="postgresql"))
@@ -4,16 +4,26 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
     async_sessionmaker,
 )
+from fastapi import Request
 from app.core.settings import settings
 from app.db.base import Base
+from app.db.replicas import READ_ROUTE, ReadRouter
+from app.db.instrumentation import instrument_engine
+from app.core.metrics import InstrumentedQueuePool, instrument_pool
 
 # use the async sqlalchemy URL (falls back to constructed URL if DATABASE_URL not set)
 DATABASE_URL = settings.sqlalchemy_async_database_url
 
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True,
-)
+
+def _create_engine(url: str, label: str):
+    # SQLite picks its own pool class (StaticPool for :memory:)
+    pool_args = {} if url.startswith("sqlite") else {"poolclass": InstrumentedQueuePool}
+    new_engine = create_async_engine(url, echo=settings.SQL_ECHO, **pool_args)
+    instrument_engine(new_engine)
+    instrument_pool(new_engine, label)
+    return new_engine
+
+engine = _create_engine(DATABASE_URL, "primary")
 
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -21,6 +31,15 @@ AsyncSessionLocal = async_sessionmaker(
     class_=AsyncSession,
 )
 
+# read-only replicas; GET endpoints use get_read_db
+replica_engines = [_create_engine(url, f"replica{i}") for i, url in enumerate(settings.replica_urls)]
+
+read_router = ReadRouter(
+    primary=AsyncSessionLocal,
+    replicas=[async_sessionmaker(e, expire_on_commit=False, class_=AsyncSession) for e in replica_engines],
+    pin_seconds=settings.READ_YOUR_WRITES_SECONDS,
+)
+
 async def init_db():
     async with engine.begin() as conn:
         # create all tables from your declarative Base
@@ -29,4 +48,11 @@ async def init_db():
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+async def get_read_db(request: Request):
+    """Session for read-only endpoints: a replica, or the primary if the client just wrote."""
+    route, session_factory = read_router.route(request.cookies, request.headers)
+    async with session_factory() as session:
+        session.info[READ_ROUTE] = route
+        yield session
 # ...existing code...
\ No newline at end of file
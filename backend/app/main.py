@@ -1,9 +1,12 @@
+import asyncio
+import contextlib
 from fastapi import FastAPI
 from app.api.v1 import v1_router
 from contextlib import asynccontextmanager
 from app.core.logging_config import setup_logging, LoggingMiddleware
 from loguru import logger
 from app.core.settings import settings
+from app.core.constants import EVENTS_RELAY_RETRY_SECONDS
 
 # Initialize Logger
 setup_logging()
@@ -11,20 +14,66 @@ setup_logging()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info(f"Starting up {settings.PROJECT_NAME}")
+    from app.db.session import AsyncSessionLocal, engine
+    from app.db.leader import lead
+
+    def start_shared_jobs():
+        # jobs on shared tables: run by one process at a time (see app.db.leader)
+        shared = []
+        if settings.OVERDUE_SCAN_INTERVAL_SECONDS > 0:
+            from app.services.overdue_service import run_overdue_scanner
+            shared.append(asyncio.create_task(run_overdue_scanner(AsyncSessionLocal, settings.OVERDUE_SCAN_INTERVAL_SECONDS)))
+        if settings.RECOMMENDER_INTERVAL_SECONDS > 0:
+            from app.services.recommendation_service import run_recommender
+            shared.append(asyncio.create_task(run_recommender(AsyncSessionLocal, settings.RECOMMENDER_INTERVAL_SECONDS)))
+        if settings.NOTICE_INTERVAL_SECONDS > 0:
+            from app.services.notice_service import run_notice_dispatcher
+            shared.append(asyncio.create_task(run_notice_dispatcher(AsyncSessionLocal, settings.NOTICE_INTERVAL_SECONDS)))
+        return shared
+
+    jobs = [asyncio.create_task(lead(engine, start_shared_jobs, settings.LEADER_RETRY_SECONDS))]
+    if settings.EVENTS_RELAY_ENABLED and engine.dialect.name == "postgresql":
+        # SSE clients of every worker see the events of all of them
+        from app.db.event_relay import event_relay
+        jobs.append(asyncio.create_task(event_relay.run(engine, EVENTS_RELAY_RETRY_SECONDS)))
+    if settings.EVENTS_LOANS_SECONDS > 0:
+        from app.services.event_service import run_loan_announcer
+        jobs.append(asyncio.create_task(run_loan_announcer(AsyncSessionLocal, settings.EVENTS_LOANS_SECONDS)))
+    if settings.COPY_INVENTORY_ENABLED and settings.INVENTORY_SYNC_SECONDS > 0:
+        # flushes the books this process marked, so every process runs it
+        from app.services.inventory_service import run_availability_sync
+        jobs.append(asyncio.create_task(run_availability_sync(AsyncSessionLocal, settings.INVENTORY_SYNC_SECONDS)))
+    if settings.JOB_WORKERS > 0:
+        from app.services.job_service import job_queue
+        await job_queue.start(AsyncSessionLocal, settings.JOB_SWEEP_SECONDS)
     yield
+    if settings.JOB_WORKERS > 0:
+        # requests have drained by now; finish (or persist) their follow-up work
+        await job_queue.stop(settings.JOB_DRAIN_SECONDS)
+    for job in jobs:
+        job.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await job
     logger.info(f"Shutting down {settings.PROJECT_NAME}")
 
 app = FastAPI(
     docs_url="/docs",
     title=settings.PROJECT_NAME,
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
 )
 
 # Add Logging Middleware
 app.add_middleware(LoggingMiddleware)
 
+from app.db import session as db_session
+from app.db.replicas import ReadYourWritesMiddleware
+app.add_middleware(ReadYourWritesMiddleware, get_router=lambda: db_session.read_router)
+
 from app.core.exception_handlers import register_exception_handlers
 register_exception_handlers(app)
     
-app.include_router(v1_router.router, prefix=settings.API_STR)
\ No newline at end of file
+app.include_router(v1_router.router, prefix=settings.API_STR)
+
+from app.api import metrics
+app.include_router(metrics.router)
\ No newline at end of file
@@ -1,3 +1,10 @@
 from .book import Book
 from .member import Member
-from .borrow import BorrowTransaction
\ No newline at end of file
+from .borrow import BorrowTransaction
+from .overdue import OverdueSnapshot
+from .stats import BookStats, MemberStats
+from .recommendation import BookCooccurrence, RecommenderState
+from .analytics import CirculationDaily
+from .inventory import BookCopy
+from .jobs import PendingJob
+from .notices import LoanNotice
\ No newline at end of file
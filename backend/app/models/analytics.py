@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, Date
+from app.db.base import Base
+
+
+class CirculationDaily(Base):
+    """Circulation events per calendar day, the source of the analytics endpoint.
+
+    Active loans and overdue counts at the end of any day are running sums
+    of these columns (see ``analytics_service``), so no query over a date
+    range touches ``borrow_transactions``:
+
+    * ``borrows`` / ``returns``: loans made / returned that day;
+    * ``lapsed``: loans due that day and not returned by it (overdue from
+      the next day on);
+    * ``late_returns``: returns that day of loans past their due date.
+
+    Updated by the ``circulation.count`` job along with ``BookStats``;
+    ``rebuild`` recomputes it from history.
+    """
+    __tablename__ = "circulation_daily"
+
+    day = Column(Date, primary_key=True)
+    borrows = Column(Integer, nullable=False, default=0)
+    returns = Column(Integer, nullable=False, default=0)
+    lapsed = Column(Integer, nullable=False, default=0)
+    late_returns = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<CirculationDaily {self.day} borrows={self.borrows} returns={self.returns}>"
@@ -1,6 +1,7 @@
 from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
 from sqlalchemy.orm import relationship
 from app.db.base import Base
+from app.db.search_index import register_search_ddl
 
 class Book(Base):
     __tablename__ = "books"
@@ -17,3 +18,6 @@ class Book(Base):
 
     def __repr__(self):
         return f"<Book {self.title}>"
+
+
+register_search_ddl(Book.__table__)
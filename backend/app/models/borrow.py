@@ -1,12 +1,34 @@
 # ...existing code...
-from sqlalchemy import Column, Integer, Date, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, Date, ForeignKey, UniqueConstraint, Index, text
 from sqlalchemy.orm import relationship
 from datetime import date, timedelta
 from app.db.base import Base
 
+OPEN = text("returned_date IS NULL")
+
+
+def _open_index(name: str, *columns: str) -> Index:
+    """Partial index over open (not yet returned) borrows only."""
+    return Index(name, *columns, postgresql_where=OPEN, sqlite_where=OPEN)
+
+
 class BorrowTransaction(Base):
     __tablename__ = "borrow_transactions"
     # UniqueConstraint removed to allow multiple borrows of same book by same member
+    # Access paths (keep in sync with alembic revision c71d4b8e2a90):
+    #   open loans of a member / member+book: get_active_borrow, returns, member delete guard
+    #   open loans of a book: book delete guard, get_borrows_by_book(borrowed)
+    #   all loans of a member / book: get_borrows_by_member / get_borrows_by_book
+    #   active listing sorted by borrowed_date / due_date, and the history/all listing
+    __table_args__ = (
+        _open_index("ix_borrow_open_member_book", "member_id", "book_id", "id"),
+        _open_index("ix_borrow_open_book", "book_id", "id"),
+        _open_index("ix_borrow_open_borrowed_date", "borrowed_date", "id"),
+        _open_index("ix_borrow_open_due_date", "due_date", "id"),
+        Index("ix_borrow_member", "member_id", "id"),
+        Index("ix_borrow_book", "book_id", "id"),
+        Index("ix_borrow_borrowed_date", "borrowed_date", "id"),
+    )
 
     id = Column(Integer, primary_key=True)
 
@@ -16,6 +38,8 @@ class BorrowTransaction(Base):
     borrowed_date = Column(Date, default=date.today)
     due_date = Column(Date, nullable=False, default=lambda: date.today()+timedelta(days=7))  # default due date 1 weeks from borrowed date
     returned_date = Column(Date, nullable=True)
+    # the copy on loan, when the per-copy inventory is enabled
+    copy_id = Column(Integer, ForeignKey("book_copies.id"), nullable=True)
 
     member = relationship("Member", back_populates="borrows")
     book = relationship("Book", back_populates="borrows")
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, text
+from app.db.base import Base
+
+COPY_AVAILABLE = "available"
+COPY_ON_LOAN = "on_loan"
+COPY_RETIRED = "retired"
+
+AVAILABLE = text(f"status = '{COPY_AVAILABLE}'")
+
+
+class BookCopy(Base):
+    """One physical copy of a book (used when ``COPY_INVENTORY_ENABLED`` is on).
+
+    Checkouts claim a free copy row instead of decrementing
+    ``books.available_copies``, so concurrent checkouts of one title lock
+    different rows; ``available_copies`` becomes a cached count of the
+    available copies (see ``inventory_service``).
+    """
+    __tablename__ = "book_copies"
+    __table_args__ = (
+        Index("ix_book_copies_available", "book_id", "id", postgresql_where=AVAILABLE, sqlite_where=AVAILABLE),
+        Index("ix_book_copies_book_status", "book_id", "status"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    book_id = Column(Integer, ForeignKey("books.id"), nullable=False)
+    barcode = Column(String(40), unique=True, nullable=False)
+    status = Column(String(16), nullable=False, default=COPY_AVAILABLE)
+
+    def __repr__(self):
+        return f"<BookCopy {self.barcode} {self.status}>"
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index, text
+from app.db.base import Base
+
+JOB_PENDING = "pending"
+JOB_DEAD = "dead"
+
+PENDING = text(f"status = '{JOB_PENDING}'")
+
+
+class PendingJob(Base):
+    """Durable background job, for work that must not be lost (see ``job_service``).
+
+    Written when a durable job cannot be kept in memory: the queue is full,
+    its retries ran out, or the process is shutting down. Due rows are
+    claimed by ``run_after`` (a lease while running) and deleted once the job
+    succeeds; a job that keeps failing is left ``dead`` for inspection.
+    """
+    __tablename__ = "pending_jobs"
+    __table_args__ = (
+        Index("ix_pending_jobs_due", "run_after", "id", postgresql_where=PENDING, sqlite_where=PENDING),
+    )
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(64), nullable=False)
+    payload = Column(JSON, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    status = Column(String(16), nullable=False, default=JOB_PENDING)
+    run_after = Column(DateTime, nullable=False)
+    last_error = Column(Text, nullable=True)
+
+    def __repr__(self):
+        return f"<PendingJob {self.name} attempts={self.attempts} {self.status}>"
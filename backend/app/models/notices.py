@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from app.db.base import Base
+
+NOTICE_REMINDER = "reminder"
+NOTICE_OVERDUE = "overdue"
+
+
+class LoanNotice(Base):
+    """A due-date reminder or overdue notice sent for a loan (see ``notice_service``).
+
+    At most one row per loan and kind: the dispatcher claims a row before
+    sending, so re-runs and concurrent dispatchers skip loans already
+    notified, and deletes it again if the send fails.
+    """
+    __tablename__ = "loan_notices"
+
+    borrow_id = Column(Integer, ForeignKey("borrow_transactions.id", ondelete="CASCADE"), primary_key=True)
+    kind = Column(String(16), primary_key=True)
+    member_id = Column(Integer, nullable=False)
+    sent_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<LoanNotice {self.kind} borrow={self.borrow_id}>"
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, Index
+from app.db.base import Base
+
+class OverdueSnapshot(Base):
+    """Overdue loans as of the last background scan (see ``overdue_service``).
+
+    Denormalized copy of the member and book columns the report needs, so
+    dashboards read this table instead of joining the live borrow tables.
+    The whole table is replaced on every scan.
+    """
+    __tablename__ = "overdue_snapshot"
+    __table_args__ = (
+        Index("ix_overdue_snapshot_member", "member_id", "due_date"),
+    )
+
+    borrow_id = Column(Integer, primary_key=True)
+    member_id = Column(Integer, nullable=False)
+    member_name = Column(String(100), nullable=False)
+    member_email = Column(String(120), nullable=False)
+    book_id = Column(Integer, nullable=False)
+    book_title = Column(String(200), nullable=False)
+    borrowed_date = Column(Date)
+    due_date = Column(Date, nullable=False)
+    as_of = Column(Date, nullable=False)
+    scanned_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<OverdueSnapshot borrow={self.borrow_id} due={self.due_date}>"
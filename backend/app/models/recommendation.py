@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, Index
+from app.db.base import Base
+
+
+class BookCooccurrence(Base):
+    """Sparse item-item co-borrowing matrix: how many members borrowed both books.
+
+    Stored in both directions, so the neighbours of a book are one index
+    range scan on ``ix_cooccurrence_top``. Maintained incrementally by
+    ``recommendation_service.update_cooccurrence``.
+    """
+    __tablename__ = "book_cooccurrence"
+    __table_args__ = (
+        Index("ix_cooccurrence_top", "book_id", "members", "other_book_id"),
+    )
+
+    book_id = Column(Integer, primary_key=True)
+    other_book_id = Column(Integer, primary_key=True)
+    members = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<BookCooccurrence {self.book_id}~{self.other_book_id} members={self.members}>"
+
+
+class RecommenderState(Base):
+    """Single row: the last borrow transaction folded into ``book_cooccurrence``."""
+    __tablename__ = "recommender_state"
+
+    id = Column(Integer, primary_key=True)
+    last_borrow_id = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,57 @@
+from sqlalchemy import Column, Integer, String, Date, Index
+from app.db.base import Base
+
+
+class BookStats(Base):
+    """Lifetime circulation counters per book.
+
+    Updated by the durable ``circulation.count`` job queued with each
+    borrow/return commit (see ``borrow_service.count_circulation``), so
+    popularity lists never aggregate ``borrow_transactions``; the counters
+    trail the commits by that job's delay. ``rebuild_stats`` recomputes
+    them from history.
+    """
+    __tablename__ = "book_stats"
+    __table_args__ = (
+        Index("ix_book_stats_popularity", "borrow_count", "book_id"),
+    )
+
+    book_id = Column(Integer, primary_key=True)
+    borrow_count = Column(Integer, nullable=False, default=0)
+    return_count = Column(Integer, nullable=False, default=0)
+    last_borrowed_date = Column(Date)
+
+    def __repr__(self):
+        return f"<BookStats book={self.book_id} borrows={self.borrow_count}>"
+
+
+class MemberStats(Base):
+    """Lifetime circulation counters per member; see ``BookStats``."""
+    __tablename__ = "member_stats"
+    __table_args__ = (
+        Index("ix_member_stats_activity", "borrow_count", "member_id"),
+    )
+
+    member_id = Column(Integer, primary_key=True)
+    borrow_count = Column(Integer, nullable=False, default=0)
+    return_count = Column(Integer, nullable=False, default=0)
+    last_borrowed_date = Column(Date)
+
+    def __repr__(self):
+        return f"<MemberStats member={self.member_id} borrows={self.borrow_count}>"
+
+
+class CirculationCounted(Base):
+    """A borrow or return already added to the circulation counters.
+
+    ``circulation.count`` claims a row per transaction and kind in the same
+    commit as its counter updates, so a replayed job skips what it applied.
+    """
+    __tablename__ = "circulation_counted"
+
+    # no foreign key: a job may run after its loan was deleted with its member
+    borrow_id = Column(Integer, primary_key=True)
+    kind = Column(String(16), primary_key=True)
+
+    def __repr__(self):
+        return f"<CirculationCounted {self.kind} borrow={self.borrow_id}>"
@@ -0,0 +1,29 @@
+from datetime import date
+from enum import Enum
+from pydantic import BaseModel, Field
+
+
+class Granularity(str, Enum):
+    day = "day"
+    week = "week"
+    month = "month"
+
+
+class CirculationPoint(BaseModel):
+    period_start: date
+    period_end: date
+    borrows: int = Field(..., description="Loans made during the period")
+    returns: int = Field(..., description="Loans returned during the period")
+    active_loans: int = Field(..., description="Loans out at the end of the period")
+    overdue: int = Field(..., description="Loans past their due date and not returned at the end of the period")
+
+
+class CirculationSeries(BaseModel):
+    granularity: Granularity
+    start: date
+    end: date
+    points: list[CirculationPoint]
+
+
+class RollupRebuildResult(BaseModel):
+    days: int
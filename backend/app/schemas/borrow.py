@@ -1,9 +1,11 @@
 # ...existing code...
-from pydantic import BaseModel, Field, field_validator
+from typing import Any
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
 from app.schemas.books import BookResponse
 from datetime import date
 from app.schemas.members import MemberResponse
 from enum import Enum
+from app.core.constants import MAX_BATCH_ITEMS
 
 
 class Include(str, Enum):
@@ -12,6 +14,11 @@ class Include(str, Enum):
     all = "all"
 
 
+class ExportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
 
 class ActiveBorrowBase(BaseModel):
     id: int
@@ -20,6 +27,8 @@ class ActiveBorrowBase(BaseModel):
     borrowed_date: date
     due_date: date | None
     returned_date: date | None
+    # title/name a listing sorted on without returning the book/member
+    _sort_key: Any = PrivateAttr(default=None)
 
     class Config:
         from_attributes = True
@@ -82,3 +91,54 @@ class ReturnRequest(BaseModel):
                 "returned_date": "2026-01-15"
             }
         }
+
+
+def _check_unique(book_ids: list[int]) -> list[int]:
+    if len(set(book_ids)) != len(book_ids):
+        raise ValueError("book_ids must not contain duplicates")
+    return book_ids
+
+
+class BatchBorrowRequest(BaseModel):
+    member_id: int = Field(..., description="ID of the member borrowing the books")
+    book_ids: list[int] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS, description="IDs of the books in the cart")
+    borrowed_date: date = Field(default_factory=date.today, description="Borrowed date (YYYY-MM-DD)")
+    due_date: date = Field(..., description="Due date for return (YYYY-MM-DD)")
+
+    @field_validator("book_ids")
+    def _check_book_ids(cls, v):
+        return _check_unique(v)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "member_id": 1,
+                "book_ids": [2, 5, 9],
+                "borrowed_date": "2026-01-14",
+                "due_date": "2026-01-28"
+            }
+        }
+
+
+class BatchReturnRequest(BaseModel):
+    member_id: int = Field(..., description="ID of the member returning the books")
+    book_ids: list[int] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS, description="IDs of the books being returned")
+    returned_date: date = Field(default_factory=date.today, description="Actual return date (YYYY-MM-DD)")
+
+    @field_validator("book_ids")
+    def _check_book_ids(cls, v):
+        return _check_unique(v)
+
+
+class BatchItemResult(BaseModel):
+    book_id: int
+    success: bool
+    borrow: ActiveBorrowBase | None = None
+    error: str | None = None
+
+
+class BatchResult(BaseModel):
+    member_id: int
+    succeeded: int
+    failed: int
+    items: list[BatchItemResult]
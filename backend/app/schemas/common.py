@@ -5,7 +5,8 @@ T = TypeVar("T")
 
 class PaginatedResponse(BaseModel, Generic[T]):
     items: List[T]
-    total: int
-    page: int
+    total: int | None = None
+    page: int | None = None
     size: int
-    pages: int
+    pages: int | None = None
+    next_cursor: str | None = None
@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class EventKind(str, Enum):
+    availability = "availability"  # {book_id, available_copies}
+    borrow = "borrow"  # {id, member_id, book_id, borrowed_date, due_date}
+    returned = "return"  # {id, member_id, book_id, borrowed_date, due_date, returned_date}
+    loans = "loans"  # {active_borrows}, shortly after loans were opened or closed
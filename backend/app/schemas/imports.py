@@ -0,0 +1,20 @@
+from enum import Enum
+from typing import Any, List
+from pydantic import BaseModel, Field
+
+
+class ImportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class ImportRowError(BaseModel):
+    line: int = Field(..., description="Line of the input on which the record starts")
+    errors: List[Any] = Field(..., description="Validation or database errors for the record")
+
+
+class ImportResult(BaseModel):
+    processed: int = Field(0, description="Records read from the input")
+    imported: int = Field(0, description="Records inserted or updated")
+    failed: int = Field(0, description="Records rejected")
+    errors: List[ImportRowError] = Field(default_factory=list, description="First rejected records, capped at IMPORT_MAX_REPORTED_ERRORS")
@@ -0,0 +1,10 @@
+from datetime import date
+from pydantic import BaseModel, Field
+
+
+class NoticeRunResult(BaseModel):
+    as_of: date
+    loans: int = Field(..., description="Loans that were due a reminder or overdue notice")
+    members: int = Field(..., description="Members messaged, one message each")
+    sent: int = Field(..., description="Messages accepted by the transport")
+    failed: int = Field(..., description="Messages that failed; their loans are retried on the next run")
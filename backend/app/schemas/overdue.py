@@ -0,0 +1,33 @@
+from datetime import date, datetime
+from enum import Enum
+from pydantic import BaseModel, Field
+
+
+class OverdueSource(str, Enum):
+    live = "live"
+    snapshot = "snapshot"
+
+
+class OverdueLoan(BaseModel):
+    borrow_id: int
+    book_id: int
+    book_title: str
+    borrowed_date: date | None
+    due_date: date
+    days_overdue: int
+
+
+class OverdueMember(BaseModel):
+    member_id: int
+    member_name: str
+    member_email: str
+    loans: list[OverdueLoan]
+    max_days_overdue: int
+
+
+class OverdueReport(BaseModel):
+    source: OverdueSource
+    as_of: date | None = Field(None, description="Date overdue-ness was computed against")
+    scanned_at: datetime | None = Field(None, description="When the snapshot was taken (snapshot source only)")
+    total_loans: int
+    members: list[OverdueMember]
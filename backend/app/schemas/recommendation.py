@@ -0,0 +1,8 @@
+from pydantic import BaseModel, Field
+
+
+class Recommendation(BaseModel):
+    book_id: int
+    title: str
+    author: str
+    members: int = Field(..., description="Members who borrowed both books")
@@ -0,0 +1,28 @@
+from datetime import date
+from pydantic import BaseModel
+
+
+class CirculationCounts(BaseModel):
+    borrow_count: int
+    return_count: int
+    last_borrowed_date: date | None
+
+
+class BookStatsResponse(CirculationCounts):
+    book_id: int
+
+
+class PopularBook(BookStatsResponse):
+    title: str
+    author: str
+
+
+class ActiveMember(CirculationCounts):
+    member_id: int
+    name: str
+    email: str
+
+
+class StatsRebuildResult(BaseModel):
+    books: int
+    members: int
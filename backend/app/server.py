@@ -0,0 +1,108 @@
+"""Production server: gunicorn supervising uvicorn workers.
+
+    cd backend && python -m app.server
+    cd backend && python -m app.server --bind 0.0.0.0:9000   # extra gunicorn options
+    cd backend && python -m app.server --migrate-only
+
+Configured by ``gunicorn.conf.py`` (next to ``alembic.ini``): one worker per
+CPU by default, the app preloaded in the master so workers share its
+imports, workers recycled after ``WORKER_MAX_REQUESTS`` requests, and
+``alembic upgrade head`` run once by the master before any worker starts.
+On SIGTERM workers stop accepting connections, close event streams and let
+in-flight requests (a borrow's transaction) finish for up to
+``GRACEFUL_TIMEOUT_SECONDS`` before the lifespan shutdown runs.
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+from gunicorn.arbiter import Arbiter
+from loguru import logger
+from uvicorn.server import Server
+from uvicorn.workers import UvicornWorker
+
+from app.core.settings import settings
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+GUNICORN_CONFIG = BACKEND_DIR / "gunicorn.conf.py"
+
+
+def worker_count() -> int:
+    """``WORKERS``, or the number of CPUs this process may run on (cgroup/affinity aware)."""
+    if settings.WORKERS > 0:
+        return settings.WORKERS
+    return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+
+
+def migrate() -> None:
+    """``alembic upgrade head``; concurrent runs on Postgres serialize on an advisory lock (see alembic/env.py)."""
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(BACKEND_DIR / settings.ALEMBIC_INI_PATH))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    # keep the app's logging (see alembic/env.py)
+    config.attributes["configure_logger"] = False
+    logger.info("Running database migrations")
+    command.upgrade(config, "head")
+
+
+def reset_after_fork() -> None:
+    """Give a forked worker its own DB connections.
+
+    The preloaded engines have not connected yet, but any connection the
+    master did open must not be shared, so the pools are replaced without
+    closing the parent's connections.
+    """
+    from app.db import session
+
+    for engine in (session.engine, *session.replica_engines):
+        engine.sync_engine.dispose(close=False)
+
+
+class _Server(Server):
+    def __init__(self, config, loop: asyncio.AbstractEventLoop):
+        super().__init__(config=config)
+        # the worker's loop, captured at start: signal handlers can't look it up
+        self.loop = loop
+
+    def handle_exit(self, sig, frame) -> None:
+        # event streams never finish on their own; end them so the graceful
+        # shutdown only waits for real requests (called from a signal handler)
+        from app.core.events import event_broker
+
+        self.loop.call_soon_threadsafe(event_broker.close)
+        super().handle_exit(sig, frame)
+
+
+class Worker(UvicornWorker):
+    """Uvicorn worker that drains within gunicorn's graceful timeout."""
+
+    CONFIG_KWARGS = {
+        **UvicornWorker.CONFIG_KWARGS,
+        # cancel stragglers a little before gunicorn's SIGKILL so the lifespan shutdown still runs
+        "timeout_graceful_shutdown": max(settings.GRACEFUL_TIMEOUT_SECONDS - 5, 1),
+    }
+
+    async def _serve(self) -> None:
+        self.config.app = self.wsgi
+        server = _Server(config=self.config, loop=asyncio.get_running_loop())
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
+
+
+def main():
+    if "--migrate-only" in sys.argv[1:]:
+        migrate()
+        return
+    from gunicorn.app.wsgiapp import run
+
+    sys.argv = ["gunicorn", "--config", str(GUNICORN_CONFIG), *sys.argv[1:], "app.main:app"]
+    run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+from datetime import date, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+from loguru import logger
+
+from app.core.constants import ANALYTICS_DEFAULT_DAYS, ANALYTICS_MAX_DAYS, MSG_INVALID_RANGE
+from app.crud import analytics_crud
+from app.schemas.analytics import CirculationPoint, CirculationSeries, Granularity, RollupRebuildResult
+
+
+def _period_start(day: date, granularity: Granularity) -> date:
+    if granularity == Granularity.week:
+        return day - timedelta(days=day.weekday())
+    if granularity == Granularity.month:
+        return day.replace(day=1)
+    return day
+
+
+async def circulation(
+    db: AsyncSession,
+    start: date | None = None,
+    end: date | None = None,
+    granularity: Granularity = Granularity.day,
+) -> CirculationSeries:
+    """Borrows, returns, active loans and overdue loans per period from the daily rollups.
+
+    Reads one aggregate over the rollup rows before ``start`` (the opening
+    balances) and the rollup rows of the range itself; the first and last
+    periods are clipped to the range.
+    """
+    end = end or date.today()
+    start = start or end - timedelta(days=ANALYTICS_DEFAULT_DAYS - 1)
+    if start > end or (end - start).days >= ANALYTICS_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=MSG_INVALID_RANGE.format(days=ANALYTICS_MAX_DAYS))
+    logger.debug("Circulation series {} to {} by {}", start, end, granularity.value)
+
+    before = await analytics_crud.get_totals_before(db, start)
+    rows = {row.day: row for row in await analytics_crud.get_days(db, start, end)}
+
+    active = before["borrows"] - before["returns"]
+    # overdue at the end of a day: lapsed on an earlier day, minus late returns so far
+    lapsed_before, late_returned = before["lapsed"], before["late_returns"]
+    points: list[CirculationPoint] = []
+    day = start
+    while day <= end:
+        row = rows.get(day)
+        borrows, returns = (row.borrows, row.returns) if row else (0, 0)
+        active += borrows - returns
+        if row:
+            late_returned += row.late_returns
+        period = _period_start(day, granularity)
+        if points and points[-1].period_start == max(period, start):
+            point = points[-1]
+            point.borrows += borrows
+            point.returns += returns
+        else:
+            point = CirculationPoint(period_start=max(period, start), period_end=day, borrows=borrows, returns=returns, active_loans=0, overdue=0)
+            points.append(point)
+        point.period_end = day
+        point.active_loans = active
+        point.overdue = lapsed_before - late_returned
+        if row:
+            lapsed_before += row.lapsed
+        day += timedelta(days=1)
+    return CirculationSeries(granularity=granularity, start=start, end=end, points=points)
+
+
+async def rebuild_rollups(db: AsyncSession) -> RollupRebuildResult:
+    """Recompute the daily rollups from the full borrow history (backfill / drift repair)."""
+    try:
+        days = await analytics_crud.rebuild(db)
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+    logger.info("Rebuilt circulation rollups for {} days", days)
+    return RollupRebuildResult(days=days)
@@ -1,23 +1,39 @@
 from app.crud.books_crud import create, get_books, get_by_id, get_by_isbn, update
-from app.schemas.books import BookCreateRequest, BookUpdateRequest
+from app.schemas.books import BookCreateRequest, BookUpdateRequest, BookResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 from loguru import logger
 from app.core.constants import MSG_BOOK_NOT_FOUND, MSG_BOOK_ISBN_EXISTS, MSG_BOOK_BORROWED
+from app.core.entity_cache import entity_cache
+from app.db.replicas import cache_scope
+from app.models.book import Book
+from app.services import inventory_service
 
 
 async def create_book(db: AsyncSession, book: BookCreateRequest):
-    logger.debug(f"Creating book: {book.title}")
-    return await create(db, book=book)
+    logger.debug("Creating book: {}", book.title)
+    created = await create(db, book=book)
+    if inventory_service.enabled():
+        await inventory_service.sync_books(db, [created.id])
+        await db.refresh(created)
+    return created
 
 
-async def get_all_books(db: AsyncSession, skip: int = 0, limit: int = 10, q: str | None = None):
-    logger.debug(f"Fetching books (skip={skip}, limit={limit}, query={q})")
-    return await get_books(db, skip=skip, limit=limit, q=q)
+async def get_book(db: AsyncSession, book_id: int) -> BookResponse | None:
+    """Read-only snapshot of a book, served from the entity cache when possible."""
+    async def load():
+        book = await get_by_id(db, book_id)
+        return BookResponse.model_validate(book) if book else None
+    return await entity_cache.get_or_load("book", book_id, load, cache_scope(db))
+
+
+async def get_all_books(db: AsyncSession, skip: int = 0, limit: int = 10, q: str | None = None, cursor: str | None = None, include_total: bool = True):
+    logger.debug("Fetching books (skip={}, limit={}, query={}, cursor={})", skip, limit, q, cursor)
+    return await get_books(db, skip=skip, limit=limit, q=q, cursor=cursor, include_total=include_total)
 
 
 async def update_book(db: AsyncSession, book_id: int, book_update: BookUpdateRequest):
-    logger.debug(f"Updating book with ID: {book_id}")
+    logger.debug("Updating book with ID: {}", book_id)
     # fetch existing
     existing = await get_by_id(db, book_id)
     if not existing:
@@ -35,7 +51,12 @@ async def update_book(db: AsyncSession, book_id: int, book_update: BookUpdateReq
     for key, value in data.items():
         setattr(existing, key, value)
 
-    return await update(db, existing)
+    updated = await update(db, existing)
+    if inventory_service.enabled() and "total_copies" in data:
+        await inventory_service.sync_books(db, [book_id])
+        await db.refresh(updated)
+    entity_cache.invalidate("book", book_id)
+    return updated
 
 
 async def delete_book(db: AsyncSession, book_id: int):
@@ -44,15 +65,19 @@ async def delete_book(db: AsyncSession, book_id: int):
     from app.schemas.members import Status
     from fastapi import HTTPException
 
-    # Check if book has active borrows
-    _, total_active = await get_borrows_by_book(db, book_id, Status.borrowed, limit=1)
-    if total_active > 0:
+    # Check if book has active borrows (an exact check, never a cached count)
+    active, _ = await get_borrows_by_book(db, book_id, Status.borrowed, limit=1, include_total=False)
+    if active:
         raise HTTPException(
             status_code=400,
             detail=MSG_BOOK_BORROWED
         )
 
+    if inventory_service.enabled():
+        from app.crud.inventory_crud import delete_copies
+        await delete_copies(db, book_id)
     deleted = await delete_by_id(db, book_id)
     if not deleted:
         raise HTTPException(status_code=404, detail=MSG_BOOK_NOT_FOUND.format(id=book_id))
+    entity_cache.invalidate("book", book_id)
     return None
\ No newline at end of file
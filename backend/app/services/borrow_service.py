@@ -1,21 +1,125 @@
+import csv
+import io
+import json
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
 from loguru import logger
-from app.core.constants import MSG_BORROW_NOT_FOUND
+from app.core.constants import (
+    MSG_BORROW_NOT_FOUND,
+    MSG_NO_COPIES_AVAILABLE,
+    MSG_NO_ACTIVE_BORROW,
+    EXPORT_FETCH_SIZE,
+)
+from app.core.entity_cache import entity_cache
+from app.core.metrics import BORROWS, RETURNS
 from app.models.borrow import BorrowTransaction
-from app.schemas.borrow import ReturnRequest
+from app.schemas.borrow import ReturnRequest, ExportFormat, BatchItemResult, BatchResult
 from app.models.book import Book
-from app.crud.books_crud import get_by_id, update
-from app.crud import members_crud
+from app.crud.books_crud import take_copy, release_copy, lock_books
+from app.services.book_service import get_book
+from app.services.member_service import get_member
+from app.services import event_service, inventory_service
+from app.services.job_service import job_queue
 from app.schemas.members import Status
 
-from app.crud import borrow_crud
+from app.crud import borrow_crud, stats_crud, analytics_crud, inventory_crud, members_crud
 
 class BookNotAvailable(Exception):
     pass
 
 class MemberNotFound(Exception):
     pass
+
+
+@job_queue.register("circulation.count", durable=True)
+async def count_circulation(db: AsyncSession, borrows: list = (), returns: list = ()) -> None:
+    """Update the circulation stats and daily rollups (a durable background job).
+
+    ``borrows`` holds ``[borrow_id, member_id, book_id, borrowed_date, due_date]``
+    and ``returns`` ``[borrow_id, member_id, book_id, returned_date, due_date]``,
+    dates in ISO format. Each transaction is claimed in the
+    ``circulation_counted`` ledger in the same commit as its counts, so a
+    replayed job adds nothing twice.
+    """
+    try:
+        borrows = await _uncounted(db, "borrow", borrows)
+        returns = await _uncounted(db, "return", returns)
+        await stats_crud.record_borrows(db, [(m, b, day) for m, b, day, _ in borrows])
+        await analytics_crud.record_borrows(db, [(day, due) for _, _, day, due in borrows])
+        await stats_crud.record_returns(db, [(m, b) for m, b, _, _ in returns])
+        await analytics_crud.record_returns(db, [(day, due) for _, _, day, due in returns])
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+
+
+async def _uncounted(db: AsyncSession, kind: str, entries: list) -> list[tuple[int, int, date, date]]:
+    """Claim ``entries`` of ``kind``; return ``(member_id, book_id, date, due_date)`` of those not counted yet."""
+    # jobs queued before the ledger existed carry no borrow id and are counted as they are
+    legacy = [entry for entry in entries if len(entry) == 4]
+    tracked = [entry for entry in entries if len(entry) == 5]
+    claimed = await stats_crud.claim_counted(db, [(borrow_id, kind) for borrow_id, *_ in tracked])
+    fresh = legacy + [rest for borrow_id, *rest in tracked if (borrow_id, kind) in claimed]
+    return [(m, b, date.fromisoformat(day), date.fromisoformat(due)) for m, b, day, due in fresh]
+
+
+async def _count_borrows(db: AsyncSession, borrows) -> None:
+    """Queue the stats and rollup updates for committed loans, off the request path."""
+    if borrows:
+        await job_queue.enqueue(db, "circulation.count", borrows=[
+            [b.id, b.member_id, b.book_id, b.borrowed_date.isoformat(), b.due_date.isoformat()] for b in borrows
+        ])
+
+
+async def _count_returns(db: AsyncSession, borrows) -> None:
+    """Queue the stats and rollup updates for committed returns, off the request path."""
+    if borrows:
+        await job_queue.enqueue(db, "circulation.count", returns=[
+            [b.id, b.member_id, b.book_id, b.returned_date.isoformat(), b.due_date.isoformat()] for b in borrows
+        ])
+
+
+async def _copies_changed(db: AsyncSession, available: dict[int, int | None]) -> None:
+    """Refresh cached availability after copies were claimed or released, once committed.
+
+    ``available`` maps each book id to its new ``available_copies``, which
+    is announced to event subscribers.
+    """
+    if inventory_service.enabled():
+        # the counts are unknown until the next flush, which invalidates and announces them
+        await inventory_service.copies_changed(db, *available)
+    else:
+        entity_cache.invalidate("book", *available)
+        event_service.publish_availability(available)
+
+
+async def _member_deleted(db: AsyncSession, member_id: int) -> bool:
+    """After a borrow insert broke a foreign key: whether the member is gone.
+
+    The member check reads the per-process cache, which can still hold a
+    member another process deleted moments ago; the stale entry is dropped.
+    """
+    if await members_crud.get_by_id(db, member_id):
+        return False
+    entity_cache.invalidate("member", member_id)
+    return True
+
+
+async def _claim(db: AsyncSession, book_id: int) -> tuple[bool, int | None, int | None]:
+    """Reserve a copy of ``book_id``: ``(claimed, copy_id, copies_left)``.
+
+    With the per-copy inventory the claimed copy's id is known and the
+    count is not; without it, the other way round.
+    """
+    if inventory_service.enabled():
+        copy_id = await inventory_crud.claim_copy(db, book_id)
+        return copy_id is not None, copy_id, None
+    copies_left = await take_copy(db, book_id)
+    return copies_left is not None, None, copies_left
+
+
 async def borrow_book(
     db: AsyncSession,
     member_id: int,
@@ -23,68 +127,192 @@ async def borrow_book(
     borrowed_date: date,
     due_date: date
 ):
-    logger.debug(f"Process borrow request: member={member_id}, book={book_id}")
-    book = await get_by_id(db, book_id)
-    member = await members_crud.get_by_id(db, member_id)
-    if not member:
+    """Check out one copy of ``book_id`` to ``member_id`` in a single transaction.
+
+    The copy is claimed with a conditional UPDATE (see ``books_crud.take_copy``,
+    or ``inventory_crud.claim_copy`` with the per-copy inventory), and the
+    transaction row is written in the same transaction, with one commit.
+    Circulation stats and daily rollups follow as a background job.
+    """
+    logger.debug("Process borrow request: member={}, book={}", member_id, book_id)
+    if not await get_member(db, member_id):
+        BORROWS.labels("rejected").inc()
         raise MemberNotFound("Member does not exist")
-    if not book:
-        raise BookNotAvailable("Book does not exist")
 
-    if book.available_copies <= 0:
-        raise BookNotAvailable("No copies available")
+    claimed, copy_id, copies_left = await _claim(db, book_id)
+    if not claimed:
+        BORROWS.labels("rejected").inc()
+        # cold path: work out why the conditional update matched nothing
+        reason = MSG_NO_COPIES_AVAILABLE if await get_book(db, book_id) else "Book does not exist"
+        raise BookNotAvailable(reason)
+    try:
+        borrow = await borrow_crud.insert_borrow(db, member_id, book_id, borrowed_date, due_date, copy_id)
+        await db.commit()
+    except IntegrityError:
+        # give the claimed copy back
+        await db.rollback()
+        if await _member_deleted(db, member_id):
+            BORROWS.labels("rejected").inc()
+            raise MemberNotFound("Member does not exist")
+        raise
+    except BaseException:
+        # give the claimed copy back
+        await db.rollback()
+        raise
+    await _copies_changed(db, {book_id: copies_left})
+    event_service.publish_borrows([borrow])
+    await _count_borrows(db, [borrow])
+    BORROWS.labels("success").inc()
 
-    # Business rule
-    book.available_copies -= 1
+    return borrow
 
-    borrow = BorrowTransaction(
-        member_id=member_id,
-        book_id=book_id,
-        borrowed_date=borrowed_date,
-        due_date=due_date
-    )
+async def return_book(db: AsyncSession, return_request: ReturnRequest):
+    """Close the member's open borrow of the book and release the copy, with one commit."""
+    logger.debug("Process return request: member={}, book={}", return_request.member_id, return_request.book_id)
+    returned_date = return_request.returned_date or date.today()
 
-    await borrow_crud.create(db, borrow)
-    await update(db, book)
+    updated = await borrow_crud.mark_returned(db, return_request.member_id, return_request.book_id, returned_date)
+    if not updated:
+        RETURNS.labels("rejected").inc()
+        if not await get_book(db, return_request.book_id):
+            raise BookNotAvailable("Book does not exist")
+        raise ValueError(MSG_NO_ACTIVE_BORROW)
+    try:
+        copies_left = None
+        if inventory_service.enabled():
+            await inventory_crud.release_copy(db, return_request.book_id, updated.copy_id)
+        else:
+            copies_left = await release_copy(db, return_request.book_id)
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+    await _copies_changed(db, {return_request.book_id: copies_left})
+    event_service.publish_returns([updated])
+    await _count_returns(db, [updated])
+    RETURNS.labels("success").inc()
 
-    return borrow
+    return updated
 
-async def return_book(db: AsyncSession, return_request: ReturnRequest):
-    logger.debug(f"Process return request: member={return_request.member_id}, book={return_request.book_id}")
-    book = await get_by_id(db, return_request.book_id)
-    if not book:
-        raise BookNotAvailable("Book does not exist")
 
-    # find the active borrow (not yet returned)
-    active = await borrow_crud.get_active_borrow(db, return_request.member_id, return_request.book_id)
-    if not active:
-        raise ValueError("No active borrow record found for this member and book")
+def _batch_result(member_id: int, items: list[BatchItemResult], counter) -> BatchResult:
+    succeeded = sum(1 for item in items if item.success)
+    counter.labels("success").inc(succeeded)
+    counter.labels("rejected").inc(len(items) - succeeded)
+    return BatchResult(member_id=member_id, succeeded=succeeded, failed=len(items) - succeeded, items=items)
 
-    if active.returned_date is not None:
-        # already returned
-        return active
 
-    active.returned_date = return_request.returned_date or date.today()
+async def borrow_books(db: AsyncSession, member_id: int, book_ids: list[int], borrowed_date: date, due_date: date) -> BatchResult:
+    """Check out a cart of books to one member in a single transaction.
 
-    # update book counts and persist
-    book.available_copies += 1
-    await update(db, book)
-    updated = await borrow_crud.update(db, active)
+    The member is validated once. The requested book rows are locked in id
+    order, every book with a copy left is decremented and all transaction
+    rows are inserted with one multi-row INSERT; books that are missing or
+    out of stock are reported per item without failing the rest of the cart.
+    With the per-copy inventory the books are only read and a copy of each is
+    claimed instead, so carts sharing titles don't queue on the book rows.
+    """
+    logger.debug("Process batch borrow request: member={}, books={}", member_id, book_ids)
+    if not await get_member(db, member_id):
+        raise MemberNotFound("Member does not exist")
+
+    inventory = inventory_service.enabled()
+    try:
+        books = await lock_books(db, book_ids, for_update=not inventory)
+        results, taken, copies = {}, [], {}
+        for book_id in book_ids:
+            book = books.get(book_id)
+            if book is None:
+                results[book_id] = BatchItemResult(book_id=book_id, success=False, error="Book does not exist")
+            elif inventory:
+                copies[book_id] = await inventory_crud.claim_copy(db, book_id)
+                if copies[book_id] is None:
+                    results[book_id] = BatchItemResult(book_id=book_id, success=False, error=MSG_NO_COPIES_AVAILABLE)
+                else:
+                    taken.append(book_id)
+            elif book.available_copies <= 0:
+                results[book_id] = BatchItemResult(book_id=book_id, success=False, error=MSG_NO_COPIES_AVAILABLE)
+            else:
+                book.available_copies -= 1
+                taken.append(book_id)
+        borrows = await borrow_crud.insert_borrows(db, [
+            {"member_id": member_id, "book_id": book_id, "borrowed_date": borrowed_date, "due_date": due_date, "copy_id": copies.get(book_id)}
+            for book_id in taken
+        ])
+        for borrow in borrows:
+            results[borrow.book_id] = BatchItemResult(book_id=borrow.book_id, success=True, borrow=borrow)
+        available = {book_id: books[book_id].available_copies for book_id in taken}
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        if await _member_deleted(db, member_id):
+            raise MemberNotFound("Member does not exist")
+        raise
+    except BaseException:
+        await db.rollback()
+        raise
+    if borrows:
+        await _copies_changed(db, available)
+        event_service.publish_borrows(borrows)
+        await _count_borrows(db, borrows)
+
+    return _batch_result(member_id, [results[book_id] for book_id in book_ids], BORROWS)
 
-    return updated
 
+async def return_books(db: AsyncSession, member_id: int, book_ids: list[int], returned_date: date) -> BatchResult:
+    """Return a cart of books for one member in a single transaction.
+
+    The member's open borrows of the books are locked first, then the books
+    themselves (both in id order); each book without an open borrow is
+    reported per item.
+    """
+    logger.debug("Process batch return request: member={}, books={}", member_id, book_ids)
+    if not await get_member(db, member_id):
+        raise MemberNotFound("Member does not exist")
 
-async def list_active_borrows(db: AsyncSession, include: str = "all", skip: int = 0, limit: int = 10, sort_by: str = "borrowed_date", order: str = "desc"):
+    inventory = inventory_service.enabled()
+    try:
+        open_borrows = await borrow_crud.lock_open_borrows(db, member_id, book_ids)
+        books = await lock_books(db, book_ids, for_update=not inventory)
+        results = {}
+        for book_id in book_ids:
+            borrow = open_borrows.get(book_id)
+            if book_id not in books:
+                results[book_id] = BatchItemResult(book_id=book_id, success=False, error="Book does not exist")
+            elif borrow is None:
+                results[book_id] = BatchItemResult(book_id=book_id, success=False, error=MSG_NO_ACTIVE_BORROW)
+            else:
+                borrow.returned_date = returned_date
+                if inventory:
+                    await inventory_crud.release_copy(db, book_id, borrow.copy_id)
+                else:
+                    books[book_id].available_copies += 1
+                results[book_id] = BatchItemResult(book_id=book_id, success=True, borrow=borrow)
+        returned = [open_borrows[book_id] for book_id in book_ids if results[book_id].success]
+        available = {borrow.book_id: books[borrow.book_id].available_copies for borrow in returned}
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+    if returned:
+        await _copies_changed(db, available)
+        event_service.publish_returns(returned)
+        await _count_returns(db, returned)
+
+    return _batch_result(member_id, [results[book_id] for book_id in book_ids], RETURNS)
+
+
+async def list_active_borrows(db: AsyncSession, include: str = "all", skip: int = 0, limit: int = 10, sort_by: str = "borrowed_date", order: str = "desc", cursor: str | None = None, include_total: bool = True):
     """Return all active (not returned) borrow transactions.
 
     include: 'book' | 'member' | 'all' to control which relationships are loaded.
     """
-    return await borrow_crud.get_active_borrows(db, include=include, skip=skip, limit=limit, sort_by=sort_by, order=order)
+    return await borrow_crud.get_active_borrows(db, include=include, skip=skip, limit=limit, sort_by=sort_by, order=order, cursor=cursor, include_total=include_total)
 
 
-async def list_borrows(db: AsyncSession, status: Status, include: str = "all", skip: int = 0, limit: int = 10, sort_by: str = "borrowed_date", order: str = "desc"):
+async def list_borrows(db: AsyncSession, status: Status, include: str = "all", skip: int = 0, limit: int = 10, sort_by: str = "borrowed_date", order: str = "desc", cursor: str | None = None, include_total: bool = True):
     """Generic list for borrows."""
-    return await borrow_crud.get_all_borrows(db, status=status, include=include, skip=skip, limit=limit, sort_by=sort_by, order=order)
+    return await borrow_crud.get_all_borrows(db, status=status, include=include, skip=skip, limit=limit, sort_by=sort_by, order=order, cursor=cursor, include_total=include_total)
 
 
 async def delete_borrow(db: AsyncSession, borrow_id: int):
@@ -92,4 +320,44 @@ async def delete_borrow(db: AsyncSession, borrow_id: int):
     from fastapi import HTTPException
     if not deleted:
         raise HTTPException(status_code=404, detail=MSG_BORROW_NOT_FOUND.format(id=borrow_id))
-    return None
\ No newline at end of file
+    return None
+
+
+EXPORT_COLUMNS = [
+    "id", "member_id", "member_name", "member_email",
+    "book_id", "book_title", "book_author", "book_isbn",
+    "borrowed_date", "due_date", "returned_date",
+]
+
+
+async def export_borrows(
+    db: AsyncSession,
+    fmt: ExportFormat,
+    status: Status = Status.all,
+    borrowed_from: date | None = None,
+    borrowed_to: date | None = None,
+):
+    """Encode the borrow history as CSV or NDJSON, yielding one chunk per fetch."""
+    logger.debug("Exporting borrows as {} (status={}, from={}, to={})", fmt.value, status.value, borrowed_from, borrowed_to)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == ExportFormat.csv:
+        writer.writerow(EXPORT_COLUMNS)
+
+    pending = 0
+    async for row in borrow_crud.stream_borrow_history(db, status, borrowed_from, borrowed_to):
+        if fmt == ExportFormat.csv:
+            writer.writerow(["" if row[c] is None else row[c] for c in EXPORT_COLUMNS])
+        else:
+            buffer.write(json.dumps({c: row[c] for c in EXPORT_COLUMNS}, default=str))
+            buffer.write("\n")
+        pending += 1
+        if pending >= EXPORT_FETCH_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
@@ -0,0 +1,80 @@
+import asyncio
+from typing import AsyncIterator
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.events import TooManySubscribers, event_broker
+from app.crud import borrow_crud
+from app.schemas.events import EventKind
+
+# whether loans were opened or closed in this process since the last loans event
+_loans_changed = False
+
+
+def _loan(borrow) -> dict:
+    return {
+        "id": borrow.id,
+        "member_id": borrow.member_id,
+        "book_id": borrow.book_id,
+        "borrowed_date": borrow.borrowed_date,
+        "due_date": borrow.due_date,
+    }
+
+
+def publish_borrows(borrows) -> None:
+    """Announce committed loans. Called after the commit, never inside the transaction."""
+    global _loans_changed
+    for borrow in borrows:
+        event_broker.publish(EventKind.borrow.value, _loan(borrow))
+        _loans_changed = True
+
+
+def publish_returns(borrows) -> None:
+    """Announce committed returns."""
+    global _loans_changed
+    for borrow in borrows:
+        event_broker.publish(EventKind.returned.value, {**_loan(borrow), "returned_date": borrow.returned_date})
+        _loans_changed = True
+
+
+def publish_availability(available: dict[int, int]) -> None:
+    """Announce the new ``available_copies`` of each book in ``available``."""
+    for book_id, copies in sorted(available.items()):
+        event_broker.publish(EventKind.availability.value, {"book_id": book_id, "available_copies": copies})
+
+
+async def announce_loans(db: AsyncSession) -> int:
+    """Publish the number of open loans as a ``loans`` event, so dashboards need not re-fetch it."""
+    active = await borrow_crud.count_open(db)
+    event_broker.publish(EventKind.loans.value, {"active_borrows": active})
+    return active
+
+
+async def run_loan_announcer(session_factory: async_sessionmaker, interval: float):
+    """Announce the open-loan count every ``interval`` seconds while loans change, until cancelled.
+
+    Bursts of borrows and returns cost one count per interval and process,
+    however many clients listen (started from the app lifespan).
+    """
+    global _loans_changed
+    while True:
+        if _loans_changed:
+            _loans_changed = False
+            try:
+                async with session_factory() as session:
+                    await announce_loans(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # keep the loop alive; the next tick retries
+                _loans_changed = True
+                logger.exception("Announcing the loan count failed")
+        await asyncio.sleep(interval)
+
+
+def open_stream(book_ids: list[int] | None, kinds: list[EventKind] | None, last_event_id: str | None) -> AsyncIterator[bytes]:
+    """SSE frames of the events matching the filters; raises ``TooManySubscribers`` when this process is full."""
+    if event_broker.full:
+        raise TooManySubscribers()
+    return event_broker.stream(book_ids, [kind.value for kind in kinds or ()], last_event_id)
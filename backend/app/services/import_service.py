@@ -0,0 +1,190 @@
+import csv
+import json
+from typing import AsyncIterator, Awaitable, Callable
+
+from loguru import logger
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.constants import IMPORT_BATCH_SIZE, IMPORT_MAX_REPORTED_ERRORS
+from app.core.entity_cache import entity_cache
+from app.crud import books_crud, members_crud
+from app.models.book import Book
+from app.models.member import Member
+from app.schemas.books import BookCreateRequest
+from app.schemas.imports import ImportFormat, ImportResult, ImportRowError
+from app.schemas.members import MemberCreate
+from app.services import inventory_service
+
+Upsert = Callable[[AsyncSession, list[dict]], Awaitable[None]]
+
+
+def format_from_content_type(content_type: str | None) -> ImportFormat:
+    if content_type and content_type.split(";")[0].strip().lower() in ("text/csv", "application/csv"):
+        return ImportFormat.csv
+    return ImportFormat.ndjson
+
+
+async def _records(chunks: AsyncIterator[bytes], fmt: ImportFormat) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    """Yield ``(line, record, parse_error)`` from a byte stream without buffering it.
+
+    CSV input needs a header row. A CSV record may span lines inside a quoted
+    field; it ends on the first line that leaves the quotes balanced.
+    """
+    header = None
+    pending, start_line, line_no = "", 0, 0
+    buffer = b""
+
+    async def lines():
+        nonlocal buffer
+        async for chunk in chunks:
+            buffer += chunk
+            *complete, buffer = buffer.split(b"\n")
+            for raw in complete:
+                yield raw
+        if buffer:
+            yield buffer
+
+    async for raw in lines():
+        line_no += 1
+        text = raw.decode("utf-8-sig" if line_no == 1 else "utf-8", errors="replace").rstrip("\r")
+        if fmt == ImportFormat.ndjson:
+            if not text.strip():
+                continue
+            try:
+                record = json.loads(text)
+            except json.JSONDecodeError as exc:
+                yield line_no, None, f"Invalid JSON: {exc.msg}"
+                continue
+            if not isinstance(record, dict):
+                yield line_no, None, "Expected a JSON object"
+                continue
+            yield line_no, record, None
+            continue
+
+        if not pending:
+            start_line = line_no
+        pending = f"{pending}\n{text}" if pending else text
+        if pending.count('"') % 2:
+            continue
+        record_text, pending = pending, ""
+        if not record_text.strip():
+            continue
+        values = next(csv.reader([record_text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield start_line, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        # empty cells mean "not given" so schema defaults apply
+        yield start_line, {k: v for k, v in zip(header, values) if v != ""}, None
+
+    if pending:
+        yield start_line, None, "Unterminated quoted field"
+
+
+async def _write_batch(db: AsyncSession, upsert: Upsert, batch: list[tuple[int, dict, int]], result: ImportResult):
+    """Upsert ``batch`` in one statement; on failure retry row by row to isolate bad rows.
+
+    Each entry is ``(line, row, superseded)``: the records ``row`` replaced
+    within the batch share its outcome.
+    """
+    try:
+        async with db.begin_nested():
+            await upsert(db, [row for _, row, _ in batch])
+        result.imported += sum(1 + superseded for _, _, superseded in batch)
+    except SQLAlchemyError:
+        for line, row, superseded in batch:
+            try:
+                async with db.begin_nested():
+                    await upsert(db, [row])
+                result.imported += 1 + superseded
+            except SQLAlchemyError as exc:
+                _reject(result, line, [str(getattr(exc, "orig", None) or exc).splitlines()[0]], 1 + superseded)
+    await db.commit()
+
+
+def _reject(result: ImportResult, line: int, errors: list, records: int = 1):
+    result.failed += records
+    if len(result.errors) < IMPORT_MAX_REPORTED_ERRORS:
+        result.errors.append(ImportRowError(line=line, errors=errors))
+
+
+async def import_rows(
+    db: AsyncSession,
+    chunks: AsyncIterator[bytes],
+    fmt: ImportFormat,
+    schema: type[BaseModel],
+    key: str,
+    upsert: Upsert,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    after_batch: Callable[[AsyncSession], Awaitable[None]] | None = None,
+) -> ImportResult:
+    """Stream records from ``chunks`` into the database in validated batches.
+
+    Each record is validated against ``schema``; invalid ones are reported
+    and skipped without affecting the rest of the batch. Valid records are
+    upserted ``batch_size`` at a time, keyed on ``key`` (a later record with
+    the same key in one batch wins, and the records it replaced are counted
+    as imported or failed with it). Each batch is committed on its own,
+    then handed to ``after_batch`` if given.
+    """
+    result = ImportResult()
+    batch: dict[str, tuple[int, dict, int]] = {}
+
+    async for line, record, parse_error in _records(chunks, fmt):
+        result.processed += 1
+        if parse_error:
+            _reject(result, line, [parse_error])
+            continue
+        try:
+            row = schema.model_validate(record).model_dump()
+        except ValidationError as exc:
+            _reject(result, line, exc.errors(include_url=False, include_context=False, include_input=False))
+            continue
+        previous = batch.get(row[key])
+        batch[row[key]] = (line, row, previous[2] + 1 if previous else 0)
+        if len(batch) >= batch_size:
+            await _write_batch(db, upsert, list(batch.values()), result)
+            batch.clear()
+            if after_batch:
+                await after_batch(db)
+
+    if batch:
+        await _write_batch(db, upsert, list(batch.values()), result)
+        if after_batch:
+            await after_batch(db)
+    logger.info(
+        "Imported {}/{} {} records ({} failed)", result.imported, result.processed, schema.__name__, result.failed
+    )
+    return result
+
+
+async def import_books(db: AsyncSession, chunks: AsyncIterator[bytes], fmt: ImportFormat, batch_size: int = IMPORT_BATCH_SIZE) -> ImportResult:
+    isbns = []
+
+    async def upsert(db: AsyncSession, rows: list[dict]) -> None:
+        await books_crud.upsert_many(db, rows)
+        isbns.extend(row["isbn"] for row in rows)
+
+    async def stock(db: AsyncSession) -> None:
+        # stock the copies of the batch just committed
+        book_ids = await books_crud.get_ids_by_isbn(db, isbns)
+        isbns.clear()
+        await inventory_service.sync_books(db, book_ids)
+
+    if inventory_service.enabled():
+        result = await import_rows(db, chunks, fmt, BookCreateRequest, "isbn", upsert, batch_size, stock)
+    else:
+        result = await import_rows(db, chunks, fmt, BookCreateRequest, "isbn", books_crud.upsert_many, batch_size)
+    # upserts may have changed any existing book
+    entity_cache.clear()
+    return result
+
+
+async def import_members(db: AsyncSession, chunks: AsyncIterator[bytes], fmt: ImportFormat, batch_size: int = IMPORT_BATCH_SIZE) -> ImportResult:
+    result = await import_rows(db, chunks, fmt, MemberCreate, "email", members_crud.upsert_many, batch_size)
+    entity_cache.clear()
+    return result
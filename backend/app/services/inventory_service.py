@@ -0,0 +1,105 @@
+import asyncio
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.constants import INVENTORY_SYNC_CHUNK
+from app.core.entity_cache import entity_cache
+from app.core.settings import settings
+from app.crud import inventory_crud
+from app.services import event_service
+
+# books whose copies changed since the last flush, in this process. Lost if
+# the process dies before flushing: those books keep a stale available_copies
+# until their copies change again or `python -m app.cli.sync_copies` runs.
+_pending: set[int] = set()
+
+
+def enabled() -> bool:
+    return settings.COPY_INVENTORY_ENABLED
+
+
+def mark_changed(*book_ids: int) -> None:
+    """Note that copies of ``book_ids`` were claimed or released; ``flush_availability`` catches up."""
+    _pending.update(book_ids)
+
+
+async def copies_changed(db: AsyncSession, *book_ids: int) -> None:
+    """Mark ``book_ids`` changed, flushing at once when no background flush runs.
+
+    Called after the checkout or return committed, so a failed flush is
+    logged rather than raised; the books stay marked for the next one.
+    """
+    mark_changed(*book_ids)
+    if settings.INVENTORY_SYNC_SECONDS > 0:
+        return
+    try:
+        await flush_availability(db)
+    except Exception:
+        logger.exception("Availability flush failed")
+
+
+async def flush_availability(db: AsyncSession) -> int:
+    """Refresh ``available_copies`` of every book marked since the last flush, with one UPDATE.
+
+    With the per-copy inventory on, checkouts never write the ``books`` row,
+    so ``available_copies`` (what ``BookResponse`` shows) trails the copies
+    table by at most one flush interval (``INVENTORY_SYNC_SECONDS``; with 0
+    each checkout flushes itself). Returns the number of books refreshed.
+    """
+    book_ids = sorted(_pending)
+    if not book_ids:
+        return 0
+    _pending.difference_update(book_ids)
+    try:
+        available = await inventory_crud.refresh_available(db, book_ids)
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        # retried on the next flush
+        _pending.update(book_ids)
+        raise
+    entity_cache.invalidate("book", *book_ids)
+    event_service.publish_availability(available)
+    return len(book_ids)
+
+
+async def sync_books(db: AsyncSession, book_ids) -> None:
+    """Create, relink or retire copies of ``book_ids`` after their stock changed, and commit."""
+    try:
+        available = await inventory_crud.sync_copies(db, book_ids)
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+    entity_cache.invalidate("book", *book_ids)
+    event_service.publish_availability(available)
+
+
+async def sync_all(db: AsyncSession, chunk: int = INVENTORY_SYNC_CHUNK) -> int:
+    """Reconcile the copies of every book, one committed chunk at a time; returns the books seen."""
+    seen, after = 0, 0
+    while book_ids := await inventory_crud.get_book_ids(db, after, chunk):
+        await sync_books(db, book_ids)
+        seen += len(book_ids)
+        after = book_ids[-1]
+    return seen
+
+
+async def run_availability_sync(session_factory: async_sessionmaker, interval: float):
+    """Flush availability every ``interval`` seconds until cancelled (started from the app lifespan)."""
+    while True:
+        try:
+            async with session_factory() as session:
+                await flush_availability(session)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # keep the loop alive; the next tick retries
+            logger.exception("Availability flush failed")
+        try:
+            await asyncio.sleep(interval)
+        except asyncio.CancelledError:
+            # shutting down: don't leave the marked books stale
+            async with session_factory() as session:
+                await flush_availability(session)
+            raise
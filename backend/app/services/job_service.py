@@ -0,0 +1,260 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.constants import JOB_RETRY_MAX_SECONDS
+from app.core.metrics import JOB_DURATION, JOB_QUEUE_DEPTH, JOBS
+from app.core.settings import settings
+from app.crud import jobs_crud
+
+Handler = Callable[..., Awaitable[None]]
+
+
+@dataclass
+class Job:
+    name: str
+    payload: dict
+    durable: bool
+    attempts: int = 0
+    # pending_jobs row this job was claimed from, if any
+    row_id: int | None = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class JobQueue:
+    """In-process queue running follow-up work off the request path.
+
+    Handlers are registered by name with ``register`` and called as
+    ``handler(db, **payload)`` on a fresh session; they commit their own
+    work. ``enqueue`` never waits for the job: it goes into a bounded
+    in-memory queue served by ``JOB_WORKERS`` tasks, and failures are
+    retried with exponential backoff. Durable jobs (those registered with
+    ``durable=True``) are written to ``pending_jobs`` instead whenever they
+    would otherwise be lost: the queue is full, retries ran out, or the
+    process is stopping; a sweeper runs due rows from that table. Other
+    jobs are dropped when the queue is full, which the metrics count.
+    Delivery is at least once: a job may run again if its process dies
+    between the handler's commit and the row's deletion. Jobs only held in
+    memory (queued, or waiting for a retry) are lost if the process dies;
+    a clean ``stop`` persists the durable ones.
+
+    When the queue is not running (``JOB_WORKERS=0``, scripts, tests) jobs
+    run inline on the caller's session.
+    """
+
+    def __init__(self, maxsize: int, workers: int, max_attempts: int, dead_after_attempts: int, retry_base_seconds: float):
+        self.maxsize = maxsize
+        self.workers = workers
+        # retries in memory, then (durable jobs) from the table until dead_after_attempts
+        self.max_attempts = max_attempts
+        self.dead_after_attempts = dead_after_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.handlers: dict[str, tuple[Handler, bool]] = {}
+        self._queue: asyncio.Queue[Job] | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._retries: dict[asyncio.TimerHandle, Job] = {}
+        # retries that came due while stopping; stop() persists them
+        self._stranded: list[Job] = []
+        self._session_factory: async_sessionmaker | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._queue is not None
+
+    def register(self, name: str, durable: bool = False):
+        """Decorator registering ``handler(db, **payload)`` as job ``name``; ``payload`` must be JSON."""
+        def decorator(handler: Handler) -> Handler:
+            self.handlers[name] = (handler, durable)
+            return handler
+        return decorator
+
+    async def enqueue(self, db: AsyncSession, name: str, **payload) -> None:
+        """Schedule job ``name``; call it after the caller's transaction has committed.
+
+        ``db`` is the caller's session: it runs the job when the queue is not
+        running, and persists a durable job when the queue is full.
+        """
+        handler, durable = self.handlers[name]
+        if not self.running:
+            try:
+                await handler(db, **payload)
+            except Exception:
+                # the caller's own work is committed already; don't fail it over follow-up work
+                JOBS.labels(name, "failed").inc()
+                logger.exception("Inline job {} failed", name)
+            return
+        job = Job(name, payload, durable)
+        if not self._offer(job):
+            try:
+                await self._persist(db, [job], "queue full")
+            except Exception:
+                # as inline: the caller's own work is committed already
+                JOBS.labels(name, "failed").inc()
+                logger.exception("Could not persist job {}", name)
+
+    def _offer(self, job: Job) -> bool:
+        """Queue ``job`` without waiting; False if a durable job must be persisted instead."""
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            if job.durable:
+                JOBS.labels(job.name, "persisted").inc()
+                return False
+            JOBS.labels(job.name, "dropped").inc()
+            logger.warning("Job queue full, dropped {}", job.name)
+            return True
+        JOB_QUEUE_DEPTH.inc()
+        return True
+
+    async def _persist(self, db: AsyncSession, jobs: list[Job], reason: str, delay: float = 0) -> None:
+        run_after = datetime.now() + timedelta(seconds=delay)
+        new = [
+            {"name": job.name, "payload": job.payload, "attempts": job.attempts, "run_after": run_after, "last_error": reason}
+            for job in jobs if job.row_id is None
+        ]
+        try:
+            await jobs_crud.add_jobs(db, new)
+            for job in jobs:
+                if job.row_id is not None:
+                    # claimed from the table: release its lease
+                    await jobs_crud.reschedule(db, job.row_id, job.attempts, run_after, reason, dead=False)
+            await db.commit()
+        except BaseException:
+            await db.rollback()
+            raise
+
+    async def start(self, session_factory: async_sessionmaker, sweep_seconds: float) -> None:
+        self._session_factory = session_factory
+        self._queue = asyncio.Queue(self.maxsize)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        if sweep_seconds > 0:
+            self._tasks.append(asyncio.create_task(self._sweep(sweep_seconds)))
+        logger.info("Job queue started with {} workers", self.workers)
+
+    async def stop(self, timeout: float) -> None:
+        """Let queued jobs finish for up to ``timeout`` seconds, then persist the durable ones left."""
+        queue, self._queue = self._queue, None
+        if queue is None:
+            return
+        try:
+            await asyncio.wait_for(queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Job queue drain timed out with {} jobs left", queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        left = [*self._stranded, *self._retries.values()]
+        self._stranded = []
+        for handle in self._retries:
+            handle.cancel()
+        self._retries.clear()
+        while not queue.empty():
+            left.append(queue.get_nowait())
+        JOB_QUEUE_DEPTH.set(0)
+        durable = [job for job in left if job.durable]
+        if durable:
+            async with self._session_factory() as session:
+                await self._persist(session, durable, "shutdown")
+        if len(durable) < len(left):
+            logger.warning("Discarded {} queued jobs at shutdown", len(left) - len(durable))
+
+    async def _work(self) -> None:
+        queue = self._queue
+        while True:
+            job = await queue.get()
+            JOB_QUEUE_DEPTH.dec()
+            try:
+                await self._run(job)
+            finally:
+                queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        handler, _ = self.handlers[job.name]
+        job.attempts += 1
+        start = time.perf_counter()
+        try:
+            async with self._session_factory() as session:
+                await handler(session, **job.payload)
+                if job.row_id is not None:
+                    await jobs_crud.complete(session, job.row_id)
+                    await session.commit()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            JOB_DURATION.labels(job.name).observe(time.perf_counter() - start)
+            await self._failed(job, exc)
+            return
+        JOB_DURATION.labels(job.name).observe(time.perf_counter() - start)
+        JOBS.labels(job.name, "done").inc()
+
+    async def _failed(self, job: Job, exc: Exception) -> None:
+        error = f"{type(exc).__name__}: {exc}"
+        delay = min(self.retry_base_seconds * 2 ** (job.attempts - 1), JOB_RETRY_MAX_SECONDS)
+        if job.attempts < self.max_attempts and job.row_id is None:
+            JOBS.labels(job.name, "retried").inc()
+            logger.warning("Job {} failed (attempt {}), retrying in {:.1f}s: {}", job.name, job.attempts, delay, error)
+            handle = asyncio.get_running_loop().call_later(delay, self._retry, job)
+            self._retries[handle] = job
+            return
+        if not job.durable:
+            JOBS.labels(job.name, "failed").inc()
+            logger.opt(exception=exc).error("Job {} failed after {} attempts", job.name, job.attempts)
+            return
+        dead = job.attempts >= self.dead_after_attempts
+        JOBS.labels(job.name, "dead" if dead else "persisted").inc()
+        logger.error("Durable job {} failed after {} attempts{}: {}", job.name, job.attempts, ", giving up" if dead else "", error)
+        async with self._session_factory() as session:
+            if job.row_id is None:
+                await self._persist(session, [job], error, delay)
+            else:
+                await jobs_crud.reschedule(session, job.row_id, job.attempts, datetime.now() + timedelta(seconds=delay), error, dead)
+                await session.commit()
+
+    def _retry(self, job: Job) -> None:
+        self._retries = {handle: j for handle, j in self._retries.items() if j is not job}
+        if not self.running:
+            # stopping: persisted (or discarded) with the rest of the queue
+            self._stranded.append(job)
+        elif not self._offer(job):
+            # full again: leave it to the table
+            asyncio.get_running_loop().create_task(self._persist_later(job))
+
+    async def _persist_later(self, job: Job) -> None:
+        async with self._session_factory() as session:
+            await self._persist(session, [job], "queue full")
+
+    async def _sweep(self, interval: float) -> None:
+        """Move due ``pending_jobs`` rows into the queue while it has room."""
+        lease = timedelta(seconds=settings.JOB_LEASE_SECONDS)
+        while True:
+            try:
+                room = self.maxsize - self._queue.qsize() if self.running else 0
+                if room > 0:
+                    async with self._session_factory() as session:
+                        rows = await jobs_crud.claim_due(session, datetime.now(), lease, min(room, settings.JOB_SWEEP_BATCH))
+                        await session.commit()
+                    for row in rows:
+                        # not queued (full or stopping): the lease runs out and the row is due again
+                        if self.running:
+                            self._offer(Job(row.name, row.payload, durable=True, attempts=row.attempts, row_id=row.id))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # keep the loop alive; the next tick retries
+                logger.exception("Job sweep failed")
+            await asyncio.sleep(interval)
+
+
+job_queue = JobQueue(
+    maxsize=settings.JOB_QUEUE_SIZE,
+    workers=settings.JOB_WORKERS,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    dead_after_attempts=settings.JOB_DEAD_AFTER_ATTEMPTS,
+    retry_base_seconds=settings.JOB_RETRY_BASE_SECONDS,
+)
@@ -1,23 +1,34 @@
-from app.schemas.members import MemberCreate, MemberUpdate
+from app.schemas.members import MemberCreate, MemberUpdate, MemberResponse
 from app.crud.members_crud import create, get_by_id, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 from loguru import logger
 from app.core.constants import MSG_MEMBER_NOT_FOUND, MSG_MEMBER_ACTIVE_BORROWS
+from app.core.entity_cache import entity_cache
+from app.db.replicas import cache_scope
+from app.models.member import Member
 
 async def create_member(db: AsyncSession, member: MemberCreate):
-    logger.debug(f"Registering member: {member.name}")
-    return await create(db, member=member)
+    logger.debug("Registering member: {}", member.name)
+    created = await create(db, member=member)
+    return created
 
-async def get_member_borrows(db: AsyncSession, member_id: int, status, skip: int = 0, limit: int = 10):
-    logger.debug(f"Fetching borrows for member ID: {member_id}")
+async def get_member(db: AsyncSession, member_id: int) -> MemberResponse | None:
+    """Read-only snapshot of a member, served from the entity cache when possible."""
+    async def load():
+        member = await get_by_id(db, member_id)
+        return MemberResponse.model_validate(member) if member else None
+    return await entity_cache.get_or_load("member", member_id, load, cache_scope(db))
+
+async def get_member_borrows(db: AsyncSession, member_id: int, status, skip: int = 0, limit: int = 10, cursor: str | None = None, include_total: bool = True):
+    logger.debug("Fetching borrows for member ID: {}", member_id)
     from app.crud.borrow_crud import get_borrows_by_member
-    return await get_borrows_by_member(db, member_id, status, skip=skip, limit=limit)
+    return await get_borrows_by_member(db, member_id, status, skip=skip, limit=limit, cursor=cursor, include_total=include_total)
 
-async def get_members(db: AsyncSession, skip: int = 0, limit: int = 10):
-    logger.debug(f"Fetching members (skip={skip}, limit={limit})")
+async def get_members(db: AsyncSession, skip: int = 0, limit: int = 10, cursor: str | None = None, include_total: bool = True):
+    logger.debug("Fetching members (skip={}, limit={}, cursor={})", skip, limit, cursor)
     from app.crud.members_crud import get_all_members
-    return await get_all_members(db, skip=skip, limit=limit)
+    return await get_all_members(db, skip=skip, limit=limit, cursor=cursor, include_total=include_total)
 
 
 async def update_member(db: AsyncSession, member_id: int, member_update: MemberUpdate):
@@ -31,7 +42,9 @@ async def update_member(db: AsyncSession, member_id: int, member_update: MemberU
     for key, value in data.items():
         setattr(existing, key, value)
 
-    return await update(db, existing)
+    updated = await update(db, existing)
+    entity_cache.invalidate("member", member_id)
+    return updated
 
 
 async def delete_member(db: AsyncSession, member_id: int):
@@ -40,9 +53,9 @@ async def delete_member(db: AsyncSession, member_id: int):
     from app.schemas.members import Status
     from fastapi import HTTPException
 
-    # Check if member has active borrows
-    _, total_active = await get_borrows_by_member(db, member_id, Status.borrowed, limit=1)
-    if total_active > 0:
+    # Check if member has active borrows (an exact check, never a cached count)
+    active, _ = await get_borrows_by_member(db, member_id, Status.borrowed, limit=1, include_total=False)
+    if active:
         raise HTTPException(
             status_code=400,
             detail=MSG_MEMBER_ACTIVE_BORROWS
@@ -51,5 +64,6 @@ async def delete_member(db: AsyncSession, member_id: int):
     deleted = await delete_by_id(db, member_id)
     if not deleted:
         raise HTTPException(status_code=404, detail=MSG_MEMBER_NOT_FOUND.format(id=member_id))
+    entity_cache.invalidate("member", member_id)
     return None
 
@@ -0,0 +1,169 @@
+import asyncio
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from loguru import logger
+
+from app.core.constants import NOTICE_BATCH_SIZE, NOTICE_SEND_CHUNK
+from app.core.mail import Message, Transport, make_transport
+from app.core.metrics import NOTICES
+from app.core.settings import settings
+from app.crud import notices_crud
+from app.models.notices import NOTICE_OVERDUE, NOTICE_REMINDER
+from app.schemas.notices import NoticeRunResult
+
+
+def _pending(batch) -> dict[int, list]:
+    """Group a batch of owed loans by member (member id -> ``(borrow_id, kind)``)."""
+    pending = defaultdict(list)
+    for due_date, borrow_id, member_id, kind in batch:
+        pending[member_id].append((borrow_id, kind))
+    return pending
+
+
+def _chunks(pending: dict[int, list]):
+    """Member ids in ascending order, grouped so each group holds about ``NOTICE_SEND_CHUNK`` loans."""
+    chunk, size = [], 0
+    for member_id in sorted(pending):
+        chunk.append(member_id)
+        size += len(pending[member_id])
+        if size >= NOTICE_SEND_CHUNK:
+            yield chunk
+            chunk, size = [], 0
+    if chunk:
+        yield chunk
+
+
+def _message(rows, kinds: dict[int, str], as_of: date) -> Message:
+    """One message listing every loan of a member, overdue loans first."""
+    overdue = [row for row in rows if kinds[row["borrow_id"]] == NOTICE_OVERDUE]
+    due = [row for row in rows if kinds[row["borrow_id"]] == NOTICE_REMINDER]
+    lines = [f"Hello {rows[0]['member_name']},", ""]
+    if overdue:
+        lines.append("These books are overdue, please return them as soon as possible:")
+        lines += [f"  - {row['book_title']} (due {row['due_date']}, {(as_of - row['due_date']).days} days overdue)" for row in overdue]
+        lines.append("")
+    if due:
+        lines.append("These books are due soon:")
+        lines += [f"  - {row['book_title']} (due {row['due_date']})" for row in due]
+        lines.append("")
+    lines.append("Thank you.")
+    subject = (
+        f"{len(overdue)} overdue library book{'s' if len(overdue) != 1 else ''}" if overdue
+        else f"{len(due)} library book{'s' if len(due) != 1 else ''} due soon"
+    )
+    return Message(to=rows[0]["member_email"], subject=subject, body="\n".join(lines))
+
+
+async def _send_chunk(db: AsyncSession, transport: Transport, pending: dict[int, list], member_ids: list[int], as_of: date, slots: asyncio.Semaphore) -> tuple[int, int, int]:
+    """Claim, send and record the notices of ``member_ids``; ``(members, sent, failed)``."""
+    notices = [(borrow_id, kind, member_id) for member_id in member_ids for borrow_id, kind in pending[member_id]]
+    try:
+        claimed = await notices_crud.claim_notices(db, notices, datetime.now())
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+    # the reminder and overdue windows don't overlap, so a run owes a loan one kind at most
+    kinds = dict(claimed)
+    member_of = {borrow_id: member_id for borrow_id, _, member_id in notices}
+    confirmed = set()
+
+    async def send(member_id: int, rows) -> bool:
+        async with slots:
+            try:
+                await transport.send(_message(rows, kinds, as_of))
+            except Exception:
+                logger.exception("Sending notice to member {} failed", member_id)
+                NOTICES.labels("failed").inc()
+                return False
+        confirmed.add(member_id)
+        NOTICES.labels("sent").inc()
+        return True
+
+    by_member = defaultdict(list)
+    try:
+        # loans returned since they were collected drop out here
+        for row in await notices_crud.get_notice_loans(db, list(kinds)):
+            by_member[row["member_id"]].append(row)
+        members = list(by_member)
+        results = await asyncio.gather(*(send(member_id, by_member[member_id]) for member_id in members))
+    except BaseException:
+        # cancelled (or failed) mid-chunk: hand back the claims of every message not known to be sent
+        await db.rollback()
+        unsent = [(borrow_id, kind) for borrow_id, kind in claimed if member_of[borrow_id] not in confirmed]
+        try:
+            await notices_crud.release_notices(db, unsent)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            logger.exception("Releasing {} notice claims failed", len(unsent))
+        raise
+    failed = [
+        (row["borrow_id"], kinds[row["borrow_id"]])
+        for member_id, ok in zip(members, results) if not ok
+        for row in by_member[member_id]
+    ]
+    if failed:
+        try:
+            await notices_crud.release_notices(db, failed)
+            await db.commit()
+        except BaseException:
+            await db.rollback()
+            raise
+    sent = sum(results)
+    return len(members), sent, len(members) - sent
+
+
+async def dispatch_notices(db: AsyncSession, transport: Transport, as_of: date | None = None) -> NoticeRunResult:
+    """Send due-date reminders and overdue notices, one message per member and batch.
+
+    Loans due within ``NOTICE_REMINDER_DAYS`` of ``as_of`` (default today)
+    are owed a reminder, loans overdue by up to
+    ``NOTICE_OVERDUE_LOOKBACK_DAYS`` an overdue notice, each at most once.
+    Loans without one are read in ``(due_date, id)`` keyset batches of
+    ``NOTICE_BATCH_SIZE`` off the open due-date index, and each batch is
+    done with before the next is read, so memory stays flat however many
+    loans are owed: grouped by member, in chunks of members their
+    ``loan_notices`` rows are claimed and committed, the messages sent
+    (``MAIL_CONCURRENCY`` at a time), and the rows of failed messages
+    deleted again, as are those of unsent messages when the run is
+    cancelled. A member whose loans fall in different batches gets a
+    message per batch. Re-runs only see what is still owed, and two
+    dispatchers never send the same notice; a crash between claim and send
+    loses those notices rather than sending them twice.
+    """
+    as_of = as_of or date.today()
+    due_from = as_of - timedelta(days=settings.NOTICE_OVERDUE_LOOKBACK_DAYS)
+    due_to = as_of + timedelta(days=settings.NOTICE_REMINDER_DAYS)
+    slots = asyncio.Semaphore(settings.MAIL_CONCURRENCY)
+    after, loans = None, 0
+    members = sent = failed = 0
+    while batch := await notices_crud.get_unnotified_loans(db, as_of, due_from, due_to, after, NOTICE_BATCH_SIZE):
+        after, loans = batch[-1][:2], loans + len(batch)
+        pending = _pending(batch)
+        for member_ids in _chunks(pending):
+            chunk_members, chunk_sent, chunk_failed = await _send_chunk(db, transport, pending, member_ids, as_of, slots)
+            members, sent, failed = members + chunk_members, sent + chunk_sent, failed + chunk_failed
+    # the last, empty read leaves a read transaction open
+    await db.rollback()
+    logger.info("Loan notices as of {}: {} loans, {} sent, {} failed", as_of, loans, sent, failed)
+    return NoticeRunResult(as_of=as_of, loans=loans, members=members, sent=sent, failed=failed)
+
+
+async def run_notice_dispatcher(session_factory: async_sessionmaker, interval: float):
+    """Dispatch notices every ``interval`` seconds until cancelled (started from the app lifespan)."""
+    transport = make_transport()
+    try:
+        while True:
+            try:
+                async with session_factory() as session:
+                    await dispatch_notices(session, transport)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # keep the loop alive; the next tick retries
+                logger.exception("Notice dispatch failed")
+            await asyncio.sleep(interval)
+    finally:
+        await transport.aclose()
@@ -0,0 +1,101 @@
+import asyncio
+from datetime import date, datetime
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from loguru import logger
+
+from app.crud import overdue_crud
+from app.schemas.overdue import OverdueLoan, OverdueMember, OverdueReport, OverdueSource
+
+# as_of/scanned_at of the last scan by this process, so an empty snapshot
+# still reports when it was taken
+_last_scan: tuple[date, datetime] | None = None
+
+
+def _group_by_member(rows, as_of: date) -> list[OverdueMember]:
+    """Group loan rows (ordered by member) into one entry per member."""
+    members: dict[int, OverdueMember] = {}
+    for row in rows:
+        days = (as_of - row["due_date"]).days
+        entry = members.get(row["member_id"])
+        if entry is None:
+            entry = members[row["member_id"]] = OverdueMember(
+                member_id=row["member_id"],
+                member_name=row["member_name"],
+                member_email=row["member_email"],
+                loans=[],
+                max_days_overdue=0,
+            )
+        entry.loans.append(OverdueLoan(
+            borrow_id=row["borrow_id"],
+            book_id=row["book_id"],
+            book_title=row["book_title"],
+            borrowed_date=row["borrowed_date"],
+            due_date=row["due_date"],
+            days_overdue=days,
+        ))
+        entry.max_days_overdue = max(entry.max_days_overdue, days)
+    return list(members.values())
+
+
+async def overdue_report(
+    db: AsyncSession,
+    source: OverdueSource = OverdueSource.live,
+    as_of: date | None = None,
+    member_id: int | None = None,
+) -> OverdueReport:
+    """Overdue loans grouped by member.
+
+    ``live`` queries the borrow tables as of ``as_of`` (default today);
+    ``snapshot`` reads the table written by the last background scan and
+    ignores ``as_of``.
+    """
+    if source == OverdueSource.snapshot:
+        logger.debug("Reading overdue snapshot (member={})", member_id)
+        snapshot = await overdue_crud.get_snapshot(db, member_id)
+        snap_as_of, scanned_at = await overdue_crud.get_snapshot_scanned_at(db)
+        if snap_as_of is None and _last_scan is not None:
+            snap_as_of, scanned_at = _last_scan
+        rows = [
+            {c: getattr(s, c) for c in (
+                "borrow_id", "member_id", "member_name", "member_email",
+                "book_id", "book_title", "borrowed_date", "due_date",
+            )}
+            for s in snapshot
+        ]
+        members = _group_by_member(rows, snap_as_of) if rows else []
+        return OverdueReport(source=source, as_of=snap_as_of, scanned_at=scanned_at, total_loans=len(rows), members=members)
+
+    as_of = as_of or date.today()
+    logger.debug("Computing overdue loans as of {} (member={})", as_of, member_id)
+    rows = await overdue_crud.get_overdue_loans(db, as_of, member_id)
+    return OverdueReport(source=source, as_of=as_of, total_loans=len(rows), members=_group_by_member(rows, as_of))
+
+
+async def scan_overdue(db: AsyncSession, as_of: date | None = None) -> int:
+    """Rebuild the overdue snapshot; returns the number of overdue loans found."""
+    global _last_scan
+    as_of = as_of or date.today()
+    scanned_at = datetime.now()
+    try:
+        count = await overdue_crud.replace_snapshot(db, as_of, scanned_at)
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+    _last_scan = (as_of, scanned_at)
+    logger.info("Overdue scan as of {}: {} overdue loans", as_of, count)
+    return count
+
+
+async def run_overdue_scanner(session_factory: async_sessionmaker, interval: float):
+    """Rescan every ``interval`` seconds until cancelled (started from the app lifespan)."""
+    while True:
+        try:
+            async with session_factory() as session:
+                await scan_overdue(session)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # keep the loop alive; the next tick retries
+            logger.exception("Overdue scan failed")
+        await asyncio.sleep(interval)
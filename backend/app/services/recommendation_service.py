@@ -0,0 +1,129 @@
+import asyncio
+import itertools
+from array import array
+from collections import Counter
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from fastapi import HTTPException
+from loguru import logger
+
+from app.core.constants import (
+    MSG_BOOK_NOT_FOUND, RECOMMEND_BATCH_SIZE, RECOMMEND_HISTORY_LIMIT, RECOMMEND_MEMBER_CHUNK, RECOMMEND_TOP_K,
+)
+from app.core.entity_cache import entity_cache
+from app.db.replicas import cache_scope
+from app.crud import recommendation_crud
+from app.schemas.recommendation import Recommendation
+from app.services.book_service import get_book
+
+
+def _pair_increments(borrows, histories: dict[int, list[int]], borrowed_before: set[tuple[int, int]], history_limit: int) -> Counter:
+    """Co-borrowing increments for ``borrows`` (oldest first) given each member's prior books.
+
+    ``histories`` holds each member's most recently borrowed books, least
+    recent first, and ``borrowed_before`` the ``(member_id, book_id)`` of
+    ``borrows`` borrowed at any time before. A member's first borrow of a
+    book pairs it with (at most ``history_limit`` of) the books they
+    borrowed most recently before, in both directions; borrowing a book
+    again adds nothing, however long ago the first borrow was. Capping the
+    pairing history bounds the work per borrow for very active members.
+    """
+    counts = Counter()
+    borrowed = set(borrowed_before)
+    recent = {member_id: dict.fromkeys(books[-history_limit:]) for member_id, books in histories.items()}
+    for _, member_id, book_id in borrows:
+        seen = recent.setdefault(member_id, {})
+        if (member_id, book_id) in borrowed:
+            seen.pop(book_id, None)
+        else:
+            borrowed.add((member_id, book_id))
+            for other in seen:
+                counts[(book_id, other)] += 1
+                counts[(other, book_id)] += 1
+        seen[book_id] = None
+        if len(seen) > history_limit:
+            del seen[next(iter(seen))]
+    return counts
+
+
+async def _batch_increments(db: AsyncSession, borrows, up_to_id: int) -> Counter:
+    """``_pair_increments`` of a batch, loading the histories of ``RECOMMEND_MEMBER_CHUNK`` members at a time."""
+    counts = Counter()
+    member_ids = sorted({member_id for _, member_id, _ in borrows})
+    for start in range(0, len(member_ids), RECOMMEND_MEMBER_CHUNK):
+        chunk = set(member_ids[start:start + RECOMMEND_MEMBER_CHUNK])
+        member_borrows = [borrow for borrow in borrows if borrow[1] in chunk]
+        histories = await recommendation_crud.get_member_histories(db, chunk, up_to_id, RECOMMEND_HISTORY_LIMIT)
+        borrowed_before = await recommendation_crud.get_borrowed_before(db, {(m, b) for _, m, b in member_borrows}, up_to_id)
+        counts.update(_pair_increments(member_borrows, histories, borrowed_before, RECOMMEND_HISTORY_LIMIT))
+    return counts
+
+
+async def update_cooccurrence(db: AsyncSession, batch_size: int = RECOMMEND_BATCH_SIZE) -> int:
+    """Fold borrows made since the last update into the co-borrowing matrix.
+
+    Works through new borrow transactions in id order, ``batch_size`` per
+    transaction, advancing the watermark in the same commit as the counts.
+    Returns the number of borrows processed.
+    """
+    processed = 0
+    while True:
+        try:
+            state = await recommendation_crud.lock_state(db)
+            # a borrow committed after a later id was already folded in is
+            # skipped; a missed pair does not move the rankings
+            borrows = await recommendation_crud.get_new_borrows(db, state.last_borrow_id, batch_size)
+            counts = Counter()
+            if borrows:
+                counts = await _batch_increments(db, borrows, state.last_borrow_id)
+                await recommendation_crud.add_cooccurrences(db, counts)
+                state.last_borrow_id = borrows[-1][0]
+            await db.commit()
+        except BaseException:
+            await db.rollback()
+            raise
+        entity_cache.invalidate("neighbours", *{book_id for book_id, _ in counts})
+        processed += len(borrows)
+        if len(borrows) < batch_size:
+            break
+    if processed:
+        logger.info("Folded {} borrows into the co-borrowing matrix", processed)
+    return processed
+
+
+async def _neighbours(db: AsyncSession, book_id: int) -> array:
+    """Top neighbours of a book as a flat ``array`` of (book id, members) pairs, cached."""
+    async def load():
+        pairs = await recommendation_crud.get_neighbours(db, book_id, RECOMMEND_TOP_K)
+        return array("I", itertools.chain.from_iterable(pairs))
+    return await entity_cache.get_or_load("neighbours", book_id, load, cache_scope(db))
+
+
+async def recommendations_for(db: AsyncSession, book_id: int, limit: int = 10) -> list[Recommendation]:
+    """Books most often borrowed by members who also borrowed ``book_id``."""
+    neighbours = await _neighbours(db, book_id)
+    if not neighbours:
+        if not await get_book(db, book_id):
+            raise HTTPException(status_code=404, detail=MSG_BOOK_NOT_FOUND.format(id=book_id))
+        return []
+    ids, members = neighbours[0::2][:limit], neighbours[1::2]
+    titles = await recommendation_crud.get_book_titles(db, ids)
+    return [
+        Recommendation(book_id=other, title=titles[other][0], author=titles[other][1], members=n)
+        for other, n in zip(ids, members)
+        # deleted books drop out
+        if other in titles
+    ]
+
+
+async def run_recommender(session_factory: async_sessionmaker, interval: float):
+    """Update the matrix every ``interval`` seconds until cancelled (started from the app lifespan)."""
+    while True:
+        try:
+            async with session_factory() as session:
+                await update_cooccurrence(session)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # keep the loop alive; the next tick retries
+            logger.exception("Recommendation update failed")
+        await asyncio.sleep(interval)
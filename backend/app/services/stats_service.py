@@ -0,0 +1,44 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+from loguru import logger
+
+from app.core.constants import MSG_BOOK_NOT_FOUND
+from app.crud import stats_crud
+from app.schemas.stats import ActiveMember, BookStatsResponse, PopularBook, StatsRebuildResult
+from app.services.book_service import get_book
+
+
+async def popular_books(db: AsyncSession, limit: int = 10) -> list[PopularBook]:
+    rows = await stats_crud.get_top_books(db, limit)
+    return [PopularBook.model_validate(dict(row)) for row in rows]
+
+
+async def active_members(db: AsyncSession, limit: int = 10) -> list[ActiveMember]:
+    rows = await stats_crud.get_top_members(db, limit)
+    return [ActiveMember.model_validate(dict(row)) for row in rows]
+
+
+async def book_stats(db: AsyncSession, book_id: int) -> BookStatsResponse:
+    """Lifetime counters of one book; zeros if it was never borrowed."""
+    stats = await stats_crud.get_book_stats(db, book_id)
+    if stats is None:
+        if not await get_book(db, book_id):
+            raise HTTPException(status_code=404, detail=MSG_BOOK_NOT_FOUND.format(id=book_id))
+        return BookStatsResponse(book_id=book_id, borrow_count=0, return_count=0, last_borrowed_date=None)
+    return BookStatsResponse.model_validate(stats, from_attributes=True)
+
+
+async def rebuild_stats(db: AsyncSession) -> StatsRebuildResult:
+    """Recompute the circulation stats from the full borrow history.
+
+    For backfilling and for repairing drift, e.g. after borrow records were
+    deleted or edited outside the borrow/return endpoints.
+    """
+    try:
+        books, members = await stats_crud.rebuild(db)
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+    logger.info("Rebuilt circulation stats for {} books and {} members", books, members)
+    return StatsRebuildResult(books=books, members=members)
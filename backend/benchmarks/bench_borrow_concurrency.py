@@ -0,0 +1,118 @@
+"""Concurrent checkouts of one title: throughput and overselling check.
+
+Seeds a book with ``--copies`` copies and ``--members`` members, then fires
+``--members`` concurrent ``borrow_service.borrow_book`` calls, each on its own
+session. Exactly ``--copies`` of them must succeed and the book must end with
+zero available copies; anything else means a copy was oversold.
+
+    cd backend && python -m benchmarks.bench_borrow_concurrency --copies 50 --members 500
+    cd backend && python -m benchmarks.bench_borrow_concurrency --copies 50 --members 500 --inventory
+
+``--inventory`` claims ``book_copies`` rows (``COPY_INVENTORY_ENABLED``)
+instead of decrementing the book row, and flushes ``available_copies`` once
+at the end.
+
+Uses a temporary SQLite file by default; pass ``--url`` to run against a
+scratch Postgres database that has been migrated to head.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.settings import settings
+from app.db.base import Base
+from app.models.book import Book
+from app.models.borrow import BorrowTransaction
+from app.models.inventory import BookCopy
+from app.models.member import Member
+from app.services import borrow_service, inventory_service
+
+
+async def seed(session: AsyncSession, copies: int, members: int) -> tuple[int, list[int]]:
+    await session.execute(delete(BorrowTransaction))
+    await session.execute(delete(BookCopy))
+    await session.execute(delete(Book).where(Book.isbn == "BENCH-HOT"))
+    await session.execute(delete(Member).where(Member.email.like("bench-%")))
+    book_id = (await session.execute(
+        insert(Book)
+        .values(title="Hot title", author="Bench", isbn="BENCH-HOT", total_copies=copies, available_copies=copies)
+        .returning(Book.id)
+    )).scalar_one()
+    member_ids = (await session.execute(
+        insert(Member).returning(Member.id),
+        [{"name": f"Bench {i}", "email": f"bench-{i}@example.com"} for i in range(members)],
+    )).scalars().all()
+    await session.commit()
+    if settings.COPY_INVENTORY_ENABLED:
+        await inventory_service.sync_books(session, [book_id])
+    return book_id, list(member_ids)
+
+
+async def run(url: str, copies: int, members: int, pool_size: int):
+    connect_args = {"timeout": 60} if url.startswith("sqlite") else {}
+    engine = create_async_engine(url, pool_size=pool_size, max_overflow=0, connect_args=connect_args)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+    async with session_factory() as session:
+        book_id, member_ids = await seed(session, copies, members)
+
+    today = date.today()
+
+    async def attempt(member_id: int) -> bool:
+        async with session_factory() as session:
+            try:
+                await borrow_service.borrow_book(session, member_id, book_id, today, today + timedelta(days=14))
+                return True
+            except borrow_service.BookNotAvailable:
+                return False
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(attempt(m) for m in member_ids))
+    elapsed = time.perf_counter() - start
+
+    async with session_factory() as session:
+        await inventory_service.flush_availability(session)
+        available = (await session.execute(select(Book.available_copies).where(Book.id == book_id))).scalar_one()
+        borrowed = (await session.execute(
+            select(func.count()).select_from(BorrowTransaction).where(BorrowTransaction.book_id == book_id)
+        )).scalar_one()
+    await engine.dispose()
+
+    succeeded = sum(results)
+    print(f"attempts={members} copies={copies} succeeded={succeeded} rejected={members - succeeded}")
+    print(f"elapsed={elapsed * 1000:.1f} ms ({members / elapsed:.0f} attempts/s)")
+    print(f"available_copies={available} borrow_rows={borrowed}")
+    ok = succeeded == copies == borrowed and available == 0
+    print("OK: no overselling" if ok else "FAIL: inventory is inconsistent")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--copies", type=int, default=10)
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--pool-size", type=int, default=20)
+    parser.add_argument("--url", default=None, help="database URL (default: temporary SQLite file)")
+    parser.add_argument("--inventory", action="store_true", help="claim per-copy rows with SKIP LOCKED")
+    args = parser.parse_args()
+    settings.COPY_INVENTORY_ENABLED = args.inventory
+
+    if args.url:
+        ok = asyncio.run(run(args.url, args.copies, args.members, args.pool_size))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+            ok = asyncio.run(run(url, args.copies, args.members, args.pool_size))
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Latency and memory per page of the borrow listing: ORM + selectinload vs projection.
+
+Seeds ``--borrows`` borrows over a temporary SQLite file, then fetches the same
+``--size``-row page (include=all, sorted by book title) ``--pages`` times via:
+
+* ``orm``: the previous read path, loading ``BorrowTransaction`` entities and
+  ``selectinload``-ing books and members in two extra queries, then validating
+  the page from attributes;
+* ``projection``: ``borrow_crud.get_all_borrows``, one joined Core SELECT of
+  the response columns mapped straight into the response models.
+
+    cd backend && python -m benchmarks.bench_borrow_listing --borrows 2000 --size 100
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+
+from app.core.pagination import build_page, keyset_cursor
+from app.crud import borrow_crud
+from app.db.base import Base
+from app.models.book import Book
+from app.models.borrow import BorrowTransaction
+from app.models.member import Member
+from app.schemas.borrow import ActiveBorrowWithAll
+from app.schemas.members import Status
+
+
+async def seed(session: AsyncSession, borrows: int):
+    books, members = max(borrows // 20, 1), max(borrows // 10, 1)
+    await session.execute(insert(Book), [
+        {"title": f"Book {i}", "author": "Bench", "isbn": f"BENCH{i}", "total_copies": 5, "available_copies": 5}
+        for i in range(books)
+    ])
+    await session.execute(insert(Member), [{"name": f"Member {i}", "email": f"bench-{i}@example.com"} for i in range(members)])
+    start = date(2024, 1, 1)
+    await session.execute(insert(BorrowTransaction), [
+        {
+            "member_id": i % members + 1, "book_id": i % books + 1,
+            "borrowed_date": start + timedelta(days=i % 365), "due_date": start + timedelta(days=i % 365 + 14),
+            "returned_date": None if i % 4 == 0 else start + timedelta(days=i % 365 + 7),
+        }
+        for i in range(borrows)
+    ])
+    await session.commit()
+
+
+async def orm_page(session: AsyncSession, size: int):
+    query = (
+        select(BorrowTransaction)
+        .join(Book)
+        .options(selectinload(BorrowTransaction.book), selectinload(BorrowTransaction.member))
+        .order_by(Book.title.asc(), BorrowTransaction.id.asc())
+        .limit(size + 1)
+    )
+    items = (await session.execute(query)).scalars().all()
+    return build_page(items, None, 1, size, None, lambda b: keyset_cursor("book", "asc", b.book.title, b.id), ActiveBorrowWithAll)
+
+
+async def projection_page(session: AsyncSession, size: int):
+    items, _ = await borrow_crud.get_all_borrows(
+        session, Status.all, include="all", limit=size + 1, sort_by="book", order="asc", include_total=False
+    )
+    return build_page(items, None, 1, size, None, lambda b: keyset_cursor("book", "asc", b.book.title, b.id), ActiveBorrowWithAll)
+
+
+async def measure(session_factory, fetch, size: int, pages: int) -> tuple[float, int]:
+    """Mean milliseconds per page, and peak bytes allocated while building one page."""
+    async with session_factory() as session:
+        await fetch(session, size)  # warm up
+    start = time.perf_counter()
+    for _ in range(pages):
+        # a fresh session per page, like a request
+        async with session_factory() as session:
+            await fetch(session, size)
+    elapsed_ms = (time.perf_counter() - start) * 1000 / pages
+
+    async with session_factory() as session:
+        tracemalloc.start()
+        page = await fetch(session, size)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    assert len(page.items) == size
+    return elapsed_ms, peak
+
+
+async def run(borrows: int, size: int, pages: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            session_factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+            async with session_factory() as session:
+                await seed(session, borrows)
+
+            print(f"{'path':>11} {'ms/page':>9} {'peak KiB':>9}")
+            results = {}
+            for name, fetch in (("orm", orm_page), ("projection", projection_page)):
+                results[name] = await measure(session_factory, fetch, size, pages)
+                print(f"{name:>11} {results[name][0]:>9.2f} {results[name][1] / 1024:>9.0f}")
+            print(f"latency: {results['orm'][0] / results['projection'][0]:.2f}x faster, "
+                  f"memory: {results['orm'][1] / results['projection'][1]:.2f}x less")
+        finally:
+            await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--borrows", type=int, default=2000)
+    parser.add_argument("--size", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.borrows, args.size, args.pages))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Per-request overhead of the request logging middleware.
+
+Drives a trivial ASGI endpoint directly (no sockets, no database) bare,
+through the previous ``BaseHTTPMiddleware``-based logger and through the
+current pure-ASGI ``LoggingMiddleware``, and prints the median cost per
+request of each. Log output goes to a null sink, so only the middleware
+itself is measured.
+
+    cd backend && python -m benchmarks.bench_middleware --requests 20000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from loguru import logger
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.core.logging_config import LoggingMiddleware
+from app.core.metrics import REQUEST_LATENCY, REQUESTS_IN_FLIGHT, route_label
+from app.db.instrumentation import collect_queries
+
+
+class BaseHTTPLoggingMiddleware(BaseHTTPMiddleware):
+    """The middleware as it was before the pure-ASGI rewrite, for comparison."""
+
+    async def dispatch(self, request, call_next):
+        start_time = time.time()
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            with collect_queries() as queries:
+                response = await call_next(request)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+        process_time = (time.time() - start_time) * 1000
+        status_code = response.status_code
+        REQUEST_LATENCY.labels(request.method, route_label(request.scope), str(status_code)).observe(process_time / 1000)
+        response.headers["Server-Timing"] = (
+            f'db;dur={queries.total_ms:.2f};desc="{queries.count} queries", app;dur={process_time:.2f}'
+        )
+        logger.info(f"{request.method} {request.url.path} - {status_code} - {process_time:.2f}ms - db {queries.count}q/{queries.total_ms:.2f}ms")
+        return response
+
+
+async def ping(request):
+    return PlainTextResponse("pong")
+
+
+def build_app(middleware=None):
+    app = Starlette(routes=[Route("/ping", ping)])
+    if middleware is not None:
+        app.add_middleware(middleware)
+    return app
+
+
+async def drive(app, requests: int) -> float:
+    """Median microseconds per request over ``requests`` sequential calls."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/ping", "raw_path": b"/ping", "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await app(dict(scope), receive, send)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+async def run(requests: int):
+    logger.remove()
+    logger.add(lambda _: None, level="INFO")
+    variants = [
+        ("no middleware", build_app()),
+        ("BaseHTTPMiddleware", build_app(BaseHTTPLoggingMiddleware)),
+        ("pure ASGI", build_app(LoggingMiddleware)),
+    ]
+    baseline = None
+    print(f"{'variant':>20} {'us/request':>12} {'overhead us':>12}")
+    for name, app in variants:
+        await drive(app, min(requests, 1000))  # warm up
+        per_request = await drive(app, requests)
+        baseline = per_request if baseline is None else baseline
+        print(f"{name:>20} {per_request:>12.1f} {per_request - baseline:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=10_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
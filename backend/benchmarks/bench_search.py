@@ -0,0 +1,104 @@
+"""Catalog search latency vs catalog size.
+
+Seeds a throwaway database with N synthetic books for each size and times
+``books_crud.get_books(q=...)`` through the indexed search path and through
+the old ``ILIKE '%q%'`` scan, so the growth curves can be compared.
+
+    cd backend && python -m benchmarks.bench_search --sizes 10000 100000 1000000
+
+Uses a temporary SQLite file by default; pass ``--url`` to run against a
+scratch Postgres database that has been migrated to head.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import delete, insert, select, func
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.crud import books_crud
+from app.db.base import Base
+from app.models.book import Book
+from app.models import borrow, member  # noqa: F401
+
+WORDS = [
+    "river", "shadow", "garden", "empire", "silent", "winter", "python", "ocean",
+    "memory", "stone", "glass", "harbor", "crimson", "forest", "atlas", "signal",
+]
+QUERIES = ["python", "crimson harbor", "tolkien", "zz"]
+
+
+async def seed(session: AsyncSession, size: int, batch: int = 10_000):
+    rng = random.Random(size)
+    await session.execute(delete(Book))
+    for start in range(0, size, batch):
+        rows = [
+            {
+                "title": " ".join(rng.choices(WORDS, k=3)) + f" {i}",
+                "author": f"Author {rng.randrange(size // 10 + 1)}",
+                "isbn": f"BENCH{i:012d}",
+                "total_copies": 1,
+                "available_copies": 1,
+            }
+            for i in range(start, min(start + batch, size))
+        ]
+        await session.execute(insert(Book), rows)
+    await session.commit()
+
+
+async def time_query(session: AsyncSession, fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+async def run(url: str, sizes: list[int], repeat: int):
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+    print(f"{'books':>10} {'query':>16} {'indexed ms':>12} {'ilike ms':>10} {'hits':>8}")
+    for size in sizes:
+        async with session_factory() as session:
+            await seed(session, size)
+            for q in QUERIES:
+                async def indexed():
+                    return await books_crud.get_books(session, limit=10, q=q)
+
+                async def ilike():
+                    query = select(Book).where(books_crud._substring_filter(q))
+                    await session.execute(select(func.count()).select_from(query.alias()))
+                    return (await session.execute(query.limit(10))).scalars().all()
+
+                _, hits = await indexed()
+                indexed_ms = await time_query(session, indexed, repeat)
+                ilike_ms = await time_query(session, ilike, repeat)
+                print(f"{size:>10} {q:>16} {indexed_ms:>12.2f} {ilike_ms:>10.2f} {hits:>8}")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--url", default=None, help="database URL (default: temporary SQLite file)")
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(run(args.url, args.sizes, args.repeat))
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+        asyncio.run(run(url, args.sizes, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
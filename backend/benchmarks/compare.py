@@ -0,0 +1,60 @@
+"""Compare two ``benchmarks.suite`` result files and flag regressions.
+
+    cd backend && python -m benchmarks.compare benchmarks/results/abc1234.json benchmarks/results/def5678.json
+
+A scenario regresses when its p95 latency grows, or its throughput drops, by
+more than ``--threshold`` (a fraction; 0.10 = 10%) or when it has new errors.
+Exits with status 1 if any scenario regressed.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def change(old: float, new: float) -> float:
+    return (new - old) / old if old else 0.0
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> list[str]:
+    """Print a comparison table; return the names of regressed scenarios."""
+    regressed = []
+    print(f"{baseline['meta']['commit']} -> {candidate['meta']['commit']}")
+    if baseline["meta"]["dataset"] != candidate["meta"]["dataset"] or baseline["meta"]["database"] != candidate["meta"]["database"]:
+        print("warning: runs used different datasets or databases")
+    print(f"{'scenario':>14} {'p50 ms':>18} {'p95 ms':>18} {'req/s':>20} {'errors':>9}")
+    for name, new in candidate["scenarios"].items():
+        old = baseline["scenarios"].get(name)
+        if old is None:
+            print(f"{name:>14} (new)")
+            continue
+        p50 = (old["latency_ms"]["p50"], new["latency_ms"]["p50"])
+        p95 = (old["latency_ms"]["p95"], new["latency_ms"]["p95"])
+        rps = (old["throughput_rps"], new["throughput_rps"])
+        worse = (
+            change(*p95) > threshold
+            or -change(*rps) > threshold
+            or new["errors"] > old["errors"]
+        )
+        if worse:
+            regressed.append(name)
+        print(
+            f"{name:>14} {p50[0]:>7.2f} -> {p50[1]:>7.2f} {p95[0]:>7.2f} -> {p95[1]:>7.2f} "
+            f"{rps[0]:>8.1f} -> {rps[1]:>8.1f} {old['errors']:>3} -> {new['errors']:>3}"
+            f"{'  REGRESSED' if worse else ''}"
+        )
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+    regressed = compare(json.loads(args.baseline.read_text()), json.loads(args.candidate.read_text()), args.threshold)
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Bulk synthetic data for benchmarks: books, members and borrows with realistic skew.
+
+Book popularity and member activity follow a Zipf-like curve (a few titles and
+readers account for most loans), popular titles stock more copies, and borrow
+dates spread over ``--days`` days with older loans mostly returned. The result
+is consistent with what the API maintains: a book never has more open loans
+than copies, ``available_copies`` matches its open loans, and a member holds
+at most one open loan per book.
+
+    cd backend && python -m benchmarks.datagen --books 1000000 --members 200000 --borrows 5000000
+
+Rows are written with explicit ids into empty tables (``--reset`` empties them
+first): batched executemany INSERTs on SQLite, ``COPY`` on Postgres.
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from sqlalchemy import bindparam, delete, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.crud import analytics_crud, stats_crud
+from app.db.base import Base
+from app.models.book import Book
+from app.models.borrow import BorrowTransaction
+from app.models.inventory import BookCopy
+from app.models.jobs import PendingJob
+from app.models.member import Member
+from app.models.notices import LoanNotice
+from app.models.overdue import OverdueSnapshot
+from app.models.recommendation import BookCooccurrence, RecommenderState
+from app.models.stats import CirculationCounted
+
+WORDS = [
+    "river", "shadow", "garden", "empire", "silent", "winter", "python", "ocean",
+    "memory", "stone", "glass", "harbor", "crimson", "forest", "atlas", "signal",
+    "night", "golden", "letters", "journey", "city", "machine", "quiet", "storm",
+]
+FIRST_NAMES = ["Asha", "Ben", "Chen", "Dara", "Elif", "Femi", "Gita", "Hugo", "Ines", "Jon", "Kemi", "Luca"]
+LAST_NAMES = ["Rao", "Smith", "Okafor", "Novak", "Silva", "Kim", "Haddad", "Berg", "Costa", "Ito"]
+
+LOAN_DAYS = 14
+BATCH_SIZE = 10_000
+
+
+@dataclass
+class Dataset:
+    books: int
+    members: int
+    borrows: int
+    seed: int = 42
+    days: int = 365
+    skew: float = 1.1
+
+    def as_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+def zipf_weights(n: int, skew: float) -> list[float]:
+    """Cumulative weights for ``random.choices``: rank ``r`` is picked in proportion to ``1 / r**skew``."""
+    return list(itertools.accumulate(1 / rank ** skew for rank in range(1, n + 1)))
+
+
+def book_rows(dataset: Dataset, rng: random.Random):
+    for i in range(1, dataset.books + 1):
+        # ids are popularity ranks, so the most borrowed titles stock the most copies
+        copies = max(1, min(20, round(20 / i ** 0.5))) + rng.randrange(2)
+        yield {
+            "id": i,
+            "title": " ".join(rng.choices(WORDS, k=3)).title() + f" {i}",
+            "author": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.randrange(dataset.books // 20 + 1)}",
+            "isbn": f"978{i:010d}",
+            "total_copies": copies,
+            "available_copies": copies,
+        }
+
+
+def member_rows(dataset: Dataset, rng: random.Random):
+    for i in range(1, dataset.members + 1):
+        yield {
+            "id": i,
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "email": f"member{i}@example.com",
+        }
+
+
+def borrow_rows(dataset: Dataset, rng: random.Random, copies: dict[int, int], open_loans: dict[int, int]):
+    """Borrow rows; fills ``open_loans`` with the open loan count per book as it goes."""
+    today = date.today()
+    book_weights = zipf_weights(dataset.books, dataset.skew)
+    member_weights = zipf_weights(dataset.members, dataset.skew * 0.8)
+    book_ids = range(1, dataset.books + 1)
+    member_ids = range(1, dataset.members + 1)
+    held = set()
+    for i in range(1, dataset.borrows + 1):
+        book_id = rng.choices(book_ids, cum_weights=book_weights)[0]
+        member_id = rng.choices(member_ids, cum_weights=member_weights)[0]
+        borrowed = today - timedelta(days=rng.randrange(dataset.days))
+        age = (today - borrowed).days
+        returned = None
+        # recent loans are mostly still out, older ones mostly back
+        still_out = rng.random() < (0.8 if age < LOAN_DAYS else 0.05 if age < 60 else 0.005)
+        if not still_out or open_loans.get(book_id, 0) >= copies[book_id] or (member_id, book_id) in held:
+            returned = min(today, borrowed + timedelta(days=rng.randint(1, LOAN_DAYS + 7)))
+        else:
+            open_loans[book_id] = open_loans.get(book_id, 0) + 1
+            held.add((member_id, book_id))
+        yield {
+            "id": i,
+            "member_id": member_id,
+            "book_id": book_id,
+            "borrowed_date": borrowed,
+            "due_date": borrowed + timedelta(days=LOAN_DAYS),
+            "returned_date": returned,
+        }
+
+
+async def _write(session: AsyncSession, model, rows) -> None:
+    """Write ``rows`` into ``model``'s table in batches."""
+    conn = await session.connection()
+    postgres = conn.dialect.name == "postgresql"
+    columns = [c.name for c in model.__table__.columns]
+    raw = (await conn.get_raw_connection()).driver_connection if postgres else None
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, BATCH_SIZE)):
+        if postgres:
+            await raw.copy_records_to_table(
+                model.__tablename__, records=[tuple(row[c] for c in columns) for row in batch], columns=columns
+            )
+        else:
+            await conn.execute(insert(model), batch)
+
+
+async def generate(session: AsyncSession, dataset: Dataset, reset: bool = False) -> None:
+    """Fill empty books/members/borrow tables with ``dataset``."""
+    if reset:
+        # children before parents; jobs and recommender state point at the old rows too
+        reset_models = (
+            LoanNotice, OverdueSnapshot, BorrowTransaction, BookCopy, Book, Member,
+            PendingJob, CirculationCounted, BookCooccurrence, RecommenderState,
+        )
+        for model in reset_models:
+            await session.execute(delete(model))
+    for model in (Book, Member, BorrowTransaction):
+        if await session.scalar(select(func.count()).select_from(model)):
+            raise RuntimeError(f"{model.__tablename__} is not empty; pass --reset to replace its rows")
+
+    rng = random.Random(dataset.seed)
+    copies = {}
+
+    def books():
+        for row in book_rows(dataset, rng):
+            copies[row["id"]] = row["total_copies"]
+            yield row
+
+    await _write(session, Book, books())
+    await _write(session, Member, member_rows(dataset, rng))
+    open_loans = {}
+    await _write(session, BorrowTransaction, borrow_rows(dataset, rng, copies, open_loans))
+
+    # books went in with every copy on the shelf; take out the ones on loan
+    if open_loans:
+        await session.execute(
+            Book.__table__.update().where(Book.id == bindparam("book_id")).values(available_copies=bindparam("available")),
+            [{"book_id": book_id, "available": copies[book_id] - n} for book_id, n in open_loans.items()],
+        )
+    await stats_crud.rebuild(session)
+    await analytics_crud.rebuild(session)
+    conn = await session.connection()
+    if conn.dialect.name == "postgresql":
+        # explicit ids bypassed the sequences
+        for model in (Book, Member, BorrowTransaction):
+            table = model.__tablename__
+            await session.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), coalesce(max(id), 1)) FROM {table}"
+            ))
+    await session.execute(text("ANALYZE"))
+    await session.commit()
+
+
+async def run(url: str, dataset: Dataset, reset: bool):
+    engine = create_async_engine(url)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+        start = time.perf_counter()
+        async with session_factory() as session:
+            await generate(session, dataset, reset=reset)
+        elapsed = time.perf_counter() - start
+        rows = dataset.books + dataset.members + dataset.borrows
+        print(f"wrote {rows} rows in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s)")
+    finally:
+        await engine.dispose()
+
+
+def add_dataset_arguments(parser: argparse.ArgumentParser, books: int, members: int, borrows: int) -> None:
+    parser.add_argument("--books", type=int, default=books)
+    parser.add_argument("--members", type=int, default=members)
+    parser.add_argument("--borrows", type=int, default=borrows)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--days", type=int, default=365, help="spread of borrow dates, in days before today")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of book popularity")
+
+
+def dataset_from_args(args) -> Dataset:
+    return Dataset(books=args.books, members=args.members, borrows=args.borrows, seed=args.seed, days=args.days, skew=args.skew)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite+aiosqlite:///./bench.db")
+    parser.add_argument("--reset", action="store_true", help="delete existing rows first")
+    add_dataset_arguments(parser, books=100_000, members=20_000, borrows=500_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, dataset_from_args(args), args.reset))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""End-to-end API benchmarks: latency and throughput per scenario, written as JSON.
+
+Drives the real FastAPI app in-process over ASGI (no network, no server), with
+every request on its own session against a database filled by
+``benchmarks.datagen``. Scenarios:
+
+* ``search``: ``GET /books/?q=`` with single-word and two-word queries;
+* ``paging``: clients walking the book, member and active-borrow listings
+  page by page through ``next_cursor``;
+* ``borrow_return``: clients checking out and returning the few titles
+  with the most copies on the shelf, so they contend for the same rows;
+* ``delete_guard``: ``DELETE`` of members and books that still have loans
+  out, which the API must refuse.
+
+    cd backend && python -m benchmarks.suite --scale small
+    cd backend && python -m benchmarks.suite --url postgresql+asyncpg://bench@localhost/nbl_bench --scale medium
+
+Results go to ``--output`` (default ``benchmarks/results/<commit>.json``);
+compare two runs with ``python -m benchmarks.compare old.json new.json``.
+The SQLite file (``--url``) is reused between runs when it already holds the
+requested dataset; Postgres databases must be scratch ones.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import statistics
+import subprocess
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+from loguru import logger
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.count_cache import count_cache
+from app.core.entity_cache import entity_cache
+from app.db.base import Base
+from app.db.session import get_db, get_read_db
+from app.main import app
+from app.models.book import Book
+from app.models.borrow import BorrowTransaction
+from app.models.member import Member
+from benchmarks.datagen import WORDS, Dataset, add_dataset_arguments, dataset_from_args, generate
+
+SCALES = {
+    "small": Dataset(books=10_000, members=2_000, borrows=50_000),
+    "medium": Dataset(books=200_000, members=40_000, borrows=1_000_000),
+    "large": Dataset(books=1_000_000, members=200_000, borrows=5_000_000),
+}
+API = "/api/v1"
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+class Scenario:
+    """A stream of requests; ``step`` sends one and returns its response."""
+    name = ""
+    # statuses that are a correct answer, not an error
+    expected = {200}
+
+    async def setup(self, session: AsyncSession, rng: random.Random):
+        pass
+
+    def new_client_state(self, rng: random.Random) -> dict:
+        return {}
+
+    async def step(self, client: httpx.AsyncClient, state: dict, rng: random.Random) -> httpx.Response:
+        raise NotImplementedError
+
+
+class Search(Scenario):
+    name = "search"
+
+    async def step(self, client, state, rng):
+        q = " ".join(rng.sample(WORDS, rng.choice((1, 2))))
+        return await client.get(f"{API}/books/", params={"q": q, "size": 20})
+
+
+class Paging(Scenario):
+    name = "paging"
+    listings = [
+        (f"{API}/books/", {}),
+        (f"{API}/members/", {}),
+        (f"{API}/borrow/active", {"include": "all", "sort_by": "due_date", "order": "asc"}),
+    ]
+
+    def new_client_state(self, rng):
+        path, params = rng.choice(self.listings)
+        return {"path": path, "params": params, "cursor": None}
+
+    async def step(self, client, state, rng):
+        params = {**state["params"], "size": 50, "include_total": "false"}
+        if state["cursor"]:
+            params["cursor"] = state["cursor"]
+        response = await client.get(state["path"], params=params)
+        if response.status_code == 200:
+            # start over at the end of the listing
+            state["cursor"] = response.json()["next_cursor"]
+        return response
+
+
+class BorrowReturn(Scenario):
+    name = "borrow_return"
+    # 400: every copy of the title is out, the expected outcome under contention
+    expected = {200, 201, 400}
+    hot_books = 20
+
+    async def setup(self, session, rng):
+        self.book_ids = (await session.scalars(
+            select(Book.id).order_by(Book.available_copies.desc(), Book.id).limit(self.hot_books)
+        )).all()
+        # the least active members, so few of them already hold one of these titles
+        self.member_ids = (await session.scalars(select(Member.id).order_by(Member.id.desc()).limit(200))).all()
+
+    def new_client_state(self, rng):
+        return {"member_id": rng.choice(self.member_ids), "loan": None}
+
+    async def step(self, client, state, rng):
+        if state["loan"] is None:
+            book_id = rng.choice(self.book_ids)
+            response = await client.post(f"{API}/borrow/", json={
+                "member_id": state["member_id"], "book_id": book_id, "due_date": (date.today() + timedelta(days=14)).isoformat(),
+            })
+            if response.status_code == 201:
+                state["loan"] = book_id
+        else:
+            response = await client.patch(f"{API}/borrow/", json={"member_id": state["member_id"], "book_id": state["loan"]})
+            if response.status_code == 200:
+                state["loan"] = None
+        return response
+
+
+class DeleteGuard(Scenario):
+    name = "delete_guard"
+    expected = {400}
+
+    async def setup(self, session, rng):
+        open_loans = select(BorrowTransaction).where(BorrowTransaction.returned_date.is_(None))
+        self.member_ids = (await session.scalars(open_loans.with_only_columns(BorrowTransaction.member_id).distinct().limit(1000))).all()
+        self.book_ids = (await session.scalars(open_loans.with_only_columns(BorrowTransaction.book_id).distinct().limit(1000))).all()
+
+    async def step(self, client, state, rng):
+        if rng.random() < 0.5:
+            return await client.delete(f"{API}/members/{rng.choice(self.member_ids)}")
+        return await client.delete(f"{API}/books/{rng.choice(self.book_ids)}")
+
+
+SCENARIOS = {scenario.name: scenario for scenario in (Search, Paging, BorrowReturn, DeleteGuard)}
+
+
+def percentile(samples: list[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def summarize(latencies: list[float], statuses: dict[int, int], errors: int, elapsed: float, concurrency: int) -> dict:
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "errors": errors,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies), 3),
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(max(latencies), 3),
+        },
+    }
+
+
+async def run_scenario(scenario: Scenario, client: httpx.AsyncClient, requests: int, concurrency: int, seed: int) -> dict:
+    """Send ``requests`` requests from ``concurrency`` concurrent clients."""
+    latencies, statuses = [], {}
+    errors = 0
+    remaining = requests
+
+    async def worker(n: int):
+        nonlocal remaining, errors
+        rng = random.Random(seed * 1000 + n)
+        state = scenario.new_client_state(rng)
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            response = await scenario.step(client, state, rng)
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code not in scenario.expected:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    return summarize(latencies, statuses, errors, time.perf_counter() - start, concurrency)
+
+
+async def ensure_dataset(session_factory, dataset: Dataset, url: str) -> None:
+    async with session_factory() as session:
+        counts = [await session.scalar(select(func.count()).select_from(m)) for m in (Book, Member, BorrowTransaction)]
+        if counts == [dataset.books, dataset.members, dataset.borrows]:
+            return
+        print(f"generating {dataset.books} books, {dataset.members} members, {dataset.borrows} borrows in {url}")
+        await generate(session, dataset, reset=True)
+
+
+def git_commit() -> tuple[str, bool]:
+    def git(*args):
+        return subprocess.run(["git", *args], capture_output=True, text=True, cwd=Path(__file__).parent).stdout.strip()
+    return git("rev-parse", "--short", "HEAD") or "unknown", bool(git("status", "--porcelain", "--untracked-files=no"))
+
+
+async def run(args, dataset: Dataset) -> dict:
+    connect_args = {"timeout": 60} if args.url.startswith("sqlite") else {}
+    engine = create_async_engine(args.url, pool_size=args.concurrency, max_overflow=0, connect_args=connect_args)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+        await ensure_dataset(session_factory, dataset, args.url)
+
+        async def override_get_db():
+            async with session_factory() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_read_db] = override_get_db
+        results = {}
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+                for name in args.scenarios:
+                    scenario = SCENARIOS[name]()
+                    async with session_factory() as session:
+                        await scenario.setup(session, random.Random(args.seed))
+                    count_cache.clear()
+                    entity_cache.clear()
+                    await run_scenario(scenario, client, max(args.requests // 10, 1), args.concurrency, args.seed)  # warm up
+                    results[name] = await run_scenario(scenario, client, args.requests, args.concurrency, args.seed)
+                    stats = results[name]
+                    print(f"{name:>14} {stats['throughput_rps']:>9.1f} {stats['latency_ms']['p50']:>8.2f} "
+                          f"{stats['latency_ms']['p95']:>8.2f} {stats['latency_ms']['p99']:>8.2f} {stats['errors']:>7}")
+        finally:
+            app.dependency_overrides.clear()
+    finally:
+        await engine.dispose()
+
+    commit, dirty = git_commit()
+    return {
+        "meta": {
+            "commit": commit,
+            "dirty": dirty,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "database": args.url.split(":", 1)[0],
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dataset": dataset.as_dict(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "scenarios": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite+aiosqlite:///./bench.db")
+    parser.add_argument("--scale", choices=SCALES, help="preset dataset size; overrides --books/--members/--borrows")
+    add_dataset_arguments(parser, books=SCALES["small"].books, members=SCALES["small"].members, borrows=SCALES["small"].borrows)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--output", type=Path, help="results file (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--log", action="store_true", help="keep the app's request logging on")
+    args = parser.parse_args()
+
+    dataset = dataset_from_args(args)
+    if args.scale:
+        preset = SCALES[args.scale]
+        dataset.books, dataset.members, dataset.borrows = preset.books, preset.members, preset.borrows
+    if not args.log:
+        logger.disable("app")
+        # stdlib loggers (httpx, asyncio, aiosqlite) are routed into loguru too
+        logging.disable(logging.INFO)
+
+    print(f"{'scenario':>14} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    report = asyncio.run(run(args, dataset))
+    output = args.output or RESULTS_DIR / f"{report['meta']['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""gunicorn settings for ``python -m app.server`` (or ``gunicorn -c gunicorn.conf.py app.main:app``).
+
+Everything is driven by the app settings (``.env`` / environment), see
+``app/core/settings.py``; gunicorn's own ``GUNICORN_CMD_ARGS`` still override.
+"""
+import os
+import shutil
+import tempfile
+
+from app.core.settings import settings
+from app.server import migrate, reset_after_fork, worker_count
+
+# metrics of all workers are aggregated through files in this directory; it has
+# to be set before prometheus_client is imported, i.e. before the app preloads
+if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    # a previous run's files would be summed into the new metrics
+    shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+else:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="nbl-metrics-")
+
+bind = f"{settings.HOST}:{settings.PORT}"
+worker_class = "app.server.Worker"
+# async workers each serve many connections; more processes than CPUs only adds DB pools
+workers = worker_count()
+preload_app = True
+max_requests = settings.WORKER_MAX_REQUESTS
+max_requests_jitter = settings.WORKER_MAX_REQUESTS_JITTER
+timeout = settings.WORKER_TIMEOUT_SECONDS
+graceful_timeout = settings.GRACEFUL_TIMEOUT_SECONDS
+keepalive = 5
+# the app does its own request logging (LoggingMiddleware)
+accesslog = None
+errorlog = "-"
+loglevel = settings.log_level.lower()
+
+
+def on_starting(server):
+    # once, in the master, before any worker serves a request
+    if settings.MIGRATE_ON_START:
+        migrate()
+
+
+def post_fork(server, worker):
+    reset_after_fork()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
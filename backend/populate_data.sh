@@ -7,27 +7,18 @@ echo "Populating 20 books..."
 for i in {1..20}
 do
   ISBN="978-$(printf "%010d" $i)"
-  curl -s -X POST "$BASE_URL/books/" \
-    -H "Content-Type: application/json" \
-    -d "{
-      \"title\": \"Automated Book Volume $i\",
-      \"author\": \"Bot Author\",
-      \"isbn\": \"$ISBN\",
-      \"total_copies\": 50,
-      \"available_copies\": 50
-    }" > /dev/null
-done
+  echo "{\"title\": \"Automated Book Volume $i\", \"author\": \"Bot Author\", \"isbn\": \"$ISBN\", \"total_copies\": 50, \"available_copies\": 50}"
+done | curl -s -X POST "$BASE_URL/books/import" \
+  -H "Content-Type: application/x-ndjson" \
+  --data-binary @- > /dev/null
 
 echo "Populating 20 members..."
 for i in {1..20}
 do
-  curl -s -X POST "$BASE_URL/members/" \
-    -H "Content-Type: application/json" \
-    -d "{
-      \"name\": \"Library User $i\",
-      \"email\": \"user$i@automated-test.com\"
-    }" > /dev/null
-done
+  echo "{\"name\": \"Library User $i\", \"email\": \"user$i@automated-test.com\"}"
+done | curl -s -X POST "$BASE_URL/members/import" \
+  -H "Content-Type: application/x-ndjson" \
+  --data-binary @- > /dev/null
 
 echo "Creating 100 borrow records..."
 for i in {1..100}
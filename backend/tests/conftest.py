@@ -1,3 +1,15 @@
+import os
+
+# no background jobs against the real database while testing
+os.environ.setdefault("OVERDUE_SCAN_INTERVAL_SECONDS", "0")
+os.environ.setdefault("RECOMMENDER_INTERVAL_SECONDS", "0")
+os.environ.setdefault("EVENTS_RELAY_ENABLED", "0")
+os.environ.setdefault("EVENTS_LOANS_SECONDS", "0")
+# follow-up jobs run inline, so their effects are visible when a request returns
+os.environ.setdefault("JOB_WORKERS", "0")
+# tests write through crud directly, so lookups must not be served stale;
+# cache tests enable it explicitly with the ``entity_cache_enabled`` fixture
+os.environ.setdefault("ENTITY_CACHE_ENABLED", "0")
 
 import pytest
 import pytest_asyncio
@@ -5,12 +17,20 @@ from fastapi.testclient import TestClient
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from app.main import app
 from app.db.base import Base
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
+from app.db.instrumentation import instrument_engine
 
 # Import models to ensure they are registered with Base.metadata
 from app.models.book import Book
 from app.models.member import Member
 from app.models.borrow import BorrowTransaction
+from app.models.overdue import OverdueSnapshot
+from app.models.stats import BookStats, MemberStats, CirculationCounted
+from app.models.recommendation import BookCooccurrence, RecommenderState
+from app.models.analytics import CirculationDaily
+from app.models.inventory import BookCopy
+from app.models.jobs import PendingJob
+from app.models.notices import LoanNotice
 
 # Use in-memory SQLite for testing
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -22,6 +42,7 @@ async def engine():
         connect_args={"check_same_thread": False},
         echo=False,
     )
+    instrument_engine(engine)
     # Create tables
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -45,9 +66,28 @@ async def client(async_session: AsyncSession):
         yield async_session
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     
     # Use TestClient (synchronous)
     with TestClient(app) as c:
         yield c
     
     app.dependency_overrides.clear()
+
+@pytest.fixture(autouse=True)
+def clear_count_cache():
+    # every test gets a fresh database, so cached totals must not leak between them
+    from app.core.count_cache import count_cache
+    count_cache.clear()
+    yield
+    count_cache.clear()
+
+
+@pytest.fixture
+def entity_cache_enabled():
+    from app.core.entity_cache import entity_cache
+    entity_cache.clear()
+    entity_cache.enabled, entity_cache.hits, entity_cache.misses = True, 0, 0
+    yield entity_cache
+    entity_cache.clear()
+    entity_cache.enabled = False
@@ -25,3 +25,54 @@ async def test_books_crud_search(async_session):
     items, total = await books_crud.get_books(async_session, q="Python")
     assert len(items) == 1
     assert items[0].title == "Python Info"
+
+@pytest.mark.asyncio
+async def test_books_crud_search_index(async_session):
+    await books_crud.create(async_session, BookCreateRequest(title="Learning Python", author="Lutz", isbn="S1", total_copies=1))
+    await books_crud.create(async_session, BookCreateRequest(title="Fluent Code", author="Pythonista Press", isbn="S2", total_copies=1))
+    await books_crud.create(async_session, BookCreateRequest(title="Java Info", author="A", isbn="S3", total_copies=1))
+
+    # case-insensitive substring match on title or author, served by the FTS index
+    items, total = await books_crud.get_books(async_session, q="pYtHoN")
+    assert total == 2
+    assert {b.isbn for b in items} == {"S1", "S2"}
+
+    # index follows title/author updates and deletes
+    java = await books_crud.get_by_isbn(async_session, "S3")
+    java.title = "Python for Java Developers"
+    await books_crud.update(async_session, java)
+    _, total = await books_crud.get_books(async_session, q="python")
+    assert total == 3
+    await books_crud.delete_by_id(async_session, java.id)
+    _, total = await books_crud.get_books(async_session, q="python")
+    assert total == 2
+
+    # queries shorter than a trigram fall back to a substring scan
+    items, total = await books_crud.get_books(async_session, q="lu")
+    assert total == 2
+    assert [b.isbn for b in items] == ["S2", "S1"]
+
+    # quotes in the query are not FTS syntax
+    _, total = await books_crud.get_books(async_session, q='"Py')
+    assert total == 0
+
+
+@pytest.mark.asyncio
+async def test_planner_estimate_binds_the_search_text():
+    from sqlalchemy import select
+    from app.crud.counts import _planner_estimate
+    from app.models.book import Book
+
+    class PlannerSession:
+        async def execute(self, statement):
+            self.statement = statement
+            return self
+
+        def scalar(self):
+            return '[{"Plan": {"Plan Rows": 42}}]'
+
+    db, q = PlannerSession(), "%'; DROP TABLE books; --"
+    assert await _planner_estimate(db, select(Book).where(Book.title.ilike(q))) == 42
+    # the search text travels as a parameter, never inside the SQL
+    assert q not in str(db.statement)
+    assert q in db.statement.compile().params.values()
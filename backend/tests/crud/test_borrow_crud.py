@@ -1,6 +1,7 @@
 
 import pytest
 from datetime import date, timedelta
+from sqlalchemy import text
 from app.crud import books_crud, members_crud, borrow_crud
 from app.models.borrow import BorrowTransaction
 from app.schemas.books import BookCreateRequest
@@ -82,3 +83,88 @@ async def test_borrow_crud_complex_queries(async_session):
     assert await borrow_crud.get_by_id(async_session, br1.id) is None
     
     assert await borrow_crud.delete_by_id(async_session, 999) is None
+
+
+@pytest.mark.asyncio
+async def test_borrow_queries_use_indexes(async_session, engine):
+    """Every borrow_transactions access in the crud layer is served by an index, not a table scan."""
+    from sqlalchemy import event, insert
+    from app.models.book import Book
+    from app.models.member import Member
+
+    await async_session.execute(insert(Book), [
+        {"title": f"Book {i}", "author": "A", "isbn": f"IDX{i}", "total_copies": 5, "available_copies": 5} for i in range(50)
+    ])
+    await async_session.execute(insert(Member), [{"name": f"Member {i}", "email": f"idx{i}@t.com"} for i in range(200)])
+    start = date(2024, 1, 1)
+    await async_session.execute(insert(BorrowTransaction), [
+        {
+            "member_id": i % 200 + 1,
+            "book_id": i % 50 + 1,
+            "borrowed_date": start + timedelta(days=i % 365),
+            "due_date": start + timedelta(days=i % 365 + 14),
+            "returned_date": None if i % 10 == 0 else start + timedelta(days=i % 365 + 7),
+        }
+        for i in range(5000)
+    ])
+    await async_session.commit()
+    await async_session.execute(text("ANALYZE"))
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "borrow_transactions" in statement and not statement.startswith("EXPLAIN"):
+            statements.append((statement, parameters))
+
+    queries = [
+        lambda: borrow_crud.get_active_borrow(async_session, 7, 7),
+        lambda: borrow_crud.get_borrows_by_member(async_session, 7, Status.borrowed),
+        lambda: borrow_crud.get_borrows_by_member(async_session, 7, Status.all),
+        lambda: borrow_crud.get_borrows_by_book(async_session, 7, Status.borrowed),
+        lambda: borrow_crud.get_borrows_by_book(async_session, 7, Status.returned),
+        lambda: borrow_crud.get_active_borrows(async_session, include="book", sort_by="borrowed_date", include_total=False),
+        lambda: borrow_crud.get_active_borrows(async_session, include="book", sort_by="due_date", order="asc", include_total=False),
+        lambda: borrow_crud.get_all_borrows(async_session, Status.all, include="book", sort_by="borrowed_date", include_total=False),
+        lambda: borrow_crud.lock_open_borrows(async_session, 7, [7, 8]),
+    ]
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        for query in queries:
+            await query()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    assert statements
+    conn = await async_session.connection()
+    for statement, parameters in statements:
+        plan = (await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)).all()
+        steps = [row[-1] for row in plan if "borrow_transactions" in row[-1]]
+        assert steps and all("USING" in step for step in steps), f"unindexed access:\n{statement}\n{steps}"
+
+
+@pytest.mark.asyncio
+async def test_borrow_listing_is_one_query(async_session):
+    """Listings fetch borrows with their book and member in a single joined SELECT."""
+    from app.db.instrumentation import collect_queries
+    from app.schemas.borrow import ActiveBorrowWithAll, ActiveBorrowWithMember
+
+    book = await books_crud.create(async_session, BookCreateRequest(title="Gamma", author="G", isbn="G1", total_copies=5))
+    for i in range(3):
+        member = await members_crud.create(async_session, MemberCreate(name=f"M{i}", email=f"m{i}@t.com"))
+        await borrow_crud.create(async_session, BorrowTransaction(member_id=member.id, book_id=book.id, borrowed_date=date.today(), due_date=date.today()))
+
+    with collect_queries() as stats:
+        items, total = await borrow_crud.get_all_borrows(async_session, Status.all, include="all", include_total=False)
+    assert stats.count == 1
+    assert total is None
+    assert len(items) == 3
+    assert all(isinstance(item, ActiveBorrowWithAll) and item.book.title == "Gamma" for item in items)
+
+    # sorting by book joins it for ordering only; its title still builds the cursor
+    items, _ = await borrow_crud.get_all_borrows(async_session, Status.all, include="member", sort_by="book", include_total=False)
+    assert isinstance(items[0], ActiveBorrowWithMember)
+    assert "book" not in items[0].model_dump()
+    assert borrow_crud.borrow_sort_key(items[0], "book") == "Gamma"
+
+    items, _ = await borrow_crud.get_all_borrows(async_session, Status.all, include="member", include_total=False)
+    assert isinstance(items[0], ActiveBorrowWithMember)
@@ -129,3 +129,37 @@ class TestBooks:
         res = client.delete(f"{settings.API_STR}/v1/books/{book['id']}")
         assert res.status_code == 400
 
+    @pytest.mark.asyncio
+    async def test_books_cursor_pagination(self, client: TestClient):
+        for i in range(5):
+            client.post(f"{settings.API_STR}/v1/books/", json={"title": f"Cursor {i}", "author": "A", "isbn": f"CUR{i}", "total_copies": 1})
+
+        for query in ("", "&q=Cursor"):
+            expected = [b["id"] for b in client.get(f"{settings.API_STR}/v1/books/?size=100{query}").json()["items"]]
+            seen, cursor = [], None
+            while True:
+                url = f"{settings.API_STR}/v1/books/?size=2{query}" + (f"&cursor={cursor}" if cursor else "")
+                body = client.get(url).json()
+                seen.extend(b["id"] for b in body["items"])
+                cursor = body["next_cursor"]
+                if cursor is None:
+                    break
+            assert seen == expected
+            assert len(seen) == 5
+
+    @pytest.mark.asyncio
+    async def test_import_books_csv(self, client: TestClient):
+        body = "title,author,isbn,total_copies,available_copies\nImported One,A,IMP1,2,2\nImported Two,B,IMP2,1,1\n"
+        res = client.post(f"{settings.API_STR}/v1/books/import", content=body, headers={"Content-Type": "text/csv"})
+        assert res.status_code == 200
+        assert res.json()["imported"] == 2
+
+        res = client.get(f"{settings.API_STR}/v1/books/?q=Imported")
+        assert res.json()["total"] == 2
+
+
+
+def test_book_recommendations(client):
+    book = client.post("/api/v1/books/", json={"title": "Lonely", "author": "A", "isbn": "REC-E1", "total_copies": 1, "available_copies": 1}).json()
+    assert client.get(f"/api/v1/books/{book['id']}/recommendations").json() == []
+    assert client.get("/api/v1/books/9999/recommendations").status_code == 404
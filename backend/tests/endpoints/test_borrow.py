@@ -218,3 +218,191 @@ class TestBorrow:
         response = client.post(f"{settings.API_STR}/v1/borrow/", json=borrow_data)
         assert response.status_code == 400
         assert "no copies available" in response.text.lower()
+
+    @pytest.mark.asyncio
+    async def test_borrow_cursor_pagination(self, client: TestClient):
+        books = [client.post(f"{settings.API_STR}/v1/books/", json={"title": t, "author": "A", "isbn": f"C{t}", "total_copies": 5, "available_copies": 5}).json() for t in ("Cee", "Ay", "Bee")]
+        members = [client.post(f"{settings.API_STR}/v1/members/", json={"name": n, "email": f"{n}@c.com"}).json() for n in ("Zed", "Yan")]
+        for i in range(6):
+            client.post(f"{settings.API_STR}/v1/borrow/", json={
+                "book_id": books[i % 3]['id'],
+                "member_id": members[i % 2]['id'],
+                "borrowed_date": str(date(2024, 1, 1) + timedelta(days=i % 4)),
+                "due_date": str(date(2024, 2, 1) - timedelta(days=i % 3))
+            })
+        # return one so the active listing differs from the full one
+        client.patch(f"{settings.API_STR}/v1/borrow/", json={"book_id": books[0]['id'], "member_id": members[0]['id']})
+
+        for path in ("/v1/borrow/", "/v1/borrow/active"):
+            for sort_by in ("book", "member", "borrowed_date", "due_date"):
+                for order in ("asc", "desc"):
+                    params = f"sort_by={sort_by}&order={order}"
+                    everything = client.get(f"{settings.API_STR}{path}?{params}&size=100").json()
+                    expected = [item["id"] for item in everything["items"]]
+
+                    seen, cursor = [], None
+                    while True:
+                        url = f"{settings.API_STR}{path}?{params}&size=3" + (f"&cursor={cursor}" if cursor else "")
+                        res = client.get(url)
+                        assert res.status_code == 200
+                        body = res.json()
+                        seen.extend(item["id"] for item in body["items"])
+                        cursor = body["next_cursor"]
+                        if cursor is None:
+                            break
+                        assert body["page"] is None or body["page"] == 1
+                    assert seen == expected
+                    assert everything["next_cursor"] is None
+
+        # old page/size clients keep working and see the same ordering
+        page2 = client.get(f"{settings.API_STR}/v1/borrow/?sort_by=book&order=asc&page=2&size=3").json()
+        first = client.get(f"{settings.API_STR}/v1/borrow/?sort_by=book&order=asc&size=3").json()
+        after = client.get(f"{settings.API_STR}/v1/borrow/?sort_by=book&order=asc&size=3&cursor={first['next_cursor']}").json()
+        assert page2["page"] == 2
+        assert [i["id"] for i in page2["items"]] == [i["id"] for i in after["items"]]
+
+        # a relation joined only for sorting is left out of the items, and cursors still page through
+        members_only = client.get(f"{settings.API_STR}/v1/borrow/?include=member&sort_by=book&order=asc&size=3").json()
+        assert all("book" not in item and "member" in item for item in members_only["items"])
+        members_after = client.get(f"{settings.API_STR}/v1/borrow/?include=member&sort_by=book&order=asc&size=3&cursor={members_only['next_cursor']}").json()
+        assert [i["id"] for i in members_after["items"]] == [i["id"] for i in after["items"]]
+
+        # cursors are bound to the sort they were issued for
+        res = client.get(f"{settings.API_STR}/v1/borrow/?sort_by=due_date&order=asc&cursor={first['next_cursor']}")
+        assert res.status_code == 400
+        res = client.get(f"{settings.API_STR}/v1/borrow/?cursor=not-a-cursor")
+        assert res.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_borrow_list_total_follows_borrow_and_return(self, client: TestClient):
+        b = client.post(f"{settings.API_STR}/v1/books/", json={"title": "Tot", "author": "T", "isbn": "TOT", "total_copies": 2, "available_copies": 2}).json()
+        m = client.post(f"{settings.API_STR}/v1/members/", json={"name": "Tot", "email": "tot@t.com"}).json()
+
+        assert client.get(f"{settings.API_STR}/v1/borrow/active").json()["total"] == 0
+        client.post(f"{settings.API_STR}/v1/borrow/", json={
+            "book_id": b['id'],
+            "member_id": m['id'],
+            "borrowed_date": str(date.today()),
+            "due_date": str(date.today())
+        })
+        assert client.get(f"{settings.API_STR}/v1/borrow/active").json()["total"] == 1
+        client.patch(f"{settings.API_STR}/v1/borrow/", json={"book_id": b['id'], "member_id": m['id']})
+        assert client.get(f"{settings.API_STR}/v1/borrow/active").json()["total"] == 0
+        assert client.get(f"{settings.API_STR}/v1/borrow/?status=returned").json()["total"] == 1
+
+        body = client.get(f"{settings.API_STR}/v1/borrow/?include_total=false").json()
+        assert body["total"] is None
+        assert body["pages"] is None
+        assert len(body["items"]) == 1
+
+    @pytest.mark.asyncio
+    async def test_export_borrow_history(self, client: TestClient):
+        import csv
+        import io
+        import json
+
+        b = client.post(f"{settings.API_STR}/v1/books/", json={"title": "Export, Vol 1", "author": "E", "isbn": "EXP", "total_copies": 3, "available_copies": 3}).json()
+        m = client.post(f"{settings.API_STR}/v1/members/", json={"name": "Exporter", "email": "exp@e.com"}).json()
+        for day in (1, 5, 9):
+            client.post(f"{settings.API_STR}/v1/borrow/", json={
+                "book_id": b['id'],
+                "member_id": m['id'],
+                "borrowed_date": f"2024-03-0{day}",
+                "due_date": "2024-04-01"
+            })
+            if day != 9:
+                client.patch(f"{settings.API_STR}/v1/borrow/", json={"book_id": b['id'], "member_id": m['id'], "returned_date": "2024-03-20"})
+
+        res = client.get(f"{settings.API_STR}/v1/borrow/export")
+        assert res.status_code == 200
+        assert res.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(res.text)))
+        assert [r["borrowed_date"] for r in rows] == ["2024-03-01", "2024-03-05", "2024-03-09"]
+        assert rows[0]["book_title"] == "Export, Vol 1"
+        assert rows[0]["member_email"] == "exp@e.com"
+        assert rows[2]["returned_date"] == ""
+
+        res = client.get(f"{settings.API_STR}/v1/borrow/export?format=ndjson&status=returned&borrowed_from=2024-03-02")
+        assert res.status_code == 200
+        lines = [json.loads(line) for line in res.text.splitlines()]
+        assert len(lines) == 1
+        assert lines[0]["borrowed_date"] == "2024-03-05"
+        assert lines[0]["returned_date"] == "2024-03-20"
+        assert lines[0]["member_name"] == "Exporter"
+
+
+    @pytest.mark.asyncio
+    async def test_batch_borrow_and_return(self, client: TestClient):
+        books = [
+            client.post(f"{settings.API_STR}/v1/books/", json={"title": f"Cart {i}", "author": "C", "isbn": f"CART{i}", "total_copies": 1, "available_copies": copies}).json()
+            for i, copies in enumerate([1, 1, 0])
+        ]
+        m = client.post(f"{settings.API_STR}/v1/members/", json={"name": "Carter", "email": "cart@c.com"}).json()
+        book_ids = [b['id'] for b in books] + [999]
+
+        res = client.post(f"{settings.API_STR}/v1/borrow/batch", json={"member_id": m['id'], "book_ids": book_ids, "due_date": "2099-01-01"})
+        assert res.status_code == 200
+        body = res.json()
+        assert (body["succeeded"], body["failed"]) == (2, 2)
+        assert [item["book_id"] for item in body["items"]] == book_ids
+        assert [item["success"] for item in body["items"]] == [True, True, False, False]
+        assert body["items"][0]["borrow"]["member_id"] == m['id']
+        assert body["items"][2]["error"] == "No copies available"
+        assert body["items"][3]["error"] == "Book does not exist"
+        def copies():
+            items = client.get(f"{settings.API_STR}/v1/books/?q=Cart").json()["items"]
+            return {b['id']: b['available_copies'] for b in items}
+
+        assert copies() == {books[0]['id']: 0, books[1]['id']: 0, books[2]['id']: 0}
+        assert client.get(f"{settings.API_STR}/v1/borrow/active").json()["total"] == 2
+
+        res = client.patch(f"{settings.API_STR}/v1/borrow/batch", json={"member_id": m['id'], "book_ids": book_ids[:3]})
+        body = res.json()
+        assert (body["succeeded"], body["failed"]) == (2, 1)
+        assert body["items"][0]["borrow"]["returned_date"] is not None
+        assert body["items"][2]["error"] == "No active borrow record found for this member and book"
+        assert copies() == {books[0]['id']: 1, books[1]['id']: 1, books[2]['id']: 0}
+        assert client.get(f"{settings.API_STR}/v1/borrow/active").json()["total"] == 0
+
+        # the member is validated once for the whole cart
+        res = client.post(f"{settings.API_STR}/v1/borrow/batch", json={"member_id": 999, "book_ids": book_ids, "due_date": "2099-01-01"})
+        assert res.status_code == 404
+        res = client.post(f"{settings.API_STR}/v1/borrow/batch", json={"member_id": m['id'], "book_ids": [1, 1], "due_date": "2099-01-01"})
+        assert res.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_overdue_endpoint(self, client: TestClient):
+        b = client.post(f"{settings.API_STR}/v1/books/", json={"title": "Overdue", "author": "O", "isbn": "OVD", "total_copies": 1, "available_copies": 1}).json()
+        m = client.post(f"{settings.API_STR}/v1/members/", json={"name": "Late", "email": "late@o.com"}).json()
+        client.post(f"{settings.API_STR}/v1/borrow/", json={"book_id": b['id'], "member_id": m['id'], "borrowed_date": "2024-01-01", "due_date": "2024-01-08"})
+
+        body = client.get(f"{settings.API_STR}/v1/borrow/overdue?as_of=2024-01-10").json()
+        assert body["source"] == "live"
+        assert body["total_loans"] == 1
+        assert body["members"][0]["member_id"] == m['id']
+        assert body["members"][0]["loans"][0]["days_overdue"] == 2
+
+        assert client.get(f"{settings.API_STR}/v1/borrow/overdue?as_of=2024-01-08").json()["total_loans"] == 0
+        assert client.get(f"{settings.API_STR}/v1/borrow/overdue?source=snapshot").json()["source"] == "snapshot"
+
+
+def test_circulation_stats_endpoints(client):
+    book = client.post("/api/v1/books/", json={"title": "Stat Book", "author": "A", "isbn": "STAT-1", "total_copies": 2, "available_copies": 2}).json()
+    member = client.post("/api/v1/members/", json={"name": "Stat Member", "email": "stat@test.com"}).json()
+    client.post("/api/v1/borrow/", json={"member_id": member["id"], "book_id": book["id"], "due_date": "2030-01-01"})
+
+    popular = client.get("/api/v1/stats/books/popular?limit=5").json()
+    assert [(b["book_id"], b["borrow_count"]) for b in popular] == [(book["id"], 1)]
+    assert client.get("/api/v1/stats/members/active").json()[0]["name"] == "Stat Member"
+    assert client.get(f"/api/v1/stats/books/{book['id']}").json()["borrow_count"] == 1
+    assert client.get("/api/v1/stats/books/9999").status_code == 404
+
+    assert client.post("/api/v1/stats/rebuild").json() == {"books": 1, "members": 1}
+
+
+def test_circulation_analytics_endpoint(client):
+    response = client.get("/api/v1/analytics/circulation?start=2024-01-01&end=2024-03-31&granularity=month")
+    assert response.status_code == 200
+    assert [p["period_start"] for p in response.json()["points"]] == ["2024-01-01", "2024-02-01", "2024-03-01"]
+    assert client.get("/api/v1/analytics/circulation?start=2024-02-01&end=2024-01-01").status_code == 400
+    assert client.post("/api/v1/analytics/rebuild").json() == {"days": 0}
@@ -0,0 +1,191 @@
+import asyncio
+import pytest
+from datetime import date, timedelta
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from app.core.events import DROPPED, RESET, EventBroker, event_broker
+from app.core.settings import settings
+from app.main import app
+
+
+def _drain(subscription) -> list[bytes]:
+    frames = []
+    while not subscription.queue.empty():
+        frames.append(subscription.queue.get_nowait())
+    return frames
+
+
+def test_broker_filters_drops_slow_consumers_and_resumes():
+    broker = EventBroker(queue_size=2, history=3, max_subscribers=2, heartbeat_seconds=15)
+    everything = broker.subscribe()
+    book_1 = broker.subscribe(book_ids=[1], kinds=["borrow"])
+    assert broker.full
+
+    broker.publish("borrow", {"book_id": 1})
+    broker.publish("availability", {"book_id": 1, "available_copies": 0})
+    assert len(_drain(everything)) == 2
+    first = _drain(book_1)
+    assert first == [f"id: {broker.epoch}-1\nevent: borrow\ndata: {{\"book_id\":1}}\n\n".encode()]
+
+    # neither reads any more: the third event overflows both queues
+    for _ in range(3):
+        broker.publish("borrow", {"book_id": 1})
+    assert _drain(book_1) == _drain(everything) == [None]
+    assert len(broker) == 0
+
+    # resume after event 3: events 4 and 5 are still kept
+    resumed = broker.subscribe(last_event_id=f"{broker.epoch}-3")
+    assert [frame.split(b"\n")[0] for frame in _drain(resumed)] == [f"id: {broker.epoch}-{n}".encode() for n in (4, 5)]
+    # too old, or from another process: start over
+    assert _drain(broker.subscribe(last_event_id=f"{broker.epoch}-1")) == [RESET]
+    assert _drain(broker.subscribe(last_event_id="0-3")) == [RESET]
+
+
+@pytest.mark.asyncio
+async def test_broker_stream_heartbeats_and_ends_when_dropped():
+    broker = EventBroker(queue_size=1, history=10, max_subscribers=10, heartbeat_seconds=0.01)
+    frames = broker.stream()
+    assert await anext(frames) == b": keep-alive\n\n"
+    assert len(broker) == 1
+    broker.publish("borrow", {"book_id": 1})
+    broker.publish("borrow", {"book_id": 2})
+    assert await anext(frames) == DROPPED
+    with pytest.raises(StopAsyncIteration):
+        await anext(frames)
+    assert len(broker) == 0
+
+
+def test_borrow_and_return_publish_events(client: TestClient):
+    book_id = client.post(
+        f"{settings.API_STR}/v1/books/",
+        json={"title": "Live", "author": "A", "isbn": "EV1", "total_copies": 2, "available_copies": 2},
+    ).json()["id"]
+    member_id = client.post(f"{settings.API_STR}/v1/members/", json={"name": "Eve", "email": "eve@ev.com"}).json()["id"]
+    subscription = event_broker.subscribe(book_ids=[book_id])
+    try:
+        client.post(f"{settings.API_STR}/v1/borrow/", json={
+            "member_id": member_id, "book_id": book_id,
+            "borrowed_date": str(date.today()), "due_date": str(date.today() + timedelta(days=7)),
+        })
+        client.patch(f"{settings.API_STR}/v1/borrow/", json={"member_id": member_id, "book_id": book_id})
+        events = [frame.split(b"\n")[1:3] for frame in _drain(subscription)]
+    finally:
+        event_broker.unsubscribe(subscription)
+    assert events == [
+        [b"event: availability", b'data: {"book_id":%d,"available_copies":1}' % book_id],
+        [b"event: borrow", events[1][1]],
+        [b"event: availability", b'data: {"book_id":%d,"available_copies":2}' % book_id],
+        [b"event: return", events[3][1]],
+    ]
+    assert b'"returned_date":"%s"' % str(date.today()).encode() in events[3][1]
+
+
+@pytest.mark.asyncio
+async def test_event_stream_endpoint():
+    messages, disconnect = asyncio.Queue(), asyncio.Event()
+
+    async def receive():
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        await messages.put(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": f"{settings.API_STR}/v1/events/", "raw_path": b"", "root_path": "",
+        "query_string": b"kind=return&book_id=7", "headers": [], "client": ("test", 1), "server": ("test", 80),
+    }
+    def streams_observed():
+        return REGISTRY.get_sample_value("nbl_http_request_duration_seconds_count", {
+            "method": "GET", "route": f"{settings.API_STR}/v1/events/", "status": "200",
+        }) or 0
+
+    observed = streams_observed()
+    request = asyncio.create_task(app(scope, receive, send))
+    start = await asyncio.wait_for(messages.get(), 5)
+    assert start["status"] == 200
+    assert (b"content-type", b"text/event-stream; charset=utf-8") in start["headers"]
+    # an open stream is not a request in flight
+    assert REGISTRY.get_sample_value("nbl_http_requests_in_flight") == 0
+
+    subscribers = len(event_broker)
+    event_broker.publish("borrow", {"book_id": 7})
+    event_broker.publish("return", {"book_id": 8})
+    event_broker.publish("return", {"book_id": 7})
+    body = await asyncio.wait_for(messages.get(), 5)
+    assert b"event: return" in body["body"] and b'"book_id":7' in body["body"]
+
+    disconnect.set()
+    await asyncio.wait_for(request, 5)
+    assert len(event_broker) == subscribers - 1
+    # nor is its lifetime a request latency
+    assert REGISTRY.get_sample_value("nbl_http_requests_in_flight") == 0
+    assert streams_observed() == observed
+
+
+@pytest.mark.asyncio
+async def test_broker_close_ends_streams_without_dropping():
+    broker = EventBroker(queue_size=4, history=10, max_subscribers=10, heartbeat_seconds=15)
+    frames = broker.stream()
+    waiting = asyncio.ensure_future(anext(frames))
+    await asyncio.sleep(0)
+    broker.publish("borrow", {"book_id": 1})
+    assert (await waiting).startswith(b"id: ")
+
+    broker.close()
+    with pytest.raises(StopAsyncIteration):
+        await anext(frames)
+    assert len(broker) == 0
+
+
+def test_relayed_events_are_delivered_by_every_process():
+    from app.db.event_relay import EventRelay
+
+    broker = EventBroker(queue_size=4, history=10, max_subscribers=10, heartbeat_seconds=15)
+    everything, book_1 = broker.subscribe(), broker.subscribe(book_ids=[1])
+    relay = EventRelay(broker, queue_size=1)
+    broker.relay = relay.send
+
+    # not connected: delivered locally
+    broker.publish("borrow", {"book_id": 1})
+    assert len(_drain(everything)) == len(_drain(book_1)) == 1
+
+    # connected: handed to the relay, delivered when the notification comes back
+    relay._outbox = asyncio.Queue(1)
+    broker.publish("borrow", {"book_id": 1, "borrowed_date": date(2024, 1, 2)})
+    assert _drain(everything) == []
+    payload = relay._outbox.get_nowait()
+    relay._received(None, 1, "nbl_events", payload)
+    [frame] = _drain(everything)
+    assert b'"borrowed_date":"2024-01-02"' in frame and len(_drain(book_1)) == 1
+
+    # a full outbox falls back to local delivery; book-less events skip book filters
+    relay._outbox.put_nowait("{}")
+    broker.publish("loans", {"active_borrows": 3})
+    assert _drain(everything)[0].endswith(b'event: loans\ndata: {"active_borrows":3}\n\n')
+    assert _drain(book_1) == []
+
+    # after a relay outage, subscribers are told to start over
+    broker.reset()
+    assert _drain(everything) == _drain(book_1) == [RESET]
+
+
+@pytest.mark.asyncio
+async def test_loan_count_is_announced(async_session):
+    from app.services import book_service, borrow_service, event_service, member_service
+    from app.schemas.books import BookCreateRequest
+    from app.schemas.members import MemberCreate
+
+    book = await book_service.create_book(async_session, BookCreateRequest(title="Count", author="A", isbn="EVC", total_copies=2, available_copies=2))
+    member = await member_service.create_member(async_session, MemberCreate(name="Cy", email="cy@ev.com"))
+    event_service._loans_changed = False
+    subscription = event_broker.subscribe(kinds=["loans"])
+    try:
+        await borrow_service.borrow_book(async_session, member.id, book.id, date.today(), date.today() + timedelta(days=7))
+        assert event_service._loans_changed
+        assert await event_service.announce_loans(async_session) == 1
+        [frame] = _drain(subscription)
+    finally:
+        event_broker.unsubscribe(subscription)
+    assert frame.endswith(b'event: loans\ndata: {"active_borrows":1}\n\n')
@@ -0,0 +1,39 @@
+import pytest
+from fastapi.testclient import TestClient
+from loguru import logger
+from app.core.settings import settings
+from app.crud import books_crud
+from app.db.instrumentation import collect_queries, statement_shape
+
+
+def test_statement_shape_collapses_placeholder_lists():
+    a = statement_shape("SELECT * FROM books\n WHERE id IN (?, ?, ?)")
+    b = statement_shape("SELECT * FROM books WHERE id IN (?)")
+    assert a == b == "SELECT * FROM books WHERE id IN (?)"
+    assert statement_shape("SELECT * FROM books WHERE id IN ($1, $2)") == "SELECT * FROM books WHERE id IN (?)"
+
+
+@pytest.mark.asyncio
+async def test_collect_queries_counts_and_flags_n_plus_one(async_session, monkeypatch):
+    monkeypatch.setattr(settings, "N_PLUS_ONE_THRESHOLD", 3)
+    warnings = []
+    sink = logger.add(lambda m: warnings.append(m.record["message"]), level="WARNING")
+    try:
+        with collect_queries() as stats:
+            for book_id in range(5):
+                await books_crud.get_by_id(async_session, book_id)
+    finally:
+        logger.remove(sink)
+
+    assert stats.count == 5
+    assert stats.total_ms > 0
+    assert len(stats.slowest) <= settings.QUERY_STATS_TOP_N
+    assert len([w for w in warnings if w.startswith("Possible N+1")]) == 1
+
+
+def test_server_timing_header(client: TestClient):
+    res = client.get(f"{settings.API_STR}/v1/books/")
+    assert res.status_code == 200
+    timing = res.headers["Server-Timing"]
+    assert timing.startswith("db;dur=")
+    assert '2 queries' in timing  # page + total
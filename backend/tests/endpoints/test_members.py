@@ -94,3 +94,38 @@ class TestMembers:
         assert len(items) == 1
         assert items[0]['book']['title'] == "H Book"
 
+    @pytest.mark.asyncio
+    async def test_members_cursor_pagination(self, client: TestClient):
+        ids = [client.post(f"{settings.API_STR}/v1/members/", json={"name": f"C{i}", "email": f"c{i}@c.com"}).json()["id"] for i in range(5)]
+
+        seen, cursor = [], None
+        while True:
+            url = f"{settings.API_STR}/v1/members/?size=2" + (f"&cursor={cursor}" if cursor else "")
+            body = client.get(url).json()
+            seen.extend(m["id"] for m in body["items"])
+            assert body["total"] == 5
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == ids
+
+    @pytest.mark.asyncio
+    async def test_import_members(self, client: TestClient):
+        client.post(f"{settings.API_STR}/v1/members/", json={"name": "Before", "email": "same@example.com"})
+        body = "\n".join([
+            '{"name": "After", "email": "same@example.com"}',
+            '{"name": "New", "email": "new@example.com"}',
+            '{"name": "", "email": "broken@example.com"}',
+            'not json',
+        ])
+        res = client.post(f"{settings.API_STR}/v1/members/import", content=body, headers={"Content-Type": "application/x-ndjson"})
+        assert res.status_code == 200
+        result = res.json()
+        assert result["processed"] == 4
+        assert result["imported"] == 2
+        assert [e["line"] for e in result["errors"]] == [3, 4]
+
+        members = client.get(f"{settings.API_STR}/v1/members/").json()
+        assert members["total"] == 2
+        assert {m["name"] for m in members["items"]} == {"After", "New"}
+
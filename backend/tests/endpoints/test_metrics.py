@@ -0,0 +1,37 @@
+from fastapi.testclient import TestClient
+from prometheus_client.parser import text_string_to_metric_families
+from app.core.settings import settings
+
+
+def _samples(client: TestClient) -> dict:
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    samples = {}
+    for family in text_string_to_metric_families(res.text):
+        for sample in family.samples:
+            samples[(sample.name, tuple(sorted(sample.labels.items())))] = sample.value
+    return samples
+
+
+def test_metrics_endpoint(client: TestClient):
+    before = _samples(client)
+    b = client.post(f"{settings.API_STR}/v1/books/", json={"title": "Metric", "author": "M", "isbn": "MET1", "total_copies": 1}).json()
+    m = client.post(f"{settings.API_STR}/v1/members/", json={"name": "Metric", "email": "met@m.com"}).json()
+    borrow = {"book_id": b['id'], "member_id": m['id'], "due_date": "2099-01-01"}
+    assert client.post(f"{settings.API_STR}/v1/borrow/", json=borrow).status_code == 201
+    assert client.post(f"{settings.API_STR}/v1/borrow/", json=borrow).status_code == 400
+    client.patch(f"{settings.API_STR}/v1/members/{m['id']}", json={"name": "Renamed"})
+    client.get(f"{settings.API_STR}/v1/nowhere/{m['id']}")
+    after = _samples(client)
+
+    def delta(name, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        return after.get(key, 0) - before.get(key, 0)
+
+    assert delta("nbl_borrows_total", outcome="success") == 1
+    assert delta("nbl_borrows_total", outcome="rejected") == 1
+    # routes are labelled by template, not by raw path
+    assert delta("nbl_http_request_duration_seconds_count", method="PATCH", route="/api/v1/members/{member_id}", status="200") == 1
+    assert delta("nbl_http_request_duration_seconds_count", method="GET", route="unmatched", status="404") == 1
+    assert not any(f"/members/{m['id']}" in dict(labels).get("route", "") for _, labels in after)
+    assert ("nbl_http_requests_in_flight", ()) in after
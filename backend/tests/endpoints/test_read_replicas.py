@@ -0,0 +1,74 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from app.main import app
+from app.core.settings import settings
+from app.db import session as db_session
+from app.db.base import Base
+from app.db.replicas import ReadRouter, LAST_WRITE_COOKIE, LAST_WRITE_HEADER
+
+
+@pytest.fixture
+def primary_and_replica(tmp_path, monkeypatch):
+    """Two SQLite files standing in for a primary and a (never caught up) replica."""
+    import asyncio
+
+    engines = [create_async_engine(f"sqlite+aiosqlite:///{tmp_path / name}") for name in ("primary.db", "replica.db")]
+
+    async def create_all():
+        for engine in engines:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_all())
+    primary, replica = (async_sessionmaker(e, expire_on_commit=False, class_=AsyncSession) for e in engines)
+
+    async def override_get_db():
+        async with primary() as session:
+            yield session
+
+    monkeypatch.setattr(db_session, "read_router", ReadRouter(primary, [replica], pin_seconds=30))
+    app.dependency_overrides[db_session.get_db] = override_get_db
+    yield
+    app.dependency_overrides.clear()
+
+    async def dispose():
+        for engine in engines:
+            await engine.dispose()
+
+    asyncio.run(dispose())
+
+
+def test_reads_go_to_replica_unless_client_just_wrote(primary_and_replica):
+    books_url = f"{settings.API_STR}/v1/books/"
+    with TestClient(app) as writer, TestClient(app) as other:
+        res = writer.post(books_url, json={"title": "Fresh", "author": "A", "isbn": "RYW1", "total_copies": 1})
+        assert res.status_code == 201
+        assert LAST_WRITE_COOKIE in res.cookies
+        stamp = res.headers[LAST_WRITE_HEADER]
+        # a replica read after the write caches the lagging total, for replica reads only
+        assert other.get(books_url).json()["total"] == 0
+
+        # the writer is pinned to the primary and sees its own write, total included
+        page = writer.get(books_url).json()
+        assert (len(page["items"]), page["total"]) == (1, 1)
+
+    with TestClient(app) as cookieless:
+        # clients that don't keep cookies pin by echoing the header
+        page = cookieless.get(books_url, headers={LAST_WRITE_HEADER: stamp}).json()
+        assert (len(page["items"]), page["total"]) == (1, 1)
+
+    with TestClient(app) as reader:
+        # a client that has not written reads the (lagging) replica
+        page = reader.get(books_url).json()
+        assert (len(page["items"]), page["total"]) == (0, 0)
+        # an expired or garbled marker does not pin
+        reader.cookies.set(LAST_WRITE_COOKIE, "0")
+        assert reader.get(books_url).json()["total"] == 0
+        reader.cookies.set(LAST_WRITE_COOKIE, "garbage")
+        assert reader.get(books_url).json()["total"] == 0
+
+        # failed writes do not pin either
+        res = reader.post(books_url, json={"title": "Dup", "author": "A", "isbn": "RYW1", "total_copies": 1})
+        assert res.status_code == 409
+        assert LAST_WRITE_COOKIE not in res.cookies
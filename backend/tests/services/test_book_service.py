@@ -39,3 +39,78 @@ async def test_book_service_full(async_session):
     with pytest.raises(HTTPException) as exc:
         await book_service.delete_book(async_session, 999)
     assert exc.value.status_code == 404
+
+@pytest.mark.asyncio
+async def test_book_service_cached_total(async_session):
+    from sqlalchemy import insert, delete
+    from app.crud import books_crud
+    from app.models.book import Book
+
+    await book_service.create_book(async_session, BookCreateRequest(title="Count 1", author="A", isbn="C1", total_copies=1))
+    _, total = await book_service.get_all_books(async_session)
+    assert total == 1
+
+    # writes through any session invalidate the cached total on commit
+    await books_crud.create(async_session, BookCreateRequest(title="Count 2", author="A", isbn="C2", total_copies=1))
+    _, total = await book_service.get_all_books(async_session)
+    assert total == 2
+
+    # the total is still cached: a write on the raw connection bypasses the session and goes unseen
+    conn = await async_session.connection()
+    await conn.execute(insert(Book).values(title="Count X", author="A", isbn="CX", total_copies=1, available_copies=1))
+    await async_session.commit()
+    _, total = await book_service.get_all_books(async_session)
+    assert total == 2
+    conn = await async_session.connection()
+    await conn.execute(delete(Book).where(Book.isbn == "CX"))
+    await async_session.commit()
+
+    b3 = await book_service.create_book(async_session, BookCreateRequest(title="Count 3", author="A", isbn="C3", total_copies=1))
+    _, total = await book_service.get_all_books(async_session)
+    assert total == 3
+
+    await book_service.delete_book(async_session, b3.id)
+    items, total = await book_service.get_all_books(async_session)
+    assert total == 2
+
+    items, total = await book_service.get_all_books(async_session, include_total=False)
+    assert total is None
+    assert len(items) == 2
+
+
+@pytest.mark.asyncio
+async def test_book_lookup_cache(async_session, entity_cache_enabled):
+    from app.services import member_service, borrow_service
+    from app.schemas.members import MemberCreate
+    from app.schemas.borrow import ReturnRequest
+    from datetime import date
+
+    b = await book_service.create_book(async_session, BookCreateRequest(title="Cached", author="A", isbn="CACHE1", total_copies=2, available_copies=2))
+    m = await member_service.create_member(async_session, MemberCreate(name="Cache", email="cache@t.com"))
+
+    assert (await book_service.get_book(async_session, b.id)).title == "Cached"
+    assert (await book_service.get_book(async_session, b.id)).title == "Cached"
+    assert (entity_cache_enabled.hits, entity_cache_enabled.misses) == (1, 1)
+    # missing rows are not cached
+    assert await book_service.get_book(async_session, 999) is None
+    assert await book_service.get_book(async_session, 999) is None
+    assert entity_cache_enabled.misses == 3
+
+    await book_service.update_book(async_session, b.id, BookUpdateRequest(title="Renamed"))
+    assert (await book_service.get_book(async_session, b.id)).title == "Renamed"
+
+    # borrowing and returning change available_copies, so they invalidate too
+    await borrow_service.borrow_book(async_session, m.id, b.id, date.today(), date.today())
+    assert (await book_service.get_book(async_session, b.id)).available_copies == 1
+    await borrow_service.return_book(async_session, ReturnRequest(member_id=m.id, book_id=b.id))
+    assert (await book_service.get_book(async_session, b.id)).available_copies == 2
+
+    # the borrow looked the member up once; later checks are hits
+    hits = entity_cache_enabled.hits
+    assert (await member_service.get_member(async_session, m.id)).email == "cache@t.com"
+    assert entity_cache_enabled.hits == hits + 1
+
+    b2 = await book_service.create_book(async_session, BookCreateRequest(title="Gone", author="A", isbn="CACHE2", total_copies=1))
+    assert await book_service.get_book(async_session, b2.id) is not None
+    await book_service.delete_book(async_session, b2.id)
+    assert await book_service.get_book(async_session, b2.id) is None
@@ -6,6 +6,8 @@ from app.schemas.books import BookCreateRequest
 from app.schemas.members import MemberCreate
 from app.schemas.borrow import ReturnRequest
 from fastapi import HTTPException
+from sqlalchemy import text
+from app.crud import books_crud, members_crud
 
 @pytest.mark.asyncio
 async def test_borrow_service_full(async_session):
@@ -55,3 +57,64 @@ async def test_borrow_service_full(async_session):
     with pytest.raises(HTTPException) as exc:
         await borrow_service.delete_borrow(async_session, 999)
     assert exc.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_concurrent_borrows_do_not_oversell(tmp_path):
+    import asyncio
+    from sqlalchemy import select, func
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+    from app.db.base import Base
+    from app.models.book import Book
+    from app.models.borrow import BorrowTransaction
+
+    # separate sessions need a shared database, so use a file instead of :memory:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'borrow.db'}", connect_args={"timeout": 30})
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    try:
+        async with Session() as session:
+            b = await book_service.create_book(session, BookCreateRequest(title="Hot", author="A", isbn="HOT1", total_copies=5, available_copies=5))
+            members = [await member_service.create_member(session, MemberCreate(name=f"M{i}", email=f"m{i}@t.com")) for i in range(20)]
+
+        async def attempt(member_id):
+            async with Session() as session:
+                try:
+                    await borrow_service.borrow_book(session, member_id, b.id, date.today(), date.today())
+                    return True
+                except borrow_service.BookNotAvailable:
+                    return False
+
+        results = await asyncio.gather(*(attempt(m.id) for m in members))
+        assert sum(results) == 5
+
+        async with Session() as session:
+            assert (await session.get(Book, b.id)).available_copies == 0
+            assert await session.scalar(select(func.count()).select_from(BorrowTransaction)) == 5
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_borrow_for_member_deleted_by_another_process(async_session, monkeypatch):
+    # Postgres enforces the foreign key; make SQLite do the same
+    await async_session.execute(text("PRAGMA foreign_keys=ON"))
+    b = await book_service.create_book(async_session, BookCreateRequest(title="B Gone", author="A", isbn="BG1", total_copies=2, available_copies=2))
+    m = await member_service.create_member(async_session, MemberCreate(name="M Gone", email="gone@t.com"))
+    book_id, member_id = b.id, m.id
+    snapshot = await member_service.get_member(async_session, member_id)
+    await members_crud.delete_by_id(async_session, member_id)
+
+    # this process's cache still holds the member another process deleted
+    async def stale_member(db, member_id):
+        return snapshot
+
+    monkeypatch.setattr(borrow_service, "get_member", stale_member)
+    with pytest.raises(borrow_service.MemberNotFound):
+        await borrow_service.borrow_book(async_session, member_id, book_id, date.today(), date.today())
+    with pytest.raises(borrow_service.MemberNotFound):
+        await borrow_service.borrow_books(async_session, member_id, [book_id], date.today(), date.today())
+    book = await books_crud.get_by_id(async_session, book_id)
+    await async_session.refresh(book)
+    assert book.available_copies == 2
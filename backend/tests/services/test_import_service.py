@@ -0,0 +1,112 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+from app.crud import books_crud
+from app.schemas.books import BookCreateRequest
+from app.schemas.imports import ImportFormat
+from app.services import import_service
+
+
+async def _chunks(data: bytes, size: int = 16):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+@pytest.mark.asyncio
+async def test_import_books_csv_batches_and_upserts(async_session):
+    existing = await books_crud.create(async_session, BookCreateRequest(title="Old", author="A", isbn="I2", total_copies=3, available_copies=1))
+
+    data = (
+        b"title,author,isbn,total_copies,available_copies\n"
+        b"One,A,I1,2,2\n"
+        b"\"Two, revised\",B,I2,5,\n"
+        b",C,I3,1,1\n"
+        b"Three,C,I3,1,1\n"
+        b"Four,D,I4,1,3\n"
+        b"Five,E,I5\n"
+    )
+    result = await import_service.import_books(async_session, _chunks(data), ImportFormat.csv, batch_size=2)
+
+    assert result.processed == 6
+    assert result.imported == 3
+    assert result.failed == 3
+    assert [e.line for e in result.errors] == [4, 6, 7]
+
+    updated = await books_crud.get_by_isbn(async_session, "I2")
+    await async_session.refresh(updated)
+    assert updated.id == existing.id
+    assert updated.title == "Two, revised"
+    assert updated.total_copies == 5
+    # two copies were on loan before the import and still are
+    assert updated.available_copies == 3
+    assert (await books_crud.get_by_isbn(async_session, "I3")).title == "Three"
+
+
+@pytest.mark.asyncio
+async def test_import_isolates_database_errors(async_session):
+    written = []
+
+    async def upsert(db, rows):
+        if any(row["isbn"] == "BAD" for row in rows):
+            raise IntegrityError("INSERT", {}, Exception("constraint failed"))
+        written.extend(row["isbn"] for row in rows)
+
+    data = b'{"title": "a", "author": "a", "isbn": "OK1"}\n{"title": "b", "author": "b", "isbn": "BAD"}\n{"title": "c", "author": "c", "isbn": "OK2"}\n'
+    result = await import_service.import_rows(async_session, _chunks(data), ImportFormat.ndjson, BookCreateRequest, "isbn", upsert)
+
+    assert sorted(written) == ["OK1", "OK2"]
+    assert result.imported == 2
+    assert result.failed == 1
+    assert result.errors[0].line == 2
+    assert "constraint failed" in result.errors[0].errors[0]
+
+
+@pytest.mark.asyncio
+async def test_import_counts_superseded_records_with_the_winner(async_session):
+    async def upsert(db, rows):
+        if any(row["title"] == "bad" for row in rows):
+            raise IntegrityError("INSERT", {}, Exception("constraint failed"))
+
+    data = (
+        b'{"title": "a", "author": "a", "isbn": "D1"}\n'
+        b'{"title": "bad", "author": "a", "isbn": "D1"}\n'
+        b'{"title": "b", "author": "b", "isbn": "D2"}\n'
+        b'{"title": "b2", "author": "b", "isbn": "D2"}\n'
+        b'{"title": "", "author": "b", "isbn": "D2"}\n'
+    )
+    result = await import_service.import_rows(async_session, _chunks(data), ImportFormat.ndjson, BookCreateRequest, "isbn", upsert)
+
+    # D1's surviving record failed, so the one it replaced was never applied either;
+    # D2's invalid last record leaves the valid one before it in place
+    assert (result.processed, result.imported, result.failed) == (5, 2, 3)
+    assert [e.line for e in result.errors] == [5, 2]
+
+
+@pytest.mark.asyncio
+async def test_import_lowering_total_below_loans_keeps_available_at_zero(async_session):
+    await books_crud.create(async_session, BookCreateRequest(title="Popular", author="A", isbn="L1", total_copies=5, available_copies=1))
+
+    data = b"title,author,isbn,total_copies\nPopular,A,L1,2\n"
+    result = await import_service.import_books(async_session, _chunks(data), ImportFormat.csv)
+
+    assert result.imported == 1
+    book = await books_crud.get_by_isbn(async_session, "L1")
+    await async_session.refresh(book)
+    assert (book.total_copies, book.available_copies) == (2, 0)
+
+
+@pytest.mark.asyncio
+async def test_import_stocks_copies_one_batch_at_a_time(async_session, monkeypatch):
+    monkeypatch.setattr(import_service.inventory_service.settings, "COPY_INVENTORY_ENABLED", True)
+    synced = []
+    sync_books = import_service.inventory_service.sync_books
+
+    async def record_sync(db, book_ids):
+        synced.append(len(book_ids))
+        await sync_books(db, book_ids)
+
+    monkeypatch.setattr(import_service.inventory_service, "sync_books", record_sync)
+    data = b"title,author,isbn,total_copies\nOne,A,S1,2\nTwo,A,S2,1\nThree,A,S3,1\n"
+    result = await import_service.import_books(async_session, _chunks(data), ImportFormat.csv, batch_size=2)
+
+    assert result.imported == 3
+    assert synced == [2, 1]
@@ -0,0 +1,91 @@
+import pytest
+from datetime import date
+from sqlalchemy import select
+from app.core.settings import settings
+from app.crud import inventory_crud
+from app.models.book import Book
+from app.models.borrow import BorrowTransaction
+from app.models.inventory import BookCopy
+from app.services import book_service, member_service, borrow_service, inventory_service
+from app.schemas.books import BookCreateRequest, BookUpdateRequest
+from app.schemas.members import MemberCreate
+from app.schemas.borrow import ReturnRequest
+
+
+async def _copies(db, book_id):
+    result = await db.execute(select(BookCopy.status).where(BookCopy.book_id == book_id).order_by(BookCopy.id))
+    return result.scalars().all()
+
+
+async def _available(db, book_id):
+    return await db.scalar(select(Book.available_copies).where(Book.id == book_id).execution_options(populate_existing=True))
+
+
+@pytest.mark.asyncio
+async def test_copy_inventory_borrow_and_return(async_session, monkeypatch):
+    # a loan made before the inventory was switched on
+    book = await book_service.create_book(async_session, BookCreateRequest(title="Bestseller", author="A", isbn="INV1", total_copies=3, available_copies=3))
+    alice = await member_service.create_member(async_session, MemberCreate(name="Alice", email="alice@inv.com"))
+    bob = await member_service.create_member(async_session, MemberCreate(name="Bob", email="bob@inv.com"))
+    await borrow_service.borrow_book(async_session, alice.id, book.id, date(2024, 1, 1), date(2024, 1, 15))
+
+    monkeypatch.setattr(settings, "COPY_INVENTORY_ENABLED", True)
+    assert await inventory_service.sync_all(async_session) == 1
+    assert await _copies(async_session, book.id) == ["on_loan", "available", "available"]
+    old_loan = await async_session.scalar(select(BorrowTransaction).where(BorrowTransaction.member_id == alice.id))
+    assert old_loan.copy_id is not None
+
+    # checkouts claim copies and leave the books row to the flush
+    borrow = await borrow_service.borrow_book(async_session, bob.id, book.id, date(2024, 1, 2), date(2024, 1, 16))
+    batch = await borrow_service.borrow_books(async_session, alice.id, [book.id], date(2024, 1, 3), date(2024, 1, 17))
+    assert batch.succeeded == 1
+    open_copies = (await async_session.scalars(select(BorrowTransaction.copy_id).where(BorrowTransaction.returned_date == None))).all()
+    assert borrow.copy_id in open_copies and len(set(open_copies)) == 3
+    assert await _available(async_session, book.id) == 2
+    with pytest.raises(borrow_service.BookNotAvailable):
+        await borrow_service.borrow_book(async_session, bob.id, book.id, date(2024, 1, 4), date(2024, 1, 18))
+
+    assert await inventory_service.flush_availability(async_session) == 1
+    assert await _available(async_session, book.id) == 0
+    assert await inventory_service.flush_availability(async_session) == 0
+
+    await borrow_service.return_book(async_session, ReturnRequest(member_id=bob.id, book_id=book.id, returned_date=date(2024, 1, 5)))
+    await borrow_service.return_books(async_session, alice.id, [book.id], date(2024, 1, 6))
+    await inventory_service.flush_availability(async_session)
+    assert await _available(async_session, book.id) == 2
+    assert sorted(await _copies(async_session, book.id)) == ["available", "available", "on_loan"]
+
+
+@pytest.mark.asyncio
+async def test_copy_inventory_follows_total_copies(async_session, monkeypatch):
+    monkeypatch.setattr(settings, "COPY_INVENTORY_ENABLED", True)
+    book = await book_service.create_book(async_session, BookCreateRequest(title="Stocked", author="A", isbn="INV2", total_copies=2, available_copies=2))
+    assert await _copies(async_session, book.id) == ["available", "available"]
+    member = await member_service.create_member(async_session, MemberCreate(name="Carol", email="carol@inv.com"))
+    await borrow_service.borrow_book(async_session, member.id, book.id, date(2024, 1, 1), date(2024, 1, 15))
+
+    # the copy on loan stays on loan; the spare one is retired
+    await book_service.update_book(async_session, book.id, BookUpdateRequest(total_copies=1))
+    assert await _copies(async_session, book.id) == ["on_loan", "retired"]
+    assert await _available(async_session, book.id) == 0
+
+    updated = await book_service.update_book(async_session, book.id, BookUpdateRequest(total_copies=3))
+    assert await _copies(async_session, book.id) == ["on_loan", "retired", "available", "available"]
+    assert updated.available_copies == 2
+    barcodes = (await async_session.scalars(select(BookCopy.barcode).where(BookCopy.book_id == book.id))).all()
+    assert len(set(barcodes)) == 4
+
+
+@pytest.mark.asyncio
+async def test_copy_inventory_without_background_flush(async_session, monkeypatch):
+    monkeypatch.setattr(settings, "COPY_INVENTORY_ENABLED", True)
+    monkeypatch.setattr(settings, "INVENTORY_SYNC_SECONDS", 0)
+    book = await book_service.create_book(async_session, BookCreateRequest(title="Inline", author="A", isbn="INV3", total_copies=2, available_copies=2))
+    member = await member_service.create_member(async_session, MemberCreate(name="Dan", email="dan@inv.com"))
+
+    # each checkout and return refreshes the books row itself
+    await borrow_service.borrow_book(async_session, member.id, book.id, date(2024, 1, 1), date(2024, 1, 15))
+    assert await _available(async_session, book.id) == 1
+    await borrow_service.return_book(async_session, ReturnRequest(member_id=member.id, book_id=book.id, returned_date=date(2024, 1, 5)))
+    assert await _available(async_session, book.id) == 2
+    assert await inventory_service.flush_availability(async_session) == 0
@@ -0,0 +1,192 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.db.base import Base
+from app.crud import jobs_crud
+from app.models.jobs import PendingJob, JOB_DEAD
+from app.services.job_service import JobQueue
+
+
+def _queue(**kwargs) -> JobQueue:
+    options = {"maxsize": 10, "workers": 1, "max_attempts": 2, "dead_after_attempts": 3, "retry_base_seconds": 0.01}
+    return JobQueue(**{**options, **kwargs})
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    # workers and the test read the table at the same time, which one shared
+    # in-memory connection can't serve; a file gives each session its own
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    await engine.dispose()
+
+
+async def _rows(db):
+    result = await db.execute(select(PendingJob).order_by(PendingJob.id).execution_options(populate_existing=True))
+    return result.scalars().all()
+
+
+@pytest.mark.asyncio
+async def test_inline_when_not_running(async_session):
+    queue, seen = _queue(), []
+
+    @queue.register("echo")
+    async def echo(db, value):
+        assert db is async_session
+        seen.append(value)
+
+    @queue.register("broken")
+    async def broken(db):
+        raise RuntimeError("boom")
+
+    await queue.enqueue(async_session, "echo", value=1)
+    # an inline failure is logged, not raised into the caller
+    await queue.enqueue(async_session, "broken")
+    assert seen == [1]
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_retried_then_persisted(session_factory):
+    queue, attempts = _queue(), []
+
+    @queue.register("flaky")
+    async def flaky(db, fail_times):
+        attempts.append(fail_times)
+        if len(attempts) <= fail_times:
+            raise RuntimeError("flaky")
+
+    @queue.register("stuck", durable=True)
+    async def stuck(db, n):
+        raise RuntimeError("stuck")
+
+    await queue.start(session_factory, sweep_seconds=0)
+    async with session_factory() as session:
+        try:
+            await queue.enqueue(session, "flaky", fail_times=1)
+            await queue.enqueue(session, "stuck", n=7)
+            for _ in range(100):
+                if len(attempts) == 2 and await _rows(session):
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await queue.stop(timeout=1)
+        [row] = await _rows(session)
+
+    assert attempts == [1, 1]
+    # the durable job ran out of in-memory retries and went to the table
+    assert (row.name, row.payload, row.attempts) == ("stuck", {"n": 7}, 2)
+    assert "RuntimeError: stuck" in row.last_error
+
+
+@pytest.mark.asyncio
+async def test_full_queue_persists_durable_jobs_and_sweep_runs_them(session_factory):
+    queue, seen = _queue(maxsize=1, workers=0), []
+
+    @queue.register("count", durable=True)
+    async def count(db, n):
+        seen.append(n)
+
+    @queue.register("ping")
+    async def ping(db):
+        seen.append("ping")
+
+    # no workers yet: the first job fills the queue
+    await queue.start(session_factory, sweep_seconds=0)
+    async with session_factory() as session:
+        await queue.enqueue(session, "count", n=1)
+        await queue.enqueue(session, "count", n=2)
+        await queue.enqueue(session, "ping")
+        assert [row.payload for row in await _rows(session)] == [{"n": 2}]
+
+        # stopping without workers persists what is still queued
+        await queue.stop(timeout=0.01)
+        assert [row.payload for row in await _rows(session)] == [{"n": 2}, {"n": 1}]
+        assert seen == []
+        await session.rollback()
+
+        queue.workers = 1
+        await queue.start(session_factory, sweep_seconds=0.01)
+        try:
+            for _ in range(100):
+                if len(seen) == 2:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await queue.stop(timeout=1)
+        # rows are run and deleted; the non-durable job was dropped when the queue was full
+        assert sorted(seen) == [1, 2]
+        assert await _rows(session) == []
+
+
+@pytest.mark.asyncio
+async def test_retry_due_while_stopping_is_persisted(session_factory):
+    queue, failed = _queue(workers=2), asyncio.Event()
+
+    @queue.register("flaky", durable=True)
+    async def flaky(db):
+        failed.set()
+        raise RuntimeError("flaky")
+
+    @queue.register("slow")
+    async def slow(db):
+        await asyncio.sleep(0.2)
+
+    await queue.start(session_factory, sweep_seconds=0)
+    async with session_factory() as session:
+        await queue.enqueue(session, "slow")
+        await queue.enqueue(session, "flaky")
+        await asyncio.wait_for(failed.wait(), 5)
+        # the retry comes due while stop() waits for the slow job
+        await queue.stop(timeout=1)
+        [row] = await _rows(session)
+    assert (row.name, row.attempts, row.last_error) == ("flaky", 1, "shutdown")
+
+
+@pytest.mark.asyncio
+async def test_persist_failure_does_not_fail_the_caller(session_factory, monkeypatch):
+    queue = _queue(maxsize=1, workers=0)
+
+    @queue.register("count", durable=True)
+    async def count(db, n):
+        pass
+
+    async def broken(db, rows):
+        raise RuntimeError("database down")
+
+    await queue.start(session_factory, sweep_seconds=0)
+    async with session_factory() as session:
+        await queue.enqueue(session, "count", n=1)
+        monkeypatch.setattr(jobs_crud, "add_jobs", broken)
+        # full queue and no table: logged and counted, not raised
+        await queue.enqueue(session, "count", n=2)
+        monkeypatch.undo()
+        await queue.stop(timeout=0.01)
+        assert [row.payload for row in await _rows(session)] == [{"n": 1}]
+
+
+@pytest.mark.asyncio
+async def test_claim_due_leases_and_reschedule_marks_dead(async_session):
+    now = datetime(2024, 1, 1, 12)
+    await jobs_crud.add_jobs(async_session, [
+        {"name": "a", "payload": {}, "attempts": 0, "run_after": now - timedelta(minutes=1), "last_error": None},
+        {"name": "b", "payload": {}, "attempts": 0, "run_after": now + timedelta(minutes=1), "last_error": None},
+    ])
+    await async_session.commit()
+
+    [claimed] = await jobs_crud.claim_due(async_session, now, timedelta(minutes=5), limit=10)
+    assert claimed.name == "a"
+    # leased: not due again until the lease runs out
+    assert await jobs_crud.claim_due(async_session, now, timedelta(minutes=5), limit=10) == []
+    assert [row.name for row in await jobs_crud.claim_due(async_session, now + timedelta(minutes=6), timedelta(minutes=5), limit=10)] == ["a", "b"]
+
+    await jobs_crud.reschedule(async_session, claimed.id, 3, now, "gave up", dead=True)
+    await async_session.commit()
+    # dead jobs are never claimed again
+    assert [row.name for row in await jobs_crud.claim_due(async_session, now + timedelta(hours=1), timedelta(minutes=5), limit=10)] == ["b"]
+    rows = await _rows(async_session)
+    assert [(row.name, row.status) for row in rows] == [("a", JOB_DEAD), ("b", "pending")]
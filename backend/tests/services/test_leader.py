@@ -0,0 +1,27 @@
+import asyncio
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.db.leader import lead
+
+
+@pytest.mark.asyncio
+async def test_lead_runs_jobs_until_cancelled():
+    # without a shared lock (SQLite) the process leads right away
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    started, stopped = asyncio.Event(), asyncio.Event()
+
+    async def job():
+        started.set()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            stopped.set()
+
+    leader = asyncio.create_task(lead(engine, lambda: [asyncio.create_task(job())], retry=1))
+    await asyncio.wait_for(started.wait(), 5)
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    # the jobs go down with the leader
+    assert stopped.is_set()
+    await engine.dispose()
@@ -0,0 +1,213 @@
+import asyncio
+import smtplib
+import pytest
+from datetime import date
+from email import message_from_bytes
+from sqlalchemy import select
+from app.core import mail
+from app.core.mail import FileTransport, Message, MemoryTransport, SMTPTransport
+from app.models.notices import LoanNotice
+from app.services import book_service, member_service, borrow_service, notice_service
+from app.schemas.books import BookCreateRequest
+from app.schemas.members import MemberCreate
+from app.schemas.borrow import ReturnRequest
+
+
+class FlakyTransport(MemoryTransport):
+    """Refuses messages to the addresses in ``refused``."""
+
+    def __init__(self, refused: set[str]):
+        super().__init__()
+        self.refused = refused
+
+    async def send(self, message: Message) -> None:
+        if message.to in self.refused:
+            raise ConnectionError("relay refused")
+        await super().send(message)
+
+
+async def _notices(db):
+    result = await db.execute(select(LoanNotice.borrow_id, LoanNotice.kind).order_by(LoanNotice.borrow_id))
+    return result.all()
+
+
+@pytest.mark.asyncio
+async def test_dispatch_groups_by_member_and_is_idempotent(async_session, monkeypatch):
+    # small chunks, so the chunking is exercised; each run's loans fit one batch
+    monkeypatch.setattr(notice_service, "NOTICE_BATCH_SIZE", 3)
+    monkeypatch.setattr(notice_service, "NOTICE_SEND_CHUNK", 1)
+    books = [
+        await book_service.create_book(async_session, BookCreateRequest(title=f"Title {i}", author="A", isbn=f"NT{i}", total_copies=3, available_copies=3))
+        for i in range(4)
+    ]
+    alice = await member_service.create_member(async_session, MemberCreate(name="Alice", email="alice@nt.com"))
+    bob = await member_service.create_member(async_session, MemberCreate(name="Bob", email="bob@nt.com"))
+    as_of = date(2024, 3, 10)
+
+    # alice: one overdue, one due tomorrow, one due too late for a reminder
+    await borrow_service.borrow_book(async_session, alice.id, books[0].id, date(2024, 2, 20), date(2024, 3, 5))
+    await borrow_service.borrow_book(async_session, alice.id, books[1].id, date(2024, 2, 27), date(2024, 3, 11))
+    await borrow_service.borrow_book(async_session, alice.id, books[2].id, date(2024, 3, 1), date(2024, 3, 20))
+    # bob: due today, and a returned overdue loan that is owed nothing
+    await borrow_service.borrow_book(async_session, bob.id, books[0].id, date(2024, 2, 25), date(2024, 3, 10))
+    await borrow_service.borrow_book(async_session, bob.id, books[3].id, date(2024, 2, 1), date(2024, 2, 15))
+    await borrow_service.return_book(async_session, ReturnRequest(member_id=bob.id, book_id=books[3].id, returned_date=date(2024, 3, 1)))
+
+    transport = MemoryTransport()
+    result = await notice_service.dispatch_notices(async_session, transport, as_of)
+    assert (result.loans, result.members, result.sent, result.failed) == (3, 2, 2, 0)
+    by_address = {message.to: message for message in transport.outbox}
+    assert by_address["alice@nt.com"].subject == "1 overdue library book"
+    assert "Title 0 (due 2024-03-05, 5 days overdue)" in by_address["alice@nt.com"].body
+    assert "Title 1 (due 2024-03-11)" in by_address["alice@nt.com"].body
+    assert "Title 2" not in by_address["alice@nt.com"].body
+    assert by_address["bob@nt.com"].subject == "1 library book due soon"
+
+    # a re-run the same day owes nothing
+    result = await notice_service.dispatch_notices(async_session, transport, as_of)
+    assert (result.loans, result.sent) == (0, 0)
+    assert len(transport.outbox) == 2
+
+    # days later: alice's reminded loan is overdue now, her third loan is due soon
+    result = await notice_service.dispatch_notices(async_session, transport, date(2024, 3, 18))
+    assert (result.loans, result.members) == (3, 2)
+    kinds = {(borrow_id, kind) for borrow_id, kind in await _notices(async_session)}
+    assert len(kinds) == 6
+    assert transport.outbox[-2].to == "alice@nt.com"
+    assert transport.outbox[-2].subject == "1 overdue library book"
+    assert "Title 2 (due 2024-03-20)" in transport.outbox[-2].body
+    assert transport.outbox[-1].subject == "1 overdue library book"
+
+
+@pytest.mark.asyncio
+async def test_dispatch_sends_each_batch_before_reading_the_next(async_session, monkeypatch):
+    monkeypatch.setattr(notice_service, "NOTICE_BATCH_SIZE", 2)
+    read = notice_service.notices_crud.get_unnotified_loans
+    outbox_sizes = []
+
+    async def get_unnotified_loans(*args):
+        outbox_sizes.append(len(transport.outbox))
+        return await read(*args)
+
+    monkeypatch.setattr(notice_service.notices_crud, "get_unnotified_loans", get_unnotified_loans)
+    book = await book_service.create_book(async_session, BookCreateRequest(title="Paged", author="A", isbn="NTB", total_copies=3, available_copies=3))
+    alice = await member_service.create_member(async_session, MemberCreate(name="Alice", email="alice@ntb.com"))
+    bob = await member_service.create_member(async_session, MemberCreate(name="Bob", email="bob@ntb.com"))
+    await borrow_service.borrow_book(async_session, alice.id, book.id, date(2024, 1, 1), date(2024, 1, 8))
+    await borrow_service.borrow_book(async_session, bob.id, book.id, date(2024, 1, 1), date(2024, 1, 9))
+    await borrow_service.borrow_book(async_session, alice.id, book.id, date(2024, 1, 1), date(2024, 1, 10))
+
+    transport = MemoryTransport()
+    result = await notice_service.dispatch_notices(async_session, transport, date(2024, 1, 12))
+    assert (result.loans, result.sent) == (3, 3)
+    assert outbox_sizes == [0, 2, 3]
+    # alice's loans fell in different batches
+    assert [m.to for m in transport.outbox] == ["alice@ntb.com", "bob@ntb.com", "alice@ntb.com"]
+
+
+@pytest.mark.asyncio
+async def test_failed_sends_are_retried_on_the_next_run(async_session, tmp_path):
+    book = await book_service.create_book(async_session, BookCreateRequest(title="Late", author="A", isbn="NTF", total_copies=2, available_copies=2))
+    alice = await member_service.create_member(async_session, MemberCreate(name="Alice", email="alice@ntf.com"))
+    bob = await member_service.create_member(async_session, MemberCreate(name="Bob", email="bob@ntf.com"))
+    await borrow_service.borrow_book(async_session, alice.id, book.id, date(2024, 1, 1), date(2024, 1, 10))
+    bob_loan_id = (await borrow_service.borrow_book(async_session, bob.id, book.id, date(2024, 1, 1), date(2024, 1, 10))).id
+
+    transport = FlakyTransport(refused={"bob@ntf.com"})
+    result = await notice_service.dispatch_notices(async_session, transport, date(2024, 1, 12))
+    assert (result.sent, result.failed) == (1, 1)
+    # bob's claim was released
+    assert bob_loan_id not in [borrow_id for borrow_id, _ in await _notices(async_session)]
+
+    files = FileTransport(str(tmp_path), "library@example.com")
+    result = await notice_service.dispatch_notices(async_session, files, date(2024, 1, 12))
+    assert (result.loans, result.sent, result.failed) == (1, 1, 0)
+    [eml] = tmp_path.iterdir()
+    email = message_from_bytes(eml.read_bytes())
+    assert (email["To"], email["From"], email["Subject"]) == ("bob@ntf.com", "library@example.com", "1 overdue library book")
+
+
+class StuckTransport(MemoryTransport):
+    """Never finishes sending to the addresses in ``stuck``."""
+
+    def __init__(self, stuck: set[str]):
+        super().__init__()
+        self.stuck = stuck
+        self.waiting = asyncio.Event()
+
+    async def send(self, message: Message) -> None:
+        if message.to in self.stuck:
+            self.waiting.set()
+            await asyncio.Event().wait()
+        await super().send(message)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_run_releases_unsent_claims(async_session):
+    book = await book_service.create_book(async_session, BookCreateRequest(title="Late", author="A", isbn="NTC", total_copies=2, available_copies=2))
+    alice = await member_service.create_member(async_session, MemberCreate(name="Alice", email="alice@ntc.com"))
+    bob = await member_service.create_member(async_session, MemberCreate(name="Bob", email="bob@ntc.com"))
+    alice_loan_id = (await borrow_service.borrow_book(async_session, alice.id, book.id, date(2024, 1, 1), date(2024, 1, 10))).id
+    await borrow_service.borrow_book(async_session, bob.id, book.id, date(2024, 1, 1), date(2024, 1, 10))
+
+    transport = StuckTransport(stuck={"bob@ntc.com"})
+    run = asyncio.create_task(notice_service.dispatch_notices(async_session, transport, date(2024, 1, 12)))
+    await asyncio.wait_for(transport.waiting.wait(), 5)
+    run.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await run
+    # alice's notice went out and stays recorded; bob's is owed again
+    assert [m.to for m in transport.outbox] == ["alice@ntc.com"]
+    assert [borrow_id for borrow_id, _ in await _notices(async_session)] == [alice_loan_id]
+
+    result = await notice_service.dispatch_notices(async_session, MemoryTransport(), date(2024, 1, 12))
+    assert (result.loans, result.sent) == (1, 1)
+
+
+class StubSMTP:
+    """Stands in for ``smtplib.SMTP``; the relay drops every connection after ``drop_after`` messages."""
+
+    connections: list["StubSMTP"] = []
+    drop_after = 1
+
+    def __init__(self, host, port, timeout):
+        self.sent, self.closed = [], False
+        StubSMTP.connections.append(self)
+
+    def starttls(self):
+        pass
+
+    def login(self, username, password):
+        pass
+
+    def send_message(self, email):
+        if len(self.sent) >= self.drop_after:
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        self.sent.append(email["To"])
+
+    def close(self):
+        self.closed = True
+
+    def quit(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_smtp_transport_reconnects_when_the_relay_drops_an_idle_connection(monkeypatch):
+    monkeypatch.setattr(mail.smtplib, "SMTP", StubSMTP)
+    monkeypatch.setattr(StubSMTP, "connections", [])
+    transport = SMTPTransport("relay", 25, "library@example.com", max_connections=1)
+
+    for to in ("a@smtp.com", "b@smtp.com", "c@smtp.com"):
+        await transport.send(Message(to=to, subject="s", body="b"))
+    first, second, third = StubSMTP.connections
+    assert (first.sent, second.sent, third.sent) == (["a@smtp.com"], ["b@smtp.com"], ["c@smtp.com"])
+    assert first.closed and second.closed and not third.closed
+
+    # a fresh connection that fails is not retried
+    monkeypatch.setattr(StubSMTP, "drop_after", 0)
+    await transport.aclose()
+    with pytest.raises(smtplib.SMTPServerDisconnected):
+        await transport.send(Message(to="d@smtp.com", subject="s", body="b"))
+    assert len(StubSMTP.connections) == 4 and StubSMTP.connections[-1].closed
+    assert third.closed
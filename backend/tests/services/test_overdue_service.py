@@ -0,0 +1,50 @@
+import pytest
+from datetime import date
+from app.services import book_service, member_service, borrow_service, overdue_service
+from app.schemas.books import BookCreateRequest
+from app.schemas.members import MemberCreate
+from app.schemas.borrow import ReturnRequest
+from app.schemas.overdue import OverdueSource
+
+
+@pytest.mark.asyncio
+async def test_overdue_report_live_and_snapshot(async_session):
+    b1 = await book_service.create_book(async_session, BookCreateRequest(title="Late One", author="A", isbn="OD1", total_copies=2, available_copies=2))
+    b2 = await book_service.create_book(async_session, BookCreateRequest(title="Late Two", author="A", isbn="OD2", total_copies=2, available_copies=2))
+    alice = await member_service.create_member(async_session, MemberCreate(name="Alice", email="alice@od.com"))
+    bob = await member_service.create_member(async_session, MemberCreate(name="Bob", email="bob@od.com"))
+
+    await borrow_service.borrow_book(async_session, alice.id, b1.id, date(2024, 1, 1), date(2024, 1, 10))
+    await borrow_service.borrow_book(async_session, alice.id, b2.id, date(2024, 1, 1), date(2024, 1, 20))
+    await borrow_service.borrow_book(async_session, bob.id, b1.id, date(2024, 1, 1), date(2024, 2, 1))
+    # returned loans are never overdue
+    await borrow_service.borrow_book(async_session, bob.id, b2.id, date(2024, 1, 1), date(2024, 1, 5))
+    await borrow_service.return_book(async_session, ReturnRequest(member_id=bob.id, book_id=b2.id, returned_date=date(2024, 1, 30)))
+
+    report = await overdue_service.overdue_report(async_session, as_of=date(2024, 1, 25))
+    assert report.total_loans == 2
+    assert [m.member_id for m in report.members] == [alice.id]
+    assert [loan.days_overdue for loan in report.members[0].loans] == [15, 5]
+    assert report.members[0].max_days_overdue == 15
+
+    report = await overdue_service.overdue_report(async_session, as_of=date(2024, 2, 5), member_id=bob.id)
+    assert report.total_loans == 1
+    assert report.members[0].loans[0].days_overdue == 4
+
+    # nothing scanned yet
+    snapshot = await overdue_service.overdue_report(async_session, source=OverdueSource.snapshot)
+    assert snapshot.total_loans == 0
+
+    assert await overdue_service.scan_overdue(async_session, as_of=date(2024, 2, 5)) == 3
+    snapshot = await overdue_service.overdue_report(async_session, source=OverdueSource.snapshot)
+    assert snapshot.as_of == date(2024, 2, 5)
+    assert snapshot.scanned_at is not None
+    assert snapshot.total_loans == 3
+    assert [m.member_name for m in snapshot.members] == ["Alice", "Bob"]
+    assert snapshot.members[0].loans[0].book_title == "Late One"
+
+    # a rescan replaces the snapshot instead of appending to it
+    assert await overdue_service.scan_overdue(async_session, as_of=date(2024, 1, 15)) == 1
+    snapshot = await overdue_service.overdue_report(async_session, source=OverdueSource.snapshot, member_id=alice.id)
+    assert snapshot.total_loans == 1
+    assert snapshot.members[0].loans[0].days_overdue == 5
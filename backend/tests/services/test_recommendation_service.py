@@ -0,0 +1,83 @@
+import pytest
+from datetime import date
+from app.services import book_service, member_service, borrow_service, recommendation_service
+from app.schemas.books import BookCreateRequest
+from app.schemas.members import MemberCreate
+from app.schemas.borrow import ReturnRequest
+
+
+@pytest.mark.asyncio
+async def test_recommendations_update_incrementally(async_session):
+    books = [
+        await book_service.create_book(async_session, BookCreateRequest(title=f"Rec {i}", author="A", isbn=f"REC{i}", total_copies=5, available_copies=5))
+        for i in range(4)
+    ]
+    members = [await member_service.create_member(async_session, MemberCreate(name=f"M{i}", email=f"m{i}@rec.com")) for i in range(3)]
+    b0, b1, b2, b3 = (b.id for b in books)
+
+    async def borrow(member, book_id):
+        await borrow_service.borrow_book(async_session, member.id, book_id, date(2024, 1, 1), date(2024, 1, 15))
+
+    await borrow(members[0], b0)
+    await borrow(members[0], b1)
+    await borrow(members[1], b0)
+    await borrow(members[1], b1)
+    await borrow(members[1], b2)
+    assert await recommendation_service.update_cooccurrence(async_session) == 5
+
+    recs = await recommendation_service.recommendations_for(async_session, b0)
+    assert [(r.book_id, r.members) for r in recs] == [(b1, 2), (b2, 1)]
+    assert recs[0].title == "Rec 1"
+
+    # borrowing a book again does not count the member twice
+    await borrow_service.return_book(async_session, ReturnRequest(member_id=members[0].id, book_id=b1, returned_date=date(2024, 1, 5)))
+    await borrow(members[0], b1)
+    # a new member's borrows are folded in on top of the existing counts, in small batches
+    await borrow(members[2], b3)
+    await borrow(members[2], b2)
+    await borrow(members[2], b0)
+    assert await recommendation_service.update_cooccurrence(async_session, batch_size=2) == 4
+    assert await recommendation_service.update_cooccurrence(async_session) == 0
+
+    recs = await recommendation_service.recommendations_for(async_session, b0)
+    assert [(r.book_id, r.members) for r in recs] == [(b2, 2), (b1, 2), (b3, 1)]
+    assert [r.book_id for r in await recommendation_service.recommendations_for(async_session, b0, limit=1)] == [b2]
+
+
+def test_pair_increments_reborrow_past_history_limit():
+    # member 1 borrowed 10, 11, 12 before; only the 2 most recent are loaded and paired with new borrows
+    counts = recommendation_service._pair_increments([(1, 1, 13), (2, 1, 10)], {1: [11, 12]}, {(1, 10)}, history_limit=2)
+    assert counts == {(13, 11): 1, (11, 13): 1, (13, 12): 1, (12, 13): 1}
+
+
+@pytest.mark.asyncio
+async def test_update_loads_capped_histories_a_chunk_of_members_at_a_time(async_session, monkeypatch):
+    monkeypatch.setattr(recommendation_service, "RECOMMEND_MEMBER_CHUNK", 1)
+    monkeypatch.setattr(recommendation_service, "RECOMMEND_HISTORY_LIMIT", 1)
+    books = [
+        await book_service.create_book(async_session, BookCreateRequest(title=f"Cap {i}", author="A", isbn=f"CAP{i}", total_copies=5, available_copies=5))
+        for i in range(3)
+    ]
+    members = [await member_service.create_member(async_session, MemberCreate(name=f"C{i}", email=f"c{i}@cap.com")) for i in range(2)]
+    b0, b1, b2 = (b.id for b in books)
+
+    async def borrow(member, book_id):
+        await borrow_service.borrow_book(async_session, member.id, book_id, date(2024, 1, 1), date(2024, 1, 15))
+        await borrow_service.return_book(async_session, ReturnRequest(member_id=member.id, book_id=book_id, returned_date=date(2024, 1, 2)))
+
+    for member in members:
+        await borrow(member, b0)
+        await borrow(member, b1)
+    assert await recommendation_service.update_cooccurrence(async_session) == 4
+
+    # b0 fell out of the one-book history but was borrowed before: no new pairs for it,
+    # and b2 pairs only with the most recent book, b0 again
+    for member in members:
+        await borrow(member, b0)
+        await borrow(member, b2)
+    assert await recommendation_service.update_cooccurrence(async_session) == 4
+
+    recs = await recommendation_service.recommendations_for(async_session, b0)
+    assert [(r.book_id, r.members) for r in recs] == [(b2, 2), (b1, 2)]
+    recs = await recommendation_service.recommendations_for(async_session, b1)
+    assert [(r.book_id, r.members) for r in recs] == [(b0, 2)]
@@ -0,0 +1,60 @@
+import pytest
+from datetime import date
+from sqlalchemy import delete
+from app.services import book_service, member_service, borrow_service, stats_service
+from app.models.stats import BookStats, MemberStats
+from app.schemas.books import BookCreateRequest
+from app.schemas.members import MemberCreate
+from app.schemas.borrow import ReturnRequest
+
+
+@pytest.mark.asyncio
+async def test_circulation_stats_follow_borrows_and_rebuild(async_session):
+    b1 = await book_service.create_book(async_session, BookCreateRequest(title="Popular", author="A", isbn="ST1", total_copies=3, available_copies=3))
+    b2 = await book_service.create_book(async_session, BookCreateRequest(title="Niche", author="A", isbn="ST2", total_copies=3, available_copies=3))
+    b3 = await book_service.create_book(async_session, BookCreateRequest(title="Unread", author="A", isbn="ST3", total_copies=1, available_copies=1))
+    alice = await member_service.create_member(async_session, MemberCreate(name="Alice", email="alice@st.com"))
+    bob = await member_service.create_member(async_session, MemberCreate(name="Bob", email="bob@st.com"))
+
+    await borrow_service.borrow_book(async_session, alice.id, b1.id, date(2024, 1, 1), date(2024, 1, 15))
+    await borrow_service.return_book(async_session, ReturnRequest(member_id=alice.id, book_id=b1.id, returned_date=date(2024, 1, 10)))
+    await borrow_service.borrow_book(async_session, alice.id, b1.id, date(2024, 2, 1), date(2024, 2, 15))
+    await borrow_service.borrow_books(async_session, bob.id, [b1.id, b2.id], date(2024, 3, 1), date(2024, 3, 15))
+    await borrow_service.return_books(async_session, bob.id, [b2.id, b3.id], date(2024, 3, 5))
+
+    popular = await stats_service.popular_books(async_session, limit=5)
+    assert [(b.title, b.borrow_count, b.return_count) for b in popular] == [("Popular", 3, 1), ("Niche", 1, 1)]
+    assert popular[0].last_borrowed_date == date(2024, 3, 1)
+
+    active = await stats_service.active_members(async_session, limit=1)
+    # ties go to the most recent member
+    assert [(m.name, m.borrow_count) for m in active] == [("Bob", 2)]
+
+    stats = await stats_service.book_stats(async_session, b3.id)
+    assert (stats.borrow_count, stats.return_count, stats.last_borrowed_date) == (0, 0, None)
+
+    # the rebuild reproduces the incrementally maintained counters, including after drift
+    before = [b.model_dump() for b in await stats_service.popular_books(async_session)]
+    await async_session.execute(delete(BookStats))
+    await async_session.execute(delete(MemberStats))
+    await async_session.commit()
+    assert await stats_service.popular_books(async_session) == []
+
+    result = await stats_service.rebuild_stats(async_session)
+    assert (result.books, result.members) == (2, 2)
+    assert [b.model_dump() for b in await stats_service.popular_books(async_session)] == before
+
+
+@pytest.mark.asyncio
+async def test_replayed_circulation_count_is_skipped(async_session):
+    book = await book_service.create_book(async_session, BookCreateRequest(title="Replayed", author="A", isbn="ST4", total_copies=1, available_copies=1))
+    member = await member_service.create_member(async_session, MemberCreate(name="Carol", email="carol@st.com"))
+    borrow = await borrow_service.borrow_book(async_session, member.id, book.id, date(2024, 1, 1), date(2024, 1, 15))
+    await borrow_service.return_book(async_session, ReturnRequest(member_id=member.id, book_id=book.id, returned_date=date(2024, 1, 10)))
+
+    # a durable job delivered again after its commit
+    entry = [borrow.id, member.id, book.id, "2024-01-01", "2024-01-15"]
+    await borrow_service.count_circulation(async_session, borrows=[entry], returns=[entry])
+
+    stats = await stats_service.book_stats(async_session, book.id)
+    assert (stats.borrow_count, stats.return_count) == (1, 1)
@@ -1,5 +1,5 @@
 import { useEffect, useState } from 'react';
-import { api } from '../services/api';
+import { api, subscribeEvents } from '../services/api';
 import { Book, Users, Repeat } from 'lucide-react';
 import { Link } from 'react-router-dom';
 import '../styles/PageLayout.css';
@@ -44,6 +44,11 @@ const Home = () => {
             }
         }
         loadStats();
+        // the server announces the open-loan count whenever loans change, in any worker
+        return subscribeEvents({
+            loans: ({ active_borrows }) => setStats((s) => ({ ...s, activeBorrows: active_borrows })),
+            reset: loadStats,
+        }, { kinds: ['loans'], onOpen: loadStats });
     }, []);
 
     return (
@@ -81,6 +81,36 @@ export const api = {
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(data),
         }),
+    borrowBooks: (data) =>
+        request(`${API_BASE}/borrow/batch`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(data),
+        }),
+    returnBooks: (data) =>
+        request(`${API_BASE}/borrow/batch`, {
+            method: 'PATCH',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(data),
+        }),
+};
+
+// Live availability and circulation changes over Server-Sent Events.
+// `handlers` maps event kinds ('availability', 'borrow', 'return', 'reset')
+// to callbacks taking the parsed payload. EventSource reconnects on its own and
+// resumes from the last event it saw; on 'reset' events were missed and the
+// caller should re-fetch. Returns a function that closes the stream.
+export const subscribeEvents = (handlers, { bookIds = [], kinds = [], onOpen } = {}) => {
+    const params = new URLSearchParams();
+    bookIds.forEach((id) => params.append('book_id', id));
+    kinds.forEach((kind) => params.append('kind', kind));
+    const source = new EventSource(`${API_BASE}/events/?${params}`);
+    Object.entries(handlers).forEach(([kind, handler]) => {
+        source.addEventListener(kind, (event) => handler(JSON.parse(event.data)));
+    });
+    // fires on every (re)connect, once events are flowing
+    if (onOpen) source.addEventListener('open', onOpen);
+    return () => source.close();
 };
 
 const request = async (url, options) => {